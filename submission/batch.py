@@ -0,0 +1,162 @@
+'''non-interactive batch analyzer for plain board files
+
+analyses every board file given by directories or glob patterns on a process pool
+and writes one JSON object per file, in input order, e.g.
+    python batch.py boards/ 'more/**/*.txt' --jobs 8 --output results.jsonl
+
+only a bounded window of chunks is in flight at any time, so memory stays flat for any number of files;
+with --cache the results of every position are kept in a poscache.PositionCache shared by the workers
+and by later runs
+'''
+import argparse
+import collections
+import concurrent.futures
+import functools
+import glob
+import json
+import os
+import random
+import sys
+from chess_puzzle import *
+import poscache
+
+def iter_paths(patterns: list[str]):
+    '''yields the board files named by patterns in order
+    a directory stands for its files in sorted order, anything else is a glob pattern (** is recursive)
+
+    Parameters:
+        patterns (list[str]): directories, files or glob patterns
+    Returns:
+        generator of str: file names
+    '''
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for name in sorted(os.listdir(pattern)):
+                path = os.path.join(pattern, name)
+                if os.path.isfile(path):
+                    yield path
+        elif os.path.isfile(pattern):
+            yield pattern
+        else:
+            yield from sorted(glob.iglob(pattern, recursive=True))
+
+def analyse_board(B: Board, strategy: str = 'greedy', seed: str = '', cache: poscache.PositionCache = None) -> dict:
+    '''analyses a valid board for both sides and suggests a Black move
+
+    Parameters:
+        B (Board): board configuration
+        strategy (str): key of chess_puzzle.strategies used for the Black move
+        seed (str): seed of the random choices of the strategy, so that results are reproducible
+        cache (PositionCache): optional cache to look up and store the status and the Black move
+    Returns:
+        dict: check, checkmate and stalemate per side and the Black move in crCR notation or None
+    '''
+    result = {'valid': True}
+    for side, name in ((True, 'white'), (False, 'black')):
+        status = cache.status(B, side) if cache is not None else game_status(B, side)
+        result[name] = status._asdict()
+    move = None
+    if not result['black']['checkmate'] and not result['black']['stalemate']:
+        random.seed(seed)
+        if cache is not None:
+            move = cache.move(B, False, strategy)
+        else:
+            piece, x, y = find_black_move(B, strategy)
+            move = index2location(piece.pos_x, piece.pos_y) + index2location(x, y)
+    result['black_move'] = move
+    return result
+
+def analyse_file(filename: str, strategy: str = 'greedy', cache: str = None) -> dict:
+    '''reads and analyses one board file, invalid files are reported with the reason
+
+    Parameters:
+        filename (str): plain board file
+        strategy (str): key of chess_puzzle.strategies used for the Black move
+        cache (str): optional database file of a poscache.PositionCache
+    Returns:
+        dict: the file name and either the analysis or valid False with an error
+    '''
+    try:
+        B = load_board(filename)
+    except IOError as error:
+        return {'file': filename, 'valid': False, 'error': str(error)}
+    return {'file': filename, **analyse_board(B, strategy, filename, poscache.open_cache(cache) if cache else None)}
+
+def analyse_chunk(filenames: list[str], strategy: str = 'greedy', cache: str = None) -> list[dict]:
+    '''analyses a list of files in one worker task'''
+    return [analyse_file(filename, strategy, cache) for filename in filenames]
+
+def chunks(iterable, size: int):
+    '''yields lists of up to size consecutive items of iterable'''
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def ordered_map(executor: concurrent.futures.Executor, func, iterable, window: int):
+    '''yields func(item) for every item in input order, with at most window calls submitted at a time
+
+    Parameters:
+        executor (Executor): executor running the calls
+        func: picklable function of one argument
+        iterable: arguments, consumed lazily
+        window (int): maximum number of pending calls
+    Returns:
+        generator: results in the order of iterable
+    '''
+    pending = collections.deque()
+    for item in iterable:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def analyse_paths(patterns: list[str], jobs: int = None, chunk_size: int = 64, strategy: str = 'greedy',
+                  cache: str = None):
+    '''yields the analysis of every file named by patterns in input order
+
+    Parameters:
+        patterns (list[str]): directories, files or glob patterns
+        jobs (int): number of worker processes, all cores if None, no pool if 1
+        chunk_size (int): number of files per worker task
+        strategy (str): key of chess_puzzle.strategies used for the Black move
+        cache (str): optional database file of a poscache.PositionCache shared by the workers
+    Returns:
+        generator of dict: one result per file
+    '''
+    jobs = jobs or os.cpu_count() or 1
+    func = functools.partial(analyse_chunk, strategy=strategy, cache=cache)
+    paths = chunks(iter_paths(patterns), chunk_size)
+    if jobs == 1:
+        for chunk in paths:
+            yield from func(chunk)
+        return
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+        for results in ordered_map(executor, func, paths, 2 * jobs):
+            yield from results
+
+def main(argv: list[str] = None) -> None:
+    '''parses the command line and writes the results as JSON Lines'''
+    parser = argparse.ArgumentParser(description='analyse plain board files in parallel')
+    parser.add_argument('patterns', nargs='+', help='directories, board files or glob patterns')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes, all cores by default')
+    parser.add_argument('--chunk-size', type=int, default=64, help='files per worker task')
+    parser.add_argument('--strategy', choices=sorted(strategies), default='greedy', help='strategy for the Black move')
+    parser.add_argument('--output', default=None, help='output file, standard output by default')
+    parser.add_argument('--cache', default=None, help='sqlite file of a position cache kept across runs')
+    args = parser.parse_args(argv)
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        for result in analyse_paths(args.patterns, args.jobs, args.chunk_size, args.strategy, args.cache):
+            output.write(json.dumps(result) + '\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,370 @@
+'''benchmarks for chess_puzzle
+
+run from the submission directory, e.g.
+    python bench_chess_puzzle.py lookups --size 26 --pieces 60
+    python bench_chess_puzzle.py scaling --output results.json
+'''
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from chess_puzzle import *
+import binformat
+from snapshot import BoardSnapshot
+import search
+import vectorized
+
+def random_board(size: int, n_pieces: int, seed: int = 0) -> Board:
+    '''returns a reproducible random board with one king for each side and bishops on other squares
+
+    Parameters:
+        size (int): size of the board
+        n_pieces (int): total number of pieces including both kings
+        seed (int): seed of the random generator
+    Returns:
+        Board: board configuration with a plain list of pieces
+    '''
+    rng = random.Random(seed)
+    squares = rng.sample([(x, y) for x in range(1, size + 1) for y in range(1, size + 1)], n_pieces)
+    pieces = [King(*squares[0], True), King(*squares[1], False)]
+    for i, square in enumerate(squares[2:]):
+        pieces.append(Bishop(square[0], square[1], i % 2 == 0))
+    return (size, pieces)
+
+def sparse_board(size: int, n_pieces: int, seed: int = 0) -> Board:
+    '''returns a reproducible random board like random_board without listing every square, for very large sizes'''
+    rng = random.Random(seed)
+    squares = [divmod(square, size) for square in rng.sample(range(size * size), n_pieces)]
+    pieces = [King(squares[0][0] + 1, squares[0][1] + 1, True), King(squares[1][0] + 1, squares[1][1] + 1, False)]
+    for i, (x, y) in enumerate(squares[2:]):
+        pieces.append(Bishop(x + 1, y + 1, i % 2 == 0))
+    return (size, pieces)
+
+def time_call(func, repeat: int) -> float:
+    '''returns the best wall time in seconds of repeat calls of func'''
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def lookup_workload(B: Board) -> None:
+    '''checks both sides for check, which calls can_reach of every piece'''
+    is_check(True, B)
+    is_check(False, B)
+
+def bench_lookups(size: int, n_pieces: int, repeat: int, seed: int = 0) -> dict:
+    '''compares lookup heavy work on a plain piece list and on an IndexedPieceList
+
+    Parameters:
+        size (int): size of the board
+        n_pieces (int): total number of pieces
+        repeat (int): number of timed repetitions
+        seed (int): seed of the random board
+    Returns:
+        dict: best times in seconds for both representations and the speedup
+    '''
+    B = random_board(size, n_pieces, seed)
+    B_indexed = indexed_board(B)
+    plain = time_call(lambda: lookup_workload(B), repeat)
+    indexed = time_call(lambda: lookup_workload(B_indexed), repeat)
+    return {'size': size, 'pieces': n_pieces, 'plain': plain, 'indexed': indexed, 'speedup': plain / indexed}
+
+def status_workload(B: Board) -> None:
+    '''computes checkmate, stalemate and the list of legal moves for both sides'''
+    for side in (True, False):
+        is_checkmate(side, B)
+        is_stalemate(side, B)
+        list(generate_legal_moves(side, B))
+
+def bench_status(size: int, n_pieces: int, repeat: int, boards: int = 10) -> dict:
+    '''times checkmate, stalemate and move generation on several random boards
+
+    Parameters:
+        size (int): size of the boards
+        n_pieces (int): total number of pieces
+        repeat (int): number of timed repetitions
+        boards (int): number of random boards, seeded 0 to boards - 1
+    Returns:
+        dict: best time in seconds summed over the boards
+    '''
+    Bs = [indexed_board(random_board(size, n_pieces, seed)) for seed in range(boards)]
+    total = sum(time_call(lambda: status_workload(B), repeat) for B in Bs)
+    return {'size': size, 'pieces': n_pieces, 'boards': boards, 'time': total}
+
+def bench_binary(size: int, n_pieces: int, boards: int, repeat: int) -> dict:
+    '''compares reading plain board files with read_board and decoding the same boards from a binary container
+
+    Parameters:
+        size (int): size of the boards
+        n_pieces (int): total number of pieces
+        boards (int): number of random boards, seeded 0 to boards - 1
+        repeat (int): number of timed repetitions
+    Returns:
+        dict: best times in seconds to read all boards, boards per second and bytes on disk of both formats
+    '''
+    Bs = [random_board(size, n_pieces, seed) for seed in range(boards)]
+    with tempfile.TemporaryDirectory() as directory:
+        filenames = [os.path.join(directory, f'{i}.txt') for i in range(boards)]
+        for filename, B in zip(filenames, Bs):
+            save_board(filename, B)
+        archive = os.path.join(directory, 'boards.bin')
+        binformat.write_archive(archive, Bs)
+        plain = time_call(lambda: [read_board(filename) for filename in filenames], repeat)
+        def decode_all():
+            with binformat.BoardArchive(archive) as boards_archive:
+                list(boards_archive)
+        binary = time_call(decode_all, repeat)
+        plain_bytes = sum(os.path.getsize(filename) for filename in filenames)
+        binary_bytes = os.path.getsize(archive)
+    return {'size': size, 'pieces': n_pieces, 'boards': boards, 'plain': plain, 'binary': binary,
+            'plain_rate': boards / plain, 'binary_rate': boards / binary,
+            'plain_bytes': plain_bytes, 'binary_bytes': binary_bytes}
+
+def percentiles(samples: list[float], points: tuple = (50, 90, 99)) -> dict:
+    '''returns the nearest-rank percentiles, the mean and the maximum of samples
+
+    Parameters:
+        samples (list[float]): measured times
+        points (tuple): percentiles to report
+    Returns:
+        dict: p50, p90, ... keys, mean and max
+    '''
+    ordered = sorted(samples)
+    result = {f'p{point}': ordered[max(0, -(-point * len(ordered) // 100) - 1)] for point in points}
+    result['mean'] = sum(ordered) / len(ordered)
+    result['max'] = ordered[-1]
+    return result
+
+scaling_functions = {'is_checkmate': lambda B: is_checkmate(False, B),
+                     'is_stalemate': lambda B: is_stalemate(False, B),
+                     'find_black_move': find_black_move,
+                     'conf2unicode': conf2unicode
+                     }
+
+def bench_scaling(sizes: list[int], densities: list[float], boards: int = 20, seed: int = 0) -> list[dict]:
+    '''times each function of scaling_functions once on each of several random boards for every size and density
+
+    Parameters:
+        sizes (list[int]): board sizes
+        densities (list[float]): fractions of occupied squares, at least the two kings are placed
+        boards (int): number of random boards per size and density
+        seed (int): seed of the first board, the others use the following seeds
+    Returns:
+        list[dict]: one result per size, density and function with latency percentiles in seconds
+    '''
+    results = []
+    for size in sizes:
+        for density in densities:
+            n_pieces = min(size * size, max(2, round(density * size * size)))
+            Bs = [indexed_board(random_board(size, n_pieces, seed + i)) for i in range(boards)]
+            for name, func in scaling_functions.items():
+                func(Bs[0]) # warm up the per-size tables
+                random.seed(seed)
+                samples = []
+                for B in Bs:
+                    start = time.perf_counter()
+                    func(B)
+                    samples.append(time.perf_counter() - start)
+                results.append({'function': name, 'size': size, 'density': density, 'pieces': n_pieces,
+                                'boards': boards, **percentiles(samples)})
+    return results
+
+def run_metadata() -> dict:
+    '''returns the commit, Python version and time of a benchmark run, so that results can be compared'''
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {'commit': commit, 'python': platform.python_version(), 'backend': backend,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+def allocated(build) -> tuple[object, int]:
+    '''returns the result of build() and the bytes it allocated and still holds, measured with tracemalloc'''
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        return result, tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+class DictPiece:
+    '''piece with a __dict__, like the pieces before they had __slots__, for comparison'''
+    def __init__(self, pos_X: int, pos_Y: int, side_: bool):
+        self.pos_x = pos_X
+        self.pos_y = pos_Y
+        self.side = side_
+
+def bench_memory(size: int, n_pieces: int, plies: int, seed: int = 0) -> dict:
+    '''compares the memory of a game history kept as deep copies and as snapshots
+
+    Parameters:
+        size (int): size of the board
+        n_pieces (int): total number of pieces
+        plies (int): number of positions in the history, fewer if the game ends
+        seed (int): seed of the random board and moves
+    Returns:
+        dict: bytes per position of both histories and bytes per piece with and without __slots__
+    '''
+    random.seed(seed)
+    B = indexed_board(random_board(size, n_pieces, seed))
+    moves = []
+    side = True
+    for _ in range(plies):
+        move = greedy_move(side, B)
+        if move is None:
+            break
+        moves.append((move[0].pos_x, move[0].pos_y, move[1], move[2]))
+        make_move(*move, B)
+        side = not side
+    B = random_board(size, n_pieces, seed)
+    def deep_copies():
+        history = [copy.deepcopy(B)]
+        for x, y, pos_X, pos_Y in moves:
+            board = copy.deepcopy(history[-1])
+            make_move(piece_at(x, y, board), pos_X, pos_Y, board)
+            history.append(board)
+        return history
+    def snapshots():
+        history = [BoardSnapshot.from_board(B)]
+        for move in moves:
+            history.append(history[-1].move(*move))
+        return history
+    history, copies_bytes = allocated(deep_copies)
+    _, snapshots_bytes = allocated(snapshots)
+    _, slotted = allocated(lambda: [Bishop(1, 1, True) for _ in range(10000)])
+    _, with_dict = allocated(lambda: [DictPiece(1, 1, True) for _ in range(10000)])
+    return {'size': size, 'pieces': n_pieces, 'positions': len(history),
+            'deepcopy': copies_bytes / len(history), 'snapshot': snapshots_bytes / len(history),
+            'piece_slots': slotted / 10000, 'piece_dict': with_dict / 10000}
+
+def bench_sparse(size: int, n_pieces: int, repeat: int, boards: int = 10) -> dict:
+    '''times game status, move generation and the greedy move of Black on very large boards with few pieces
+
+    Parameters:
+        size (int): size of the boards
+        n_pieces (int): total number of pieces
+        repeat (int): number of timed repetitions
+        boards (int): number of random boards, seeded 0 to boards - 1
+    Returns:
+        dict: best time in seconds per board
+    '''
+    Bs = [indexed_board(sparse_board(size, n_pieces, seed)) for seed in range(boards)]
+    def analyse(B):
+        status_workload(B)
+        greedy_move(False, B)
+    total = sum(time_call(lambda: analyse(B), repeat) for B in Bs)
+    return {'size': size, 'pieces': n_pieces, 'boards': boards, 'time': total / boards}
+
+def bench_vectorized(size: int, n_pieces: int, boards: int, repeat: int) -> dict:
+    '''compares check, attacked squares and mobility of many boards computed one board at a time and in one numpy batch
+
+    Parameters:
+        size (int): size of the boards
+        n_pieces (int): total number of pieces
+        boards (int): number of random boards, seeded 0 to boards - 1
+        repeat (int): number of timed repetitions
+    Returns:
+        dict: best times in seconds of the scalar functions and of vectorized.analyse_batch, packing included
+    '''
+    Bs = [indexed_board(random_board(size, n_pieces, seed)) for seed in range(boards)]
+    def scalar():
+        for B in Bs:
+            attacked = to_bitboard(B).attacked
+            for side in (True, False):
+                is_check(side, B), bin(attacked(side)).count('1'), search.mobility(side, B)
+    scalar_time = time_call(scalar, repeat)
+    batch_time = time_call(lambda: vectorized.analyse_batch(Bs), repeat)
+    return {'size': size, 'pieces': n_pieces, 'boards': boards, 'scalar': scalar_time, 'batch': batch_time,
+            'speedup': scalar_time / batch_time}
+
+def main() -> None:
+    '''parses command line arguments and runs the chosen benchmark'''
+    parser = argparse.ArgumentParser(description='chess_puzzle benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+    lookups = commands.add_parser('lookups', help='plain vs indexed piece lookups')
+    lookups.add_argument('--size', type=int, default=26)
+    lookups.add_argument('--pieces', type=int, default=60)
+    lookups.add_argument('--repeat', type=int, default=5)
+    lookups.add_argument('--seed', type=int, default=0)
+    status = commands.add_parser('status', help='checkmate, stalemate and move generation')
+    status.add_argument('--size', type=int, default=26)
+    status.add_argument('--pieces', type=int, default=60)
+    status.add_argument('--repeat', type=int, default=3)
+    status.add_argument('--boards', type=int, default=10)
+    binary = commands.add_parser('binary', help='read_board vs binary container throughput')
+    binary.add_argument('--size', type=int, default=26)
+    binary.add_argument('--pieces', type=int, default=60)
+    binary.add_argument('--boards', type=int, default=1000)
+    binary.add_argument('--repeat', type=int, default=3)
+    scaling = commands.add_parser('scaling', help='latency percentiles across sizes and densities')
+    scaling.add_argument('--sizes', type=int, nargs='+', default=[3, 4, 5, 6, 8, 10, 12, 16, 20, 26])
+    scaling.add_argument('--densities', type=float, nargs='+', default=[0.05, 0.2, 0.5])
+    scaling.add_argument('--boards', type=int, default=20)
+    scaling.add_argument('--seed', type=int, default=0)
+    scaling.add_argument('--output', default=None, help='JSON file for the results')
+    memory = commands.add_parser('memory', help='game history memory of deep copies vs snapshots')
+    memory.add_argument('--size', type=int, default=26)
+    memory.add_argument('--pieces', type=int, default=60)
+    memory.add_argument('--plies', type=int, default=200)
+    memory.add_argument('--seed', type=int, default=0)
+    sparse = commands.add_parser('sparse', help='status and greedy move on very large boards with few pieces')
+    sparse.add_argument('--size', type=int, default=1000)
+    sparse.add_argument('--pieces', type=int, default=20)
+    sparse.add_argument('--repeat', type=int, default=3)
+    sparse.add_argument('--boards', type=int, default=10)
+    batch = commands.add_parser('batch', help='scalar vs numpy batch check and mobility')
+    batch.add_argument('--size', type=int, default=8)
+    batch.add_argument('--pieces', type=int, default=12)
+    batch.add_argument('--boards', type=int, default=1000)
+    batch.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    if args.command == 'lookups':
+        result = bench_lookups(args.size, args.pieces, args.repeat, args.seed)
+        print(f"size {result['size']}, {result['pieces']} pieces: "
+              f"plain {result['plain'] * 1000:.2f} ms, indexed {result['indexed'] * 1000:.2f} ms, "
+              f"speedup {result['speedup']:.1f}x")
+    elif args.command == 'status':
+        result = bench_status(args.size, args.pieces, args.repeat, args.boards)
+        print(f"size {result['size']}, {result['pieces']} pieces, {result['boards']} boards: "
+              f"{result['time'] * 1000:.2f} ms")
+    elif args.command == 'binary':
+        result = bench_binary(args.size, args.pieces, args.boards, args.repeat)
+        print(f"size {result['size']}, {result['pieces']} pieces, {result['boards']} boards: "
+              f"read_board {result['plain_rate']:.0f} boards/s ({result['plain_bytes']} bytes), "
+              f"binary {result['binary_rate']:.0f} boards/s ({result['binary_bytes']} bytes)")
+    elif args.command == 'memory':
+        result = bench_memory(args.size, args.pieces, args.plies, args.seed)
+        print(f"size {result['size']}, {result['pieces']} pieces, {result['positions']} positions: "
+              f"deepcopy {result['deepcopy']:.0f} bytes/position, snapshot {result['snapshot']:.0f} bytes/position; "
+              f"piece {result['piece_slots']:.0f} bytes with __slots__, {result['piece_dict']:.0f} bytes with __dict__")
+    elif args.command == 'sparse':
+        result = bench_sparse(args.size, args.pieces, args.repeat, args.boards)
+        print(f"size {result['size']}, {result['pieces']} pieces, {result['boards']} boards: "
+              f"{result['time'] * 1000:.2f} ms per board")
+    elif args.command == 'batch':
+        result = bench_vectorized(args.size, args.pieces, args.boards, args.repeat)
+        print(f"size {result['size']}, {result['pieces']} pieces, {result['boards']} boards: "
+              f"scalar {result['scalar'] * 1000:.2f} ms, batch {result['batch'] * 1000:.2f} ms, "
+              f"speedup {result['speedup']:.1f}x")
+    elif args.command == 'scaling':
+        results = bench_scaling(args.sizes, args.densities, args.boards, args.seed)
+        for result in results:
+            print(f"{result['function']:>16} size {result['size']:>2}, {result['pieces']:>3} pieces: "
+                  f"p50 {result['p50'] * 1000:.3f} ms, p90 {result['p90'] * 1000:.3f} ms, "
+                  f"p99 {result['p99'] * 1000:.3f} ms")
+        if args.output:
+            with open(args.output, 'w') as file:
+                json.dump({**run_metadata(), 'results': results}, file, indent=1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+'''compact binary board format for chess_puzzle
+
+a record is the size byte, the number of pieces as unsigned 16 bit int and one unsigned 16 bit entry per piece
+    entry = square << 4 | kind << 1 | side
+where square = (y - 1) * size + (x - 1), kind is the index of the piece letter in chess_puzzle.piece_map
+and side is 1 for White, all ints little-endian; squares fit 12 bits, so sizes up to 64 can be encoded
+
+a container file holds many records with an index of their offsets, so that record i is decoded
+straight from a memory map without reading the records before it:
+    header  magic b'CPBF', version byte, 3 reserved bytes, record count and index offset as unsigned 64 bit ints
+    records
+    index   offset of every record as unsigned 64 bit ints
+'''
+import array
+import mmap
+import struct
+import sys
+from chess_puzzle import *
+
+MAGIC = b'CPBF'
+VERSION = 1
+HEADER = struct.Struct('<4sB3xQQ')
+RECORD_HEADER = struct.Struct('<BH')
+MAX_SIZE = 64
+
+kinds = list(piece_map)
+
+def encode_board(B: Board) -> bytes:
+    '''encodes board configuration B as a binary record
+    raises ValueError if the board cannot be encoded
+
+    Parameters:
+        B (Board): board configuration
+    Returns:
+        bytes: the record
+    '''
+    size = B[0]
+    if size < 1 or size > MAX_SIZE:
+        raise ValueError(f'size {size} outside 1..{MAX_SIZE}')
+    entries = array.array('H')
+    for piece in B[1]:
+        square = (piece.pos_y - 1) * size + (piece.pos_x - 1)
+        entries.append(square << 4 | kinds.index(piece_key(piece)) << 1 | piece.side)
+    if sys.byteorder != 'little':
+        entries.byteswap()
+    return RECORD_HEADER.pack(size, len(entries)) + entries.tobytes()
+
+def decode_board(data, offset: int = 0) -> Board:
+    '''decodes the binary record starting at offset of data
+    raises IOError exception if the record is truncated or holds an unknown piece or a square outside the board
+
+    Parameters:
+        data: bytes, bytearray, memoryview or mmap holding the record
+        offset (int): offset of the record in data
+    Returns:
+        Board: board configuration with an IndexedPieceList
+    '''
+    try:
+        size, count = RECORD_HEADER.unpack_from(data, offset)
+        entries = struct.unpack_from(f'<{count}H', data, offset + RECORD_HEADER.size)
+    except struct.error as error:
+        raise IOError(f'truncated record: {error}')
+    if size < 1:
+        raise IOError(f'size {size} outside 1..{MAX_SIZE}')
+    objs = IndexedPieceList(size=size)
+    for entry in entries:
+        square, kind, side = entry >> 4, entry >> 1 & 7, entry & 1
+        if kind >= len(kinds) or square >= size * size:
+            raise IOError(f'invalid piece entry {entry:#06x}')
+        objs.append(piece_map[kinds[kind]](square % size + 1, square // size + 1, bool(side)))
+    return (size, objs)
+
+def record_length(data, offset: int = 0) -> int:
+    '''returns the length in bytes of the binary record starting at offset of data'''
+    return RECORD_HEADER.size + 2 * RECORD_HEADER.unpack_from(data, offset)[1]
+
+def write_archive(filename: str, boards) -> int:
+    '''writes board configurations into a container file, encoding each board as soon as it is produced
+
+    Parameters:
+        filename (str): a filename to save the file as
+        boards: iterable of Board, consumed lazily
+    Returns:
+        int: number of boards written
+    '''
+    offsets = array.array('Q')
+    with open(filename, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+        position = HEADER.size
+        for B in boards:
+            record = encode_board(B)
+            offsets.append(position)
+            file.write(record)
+            position += len(record)
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+        file.write(offsets.tobytes())
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, len(offsets), position))
+    return len(offsets)
+
+class BoardArchive:
+    '''read-only random access to the boards of a container file through a memory map
+
+    use as a context manager or call close, e.g.
+        with BoardArchive('boards.bin') as archive:
+            B = archive[i]
+    '''
+    def __init__(self, filename: str):
+        '''opens and maps the container file
+        raises IOError exception if the file is not a container file
+
+        Parameters:
+            filename (str): filename to open
+        '''
+        self.file = open(filename, 'rb')
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError: # an empty file cannot be mapped
+            self.file.close()
+            raise IOError('not a board container file')
+        try:
+            magic, version, self.count, self.index = HEADER.unpack_from(self.data)
+        except struct.error:
+            magic, version = None, None
+        if magic != MAGIC or version != VERSION or self.index + 8 * self.count > len(self.data):
+            self.close()
+            raise IOError('not a board container file')
+
+    def __len__(self) -> int:
+        '''returns the number of boards'''
+        return self.count
+
+    def offset(self, i: int) -> int:
+        '''returns the offset of record i in the file'''
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError('board index out of range')
+        return struct.unpack_from('<Q', self.data, self.index + 8 * i)[0]
+
+    def __getitem__(self, i: int) -> Board:
+        '''decodes and returns board i'''
+        return decode_board(self.data, self.offset(i))
+
+    def __iter__(self):
+        '''yields the boards in file order'''
+        for i in range(self.count):
+            yield self[i]
+
+    def close(self) -> None:
+        '''unmaps and closes the file'''
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self) -> 'BoardArchive':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
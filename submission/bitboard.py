@@ -0,0 +1,172 @@
+'''bitboard backend for chess_puzzle
+
+occupancy of each side is stored as one Python int with bit (y - 1) * S + (x - 1) set
+for every occupied square, so boards up to 26x26 need 676 bits
+bishop attacks are computed with masked ray operations instead of walking squares
+
+pieces are given as (kind, side, x, y) tuples where kind is a key of chess_puzzle.piece_map,
+so this module does not depend on the piece classes
+'''
+from functools import lru_cache
+
+# (dx, dy, positive) where positive means the square index grows along the ray
+DIAGONALS = [(1, 1, True), (-1, 1, True), (1, -1, False), (-1, -1, False)]
+NEIGHBOURS = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, -1), (1, -1), (-1, 1)]
+
+@lru_cache(maxsize=None)
+def masks(size: int) -> tuple[list[list[int]], list[int]]:
+    '''returns the diagonal ray masks and king neighbourhood masks of every square for board size
+
+    Parameters:
+        size (int): size of the board
+    Returns:
+        tuple[list[list[int]], list[int]]: rays[d][sq] for each direction of DIAGONALS and king[sq]
+    '''
+    rays = [[0] * (size * size) for _ in DIAGONALS]
+    king = [0] * (size * size)
+    for x in range(1, size + 1):
+        for y in range(1, size + 1):
+            sq = (y - 1) * size + (x - 1)
+            for d, (dx, dy, _) in enumerate(DIAGONALS):
+                tx, ty = x + dx, y + dy
+                while 1 <= tx <= size and 1 <= ty <= size:
+                    rays[d][sq] |= 1 << ((ty - 1) * size + (tx - 1))
+                    tx += dx
+                    ty += dy
+            for dx, dy in NEIGHBOURS:
+                tx, ty = x + dx, y + dy
+                if 1 <= tx <= size and 1 <= ty <= size:
+                    king[sq] |= 1 << ((ty - 1) * size + (tx - 1))
+    return rays, king
+
+def bishop_attacks(size: int, sq: int, occupied: int) -> int:
+    '''returns the mask of squares attacked by a bishop on sq, including the first blocker of each ray
+
+    Parameters:
+        size (int): size of the board
+        sq (int): square index of the bishop
+        occupied (int): mask of all occupied squares
+    Returns:
+        int: mask of attacked squares
+    '''
+    rays = masks(size)[0]
+    attacks = 0
+    for d, (_, _, positive) in enumerate(DIAGONALS):
+        ray = rays[d][sq]
+        blockers = ray & occupied
+        if blockers:
+            if positive:
+                first = (blockers & -blockers).bit_length() - 1
+                ray &= (1 << (first + 1)) - 1
+            else:
+                first = blockers.bit_length() - 1
+                ray = ray >> first << first
+        attacks |= ray
+    return attacks
+
+def king_attacks(size: int, sq: int) -> int:
+    '''returns the mask of squares next to sq'''
+    return masks(size)[1][sq]
+
+def squares_of(mask: int):
+    '''yields the square indices of the set bits of mask in increasing order'''
+    while mask:
+        bit = mask & -mask
+        yield bit.bit_length() - 1
+        mask ^= bit
+
+class BitBoard:
+    '''occupancy of a board as one int per side plus one int of bishops per side'''
+    def __init__(self, size: int, pieces):
+        '''builds the masks from an iterable of (kind, side, x, y) tuples
+
+        Parameters:
+            size (int): size of the board
+            pieces: iterable of (kind, side, x, y) with kind 'K' or 'B'
+        '''
+        self.size = size
+        self.occupied = {True: 0, False: 0}
+        self.bishops = {True: 0, False: 0}
+        self.kings = {True: None, False: None}
+        for kind, side, x, y in pieces:
+            sq = self.square(x, y)
+            self.occupied[side] |= 1 << sq
+            if kind == 'K':
+                if self.kings[side] is None:
+                    self.kings[side] = sq
+            else:
+                self.bishops[side] |= 1 << sq
+
+    def square(self, x: int, y: int) -> int:
+        '''converts coordinates x, y to a square index'''
+        return (y - 1) * self.size + (x - 1)
+
+    def coordinates(self, sq: int) -> tuple[int, int]:
+        '''converts a square index to coordinates x, y'''
+        return (sq % self.size + 1, sq // self.size + 1)
+
+    def attacks(self, kind: str, sq: int, occupied: int = None) -> int:
+        '''returns the mask of squares a piece of kind on sq attacks
+
+        Parameters:
+            kind (str): 'K' or 'B'
+            sq (int): square index of the piece
+            occupied (int): occupancy to use for blockers, the board occupancy by default
+        Returns:
+            int: mask of attacked squares regardless of which side occupies them
+        '''
+        if kind == 'K':
+            return king_attacks(self.size, sq)
+        if occupied is None:
+            occupied = self.occupied[True] | self.occupied[False]
+        return bishop_attacks(self.size, sq, occupied)
+
+    def can_reach(self, kind: str, side: bool, x: int, y: int, pos_X: int, pos_Y: int) -> bool:
+        '''checks if a piece of kind and side on x, y can move to pos_X, pos_Y according to [Rule1]-[Rule3]'''
+        if not (1 <= pos_X <= self.size and 1 <= pos_Y <= self.size):
+            return False
+        reach = self.attacks(kind, self.square(x, y)) & ~self.occupied[side]
+        return bool(reach >> self.square(pos_X, pos_Y) & 1)
+
+    def attacked(self, side: bool) -> int:
+        '''returns the mask of squares attacked by the pieces of side'''
+        occupied = self.occupied[True] | self.occupied[False]
+        mask = 0
+        for sq in squares_of(self.bishops[side]):
+            mask |= bishop_attacks(self.size, sq, occupied)
+        if self.kings[side] is not None:
+            mask |= king_attacks(self.size, self.kings[side])
+        return mask
+
+    def _king_attacked(self, king: int, occupied: int, bishops: int, enemy_king: int) -> bool:
+        '''checks if square king is attacked by the given enemy bishops or enemy king under occupied'''
+        if bishop_attacks(self.size, king, occupied) & bishops:
+            return True
+        return enemy_king is not None and bool(king_attacks(self.size, king) >> enemy_king & 1)
+
+    def is_check(self, side: bool) -> bool:
+        '''checks if the king of side can be captured by a piece of the other side'''
+        occupied = self.occupied[True] | self.occupied[False]
+        return self._king_attacked(self.kings[side], occupied, self.bishops[not side], self.kings[not side])
+
+    def leaves_check(self, side: bool, from_sq: int, to_sq: int) -> bool:
+        '''checks if moving the piece of side on from_sq to to_sq results in check for side'''
+        to_bit = 1 << to_sq
+        own = self.occupied[side] & ~(1 << from_sq) | to_bit
+        enemy = self.occupied[not side] & ~to_bit
+        king = to_sq if from_sq == self.kings[side] else self.kings[side]
+        enemy_king = self.kings[not side]
+        if enemy_king == to_sq:
+            enemy_king = None
+        return self._king_attacked(king, own | enemy, self.bishops[not side] & ~to_bit, enemy_king)
+
+    def legal_moves(self, side: bool):
+        '''yields (x, y, pos_X, pos_Y) for every move of side allowed by all chess rules'''
+        pieces = [('B', sq) for sq in squares_of(self.bishops[side])]
+        if self.kings[side] is not None:
+            pieces.append(('K', self.kings[side]))
+        for kind, sq in pieces:
+            x, y = self.coordinates(sq)
+            for to_sq in squares_of(self.attacks(kind, sq) & ~self.occupied[side]):
+                if not self.leaves_check(side, sq, to_sq):
+                    yield (x, y) + self.coordinates(to_sq)
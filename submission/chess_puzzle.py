@@ -1,18 +1,33 @@
-from typing import Union
-import copy
+from typing import Union, NamedTuple
 import random
+import re
 import os.path
+import sys
+import functools
+import collections.abc
+import hashlib
+import warnings
+import time
+import atexit
+import signal
+import bitboard
+import transposition
+import instrumentation
 
 def location2index(loc: str) -> tuple[int, int]:
     '''converts chess location to corresponding x and y coordinates
     
     Parameters:
-        loc (str): string of coordinates x,y in plain configuration
+        loc (str): string of coordinates x,y in plain configuration, columns after z are aa, ab, ..., zz, aaa, ...
     Returns:
         tuple[int, int]: tuple of coordinates in index form x,y
     '''
     column = ord(loc[0]) - ord('a') + 1
-    row = int(loc[1:])
+    i = 1
+    while i < len(loc) and 'a' <= loc[i] <= 'z':
+        column = column * 26 + ord(loc[i]) - ord('a') + 1
+        i += 1
+    row = int(loc[i:])
     return (column, row)
 	
 def index2location(x: int, y: int) -> str:
@@ -22,15 +37,77 @@ def index2location(x: int, y: int) -> str:
         x (int): position x of coordinates
         y (int): position y of coordinates
     Returns:
-        str: string of coordinates x,y in plain configuration
+        str: string of coordinates x,y in plain configuration, columns after z are aa, ab, ..., zz, aaa, ...
     '''
-    column = chr(x + ord('a') - 1)
+    column = ''
+    while x > 0:
+        x, letter = divmod(x - 1, 26)
+        column = chr(letter + ord('a')) + column
     row = str(y)
     return str(column + row)
 
 Board = tuple[int, list['Piece']]
 
+# 'object' uses the piece classes, 'bitboard' uses bitboard.py and 'compare' runs both
+backends = ('object', 'bitboard', 'compare')
+backend = 'object'
+
+class BackendMismatchWarning(RuntimeWarning):
+    '''issued in compare mode when the bitboard backend disagrees with the object model'''
+
+def set_backend(name: str) -> None:
+    '''selects the backend answering is_check, can_reach and generate_legal_moves
+
+    Parameters:
+        name (str): one of backends
+    '''
+    global backend
+    if name not in backends:
+        raise ValueError(f'unknown backend {name!r}, expected one of {backends}')
+    backend = name
+
+set_backend(os.environ.get('CHESS_PUZZLE_BACKEND', 'object'))
+
+def backend_dispatch(bitboard_func):
+    '''decorates an object model function so that the selected backend answers it
+    in compare mode the object model answer is returned and a mismatch is warned about
+    '''
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            if backend == 'object':
+                return func(*args)
+            if backend == 'bitboard':
+                return bitboard_func(*args)
+            result = func(*args)
+            other = bitboard_func(*args)
+            if other != result:
+                warnings.warn(f'{func.__qualname__}{args[-3:]} is {result} in the object model but {other} in the bitboard backend',
+                              BackendMismatchWarning, stacklevel=2)
+            return result
+        return wrapper
+    return decorate
+
+def to_bitboard(B: Board) -> bitboard.BitBoard:
+    '''converts board B into bitboard masks
+
+    Parameters:
+        B (Board): board configuration
+    Returns:
+        bitboard.BitBoard: occupancy masks of B
+    '''
+    return bitboard.BitBoard(B[0], ((piece_key(piece), piece.side, piece.pos_x, piece.pos_y) for piece in B[1]))
+
+def bitboard_can_reach(piece: 'Piece', pos_X: int, pos_Y: int, B: Board) -> bool:
+    '''can_reach answered by the bitboard backend'''
+    return to_bitboard(B).can_reach(piece_key(piece), piece.side, piece.pos_x, piece.pos_y, pos_X, pos_Y)
+
+def bitboard_is_check(side: bool, B: Board) -> bool:
+    '''is_check answered by the bitboard backend'''
+    return to_bitboard(B).is_check(side)
+
 class Piece:
+    __slots__ = ('pos_x', 'pos_y', 'side') # no per-piece __dict__, pieces are the most numerous objects
     pos_x : int	
     pos_y : int
     side : bool #True for White and False for Black
@@ -54,6 +131,17 @@ class Piece:
         # to be implemented in subclass
         pass
 
+    def reachable_squares(self, B: Board) -> list[tuple[int, int]]:
+        '''returns the coordinates this piece can reach on board B according to [Rule1]-[Rule3]
+
+        Parameters:
+            B (Board): board configuration
+        Returns:
+            list[tuple[int, int]]: list of coordinates x,y
+        '''
+        # to be implemented in subclass
+        pass
+
     def can_move_to(self, pos_X : int, pos_Y : int, B: Board) -> bool:
         '''checks if piece can move to coordinates pos_X, pos_Y on board B according to all chess rules
 
@@ -64,34 +152,18 @@ class Piece:
         Returns:
             bool: True if piece can move to coordinates x,y or False if not   
         '''
-        B2 = copy.deepcopy(B)
-        for item in B2[1]:
-            if item.pos_x == self.pos_x and item.pos_y == self.pos_y and item.side == self.side:
-                piece = item
-                break
-        if piece.can_reach(pos_X, pos_Y, B2):
-            if is_piece_at(pos_X, pos_Y, B2):
-                target = piece_at(pos_X, pos_Y, B2)
-                if target.side != piece.side:
-                    B2 = piece.move_to(pos_X, pos_Y, B2)
-                    if is_check(self.side, B2):
-                        return False
-                    else:
-                        return True
-                else:
-                    return False
-            else:
-                B2 = piece.move_to(pos_X, pos_Y, B2)
-                if is_check(self.side, B2):
-                    return False
-                else:
-                    return True
-        else:
+        piece = piece_at(self.pos_x, self.pos_y, B)
+        if piece is None or piece.side != self.side or not piece.can_reach(pos_X, pos_Y, B):
             return False
+        undo = make_move(piece, pos_X, pos_Y, B)
+        try:
+            return not is_check(self.side, B)
+        finally:
+            unmake_move(undo, B)
 
     def move_to(self, pos_X : int, pos_Y : int, B: Board) -> Board:
         '''returns new board resulting from move of this piece to coordinates pos_X, pos_Y on board B 
-        assumes this move is valid according to chess rules
+        assumes this move is valid according to chess rules, the other pieces keep their order in B[1]
 
         Parameters:
             pos_X (int): position x of coordinates
@@ -100,18 +172,285 @@ class Piece:
         Returns:
             Board: new board resulting from move of the piece to coordinates x,y
         '''
-        target = None
         if is_piece_at(pos_X, pos_Y, B):
-            target = piece_at(pos_X, pos_Y, B)
-        for item in B[1]:
-            if item == target:
-                B[1].remove(item)
-        self.pos_x = pos_X
-        self.pos_y = pos_Y
+            B[1].remove(piece_at(pos_X, pos_Y, B))
+        if isinstance(B[1], IndexedPieceList):
+            B[1].relocate(self, pos_X, pos_Y)
+        else:
+            self.pos_x = pos_X
+            self.pos_y = pos_Y
         return B
 
+@functools.lru_cache(maxsize=None)
+def zobrist_key(size: int, kind: str, side: bool, pos_X: int, pos_Y: int) -> int:
+    '''returns the 64-bit Zobrist key of a piece of kind and side at coordinates pos_X, pos_Y on a board of size
+    keys are derived from a hash of the arguments, so they are the same in every process
+
+    Parameters:
+        size (int): size of the board
+        kind (str): key of piece_map
+        side (bool): True if white and False if black
+        pos_X (int): position x of coordinates
+        pos_Y (int): position y of coordinates
+    Returns:
+        int: pseudo-random key
+    '''
+    digest = hashlib.blake2b(f'{size},{kind},{side},{pos_X},{pos_Y}'.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+def piece_hash(size: int, piece: Piece) -> int:
+    '''returns the Zobrist key of piece at its current coordinates on a board of size'''
+    return zobrist_key(size, piece_key(piece), piece.side, piece.pos_x, piece.pos_y)
+
+class IndexedPieceList(list):
+    '''list of pieces which keeps a square-to-piece index in sync with its contents
+    used as the second element of a Board so that is_piece_at and piece_at are O(1)
+    if the board size is given, the Zobrist hash of the pieces is also kept in sync
+    positions must only be changed through move_to (or relocate) to keep the index valid
+    the list index of every piece is kept in slots, so that capture and restore need no scan
+    '''
+    def __init__(self, pieces: list[Piece] = (), size: int = None):
+        '''builds the list and the index from an iterable of pieces
+
+        Parameters:
+            pieces (list[Piece]): pieces of the board
+            size (int): size of the board, needed to maintain the Zobrist hash
+        '''
+        super().__init__(pieces)
+        self.size = size
+        self._reindex()
+
+    def __reduce__(self):
+        '''copies and pickles rebuild the index from the pieces instead of sharing it'''
+        return (self.__class__, (list(self), self.size))
+
+    def _add(self, piece: Piece) -> None:
+        '''indexes piece by its square, the first piece on a square wins like a linear scan'''
+        if self.squares.setdefault((piece.pos_x, piece.pos_y), piece) is not piece:
+            self.stacked = True
+        if self.size is not None:
+            self.hash ^= piece_hash(self.size, piece)
+
+    def _discard(self, piece: Piece) -> None:
+        '''drops piece from the index if it is the piece indexed at its square
+        only a list which ever held two pieces on one square, which parse_board rejects,
+        is scanned for another piece to index at the vacated square
+        '''
+        if self.size is not None:
+            self.hash ^= piece_hash(self.size, piece)
+        square = (piece.pos_x, piece.pos_y)
+        if self.squares.get(square) is piece:
+            del self.squares[square]
+            if self.stacked:
+                for other in self:
+                    if other is not piece and (other.pos_x, other.pos_y) == square:
+                        self.squares[square] = other
+                        break
+
+    def _renumber(self) -> None:
+        '''rebuilds the list index of every piece after pieces were shifted'''
+        self.slots = {piece: i for i, piece in enumerate(self)}
+
+    def _reindex(self) -> None:
+        '''rebuilds the index from scratch after a bulk change'''
+        self.squares = {}
+        self.stacked = False # True once two pieces shared a square
+        self.hash = 0 if self.size is not None else None
+        for piece in self:
+            self._add(piece)
+        self._renumber()
+
+    def append(self, piece: Piece) -> None:
+        super().append(piece)
+        self.slots[piece] = len(self) - 1
+        self._add(piece)
+
+    def insert(self, i: int, piece: Piece) -> None:
+        super().insert(i, piece)
+        self._renumber()
+        self._add(piece)
+
+    def extend(self, pieces) -> None:
+        for piece in pieces:
+            self.append(piece)
+
+    def __iadd__(self, pieces):
+        self.extend(pieces)
+        return self
+
+    def remove(self, piece: Piece) -> None:
+        super().remove(piece)
+        self._renumber()
+        self._discard(piece)
+
+    def pop(self, i: int = -1) -> Piece:
+        piece = super().pop(i)
+        if i == -1:
+            del self.slots[piece]
+        else:
+            self._renumber()
+        self._discard(piece)
+        return piece
+
+    def sort(self, *args, **kwargs) -> None:
+        super().sort(*args, **kwargs)
+        self._renumber()
+
+    def reverse(self) -> None:
+        super().reverse()
+        self._renumber()
+
+    def clear(self) -> None:
+        super().clear()
+        self._reindex()
+
+    def __setitem__(self, i, value) -> None:
+        super().__setitem__(i, value)
+        self._reindex()
+
+    def __delitem__(self, i) -> None:
+        super().__delitem__(i)
+        self._reindex()
+
+    def relocate(self, piece: Piece, pos_X: int, pos_Y: int) -> None:
+        '''moves piece to coordinates pos_X, pos_Y and updates the index
+
+        Parameters:
+            piece (Piece): a piece of this list
+            pos_X (int): new position x of the piece
+            pos_Y (int): new position y of the piece
+        '''
+        self._discard(piece)
+        piece.pos_x = pos_X
+        piece.pos_y = pos_Y
+        self._add(piece)
+
+    def capture(self, piece: Piece) -> int:
+        '''removes piece by moving the last piece of the list into its place
+
+        Parameters:
+            piece (Piece): a piece of this list
+        Returns:
+            int: list index piece had, to give back to restore
+        '''
+        slot = self.slots.pop(piece)
+        last = super().pop()
+        if last is not piece:
+            super().__setitem__(slot, last)
+            self.slots[last] = slot
+        self._discard(piece)
+        return slot
+
+    def restore(self, piece: Piece, slot: int) -> None:
+        '''puts back piece removed by capture at list index slot, undoing the capture exactly
+
+        Parameters:
+            piece (Piece): the captured piece
+            slot (int): index returned by capture
+        '''
+        if slot < len(self):
+            other = self[slot]
+            super().append(other)
+            self.slots[other] = len(self) - 1
+            super().__setitem__(slot, piece)
+        else:
+            super().append(piece)
+        self.slots[piece] = slot
+        self._add(piece)
+
 Board = tuple[int, list[Piece]]
 
+def indexed_board(B: Board) -> Board:
+    '''returns board with the same size and pieces as B whose piece list is an IndexedPieceList
+
+    Parameters:
+        B (Board): board configuration
+    Returns:
+        Board: board configuration with O(1) square lookups
+    '''
+    if isinstance(B[1], IndexedPieceList) and B[1].size == B[0]:
+        return B
+    return (B[0], IndexedPieceList(B[1], B[0]))
+
+def zobrist_hash(B: Board) -> int:
+    '''returns the Zobrist hash of the pieces of board B
+    the hash kept by an IndexedPieceList is used if available, otherwise it is computed
+
+    Parameters:
+        B (Board): board configuration
+    Returns:
+        int: XOR of the Zobrist keys of all pieces
+    '''
+    if isinstance(B[1], IndexedPieceList) and B[1].size == B[0]:
+        return B[1].hash
+    result = 0
+    for piece in B[1]:
+        result ^= piece_hash(B[0], piece)
+    return result
+
+def position_key(B: Board, side_to_move: bool) -> int:
+    '''returns the Zobrist hash of board B with the side to move folded in
+
+    Parameters:
+        B (Board): board configuration
+        side_to_move (bool): True if white and False if black
+    Returns:
+        int: 64-bit key identifying the position
+    '''
+    key = zobrist_hash(B)
+    if not side_to_move:
+        key ^= zobrist_key(B[0], 'side', False, 0, 0)
+    return key
+
+Undo = tuple[Piece, int, int, Union[Piece, None], Union[int, None]]
+
+def make_move(piece: Piece, pos_X: int, pos_Y: int, B: Board) -> Undo:
+    '''moves piece to coordinates pos_X, pos_Y on board B in place, capturing any piece there
+    assumes this move is valid according to [Rule1]-[Rule3]
+    on an IndexedPieceList the last piece takes the list index of a captured piece until unmake_move,
+    so that no move scans the list; use move_to to keep the order of the pieces
+
+    Parameters:
+        piece (Piece): a piece of board B
+        pos_X (int): position x of coordinates
+        pos_Y (int): position y of coordinates
+        B (Board): board configuration, modified in place
+    Returns:
+        Undo: (piece, old x, old y, captured piece or None, list index of captured piece or None)
+    '''
+    captured = piece_at(pos_X, pos_Y, B) if is_piece_at(pos_X, pos_Y, B) else None
+    index = None
+    if isinstance(B[1], IndexedPieceList) and captured is not None:
+        index = B[1].capture(captured)
+    elif captured is not None:
+        index = B[1].index(captured)
+        B[1].pop(index)
+    undo = (piece, piece.pos_x, piece.pos_y, captured, index)
+    if isinstance(B[1], IndexedPieceList):
+        B[1].relocate(piece, pos_X, pos_Y)
+    else:
+        piece.pos_x = pos_X
+        piece.pos_y = pos_Y
+    return undo
+
+def unmake_move(undo: Undo, B: Board) -> None:
+    '''takes back the move recorded in undo, restoring any captured piece at its place in the piece list
+
+    Parameters:
+        undo (Undo): record returned by make_move for the last move made on B
+        B (Board): board configuration, modified in place
+    '''
+    piece, pos_X, pos_Y, captured, index = undo
+    if isinstance(B[1], IndexedPieceList):
+        B[1].relocate(piece, pos_X, pos_Y)
+    else:
+        piece.pos_x = pos_X
+        piece.pos_y = pos_Y
+    if isinstance(B[1], IndexedPieceList) and captured is not None:
+        B[1].restore(captured, index)
+    elif captured is not None:
+        B[1].insert(index, captured)
+
 def is_piece_at(pos_X : int, pos_Y : int, B: Board) -> bool:
     '''checks if there is piece at coordinates pos_X, pos_Y of board B
     
@@ -122,6 +461,8 @@ def is_piece_at(pos_X : int, pos_Y : int, B: Board) -> bool:
     Returns:
         bool: True if piece is present at coordinate x,y or False if not    
     '''
+    if isinstance(B[1], IndexedPieceList):
+        return (pos_X, pos_Y) in B[1].squares
     for piece in B[1]:
         if piece.pos_x == pos_X and piece.pos_y == pos_Y:
             return True
@@ -138,15 +479,100 @@ def piece_at(pos_X : int, pos_Y : int, B: Board) -> Piece:
     Returns:
         Piece: the piece found at coordinates x,y
     '''
+    if isinstance(B[1], IndexedPieceList):
+        return B[1].squares.get((pos_X, pos_Y))
     for piece in B[1]:
         if piece.pos_x == pos_X and piece.pos_y == pos_Y:
             return piece
 
+bishop_directions = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+king_directions = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, -1), (1, -1), (-1, 1)]
+
+sparse_size = 64 # boards larger than this use Ray instead of tuples of squares in board_tables
+
+class Ray(collections.abc.Sequence):
+    '''squares of one bishop direction ordered outwards from x,y, computed on demand
+    so that walking a ray up to the first piece costs the distance to that piece, not the size of the board
+    '''
+    __slots__ = ('x', 'y', 'dx', 'dy', 'length')
+
+    def __init__(self, size: int, x: int, y: int, dx: int, dy: int):
+        self.x, self.y, self.dx, self.dy = x, y, dx, dy
+        self.length = min(size - x if dx > 0 else x - 1, size - y if dy > 0 else y - 1)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return tuple(self[j] for j in range(*i.indices(self.length)))
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError('ray index out of range')
+        return (self.x + (i + 1) * self.dx, self.y + (i + 1) * self.dy)
+
+    def __iter__(self):
+        x, y, dx, dy = self.x, self.y, self.dx, self.dy
+        for i in range(1, self.length + 1):
+            yield (x + i * dx, y + i * dy)
+
+class SquareTable(dict):
+    '''dictionary from coordinates x,y on a board of size to entry(x, y), computed on first use of x,y'''
+    def __init__(self, size: int, entry):
+        super().__init__()
+        self.size = size
+        self.entry = entry
+
+    def __missing__(self, square: tuple[int, int]):
+        x, y = square
+        if not (1 <= x <= self.size and 1 <= y <= self.size):
+            raise KeyError(square)
+        value = self[square] = self.entry(x, y)
+        return value
+
+@functools.lru_cache(maxsize=None)
+def board_tables(size: int) -> tuple[dict, dict]:
+    '''returns the move tables of board size, filled in as squares are used and then cached
+    only the squares of pieces are ever looked up, so the tables of a large board stay as small as its pieces need
+
+    Parameters:
+        size (int): size of the board
+    Returns:
+        tuple[dict, dict]: rays mapping coordinates x,y to one sequence of squares per bishop direction,
+        ordered outwards from x,y (a tuple, or a Ray above sparse_size), and neighbours mapping coordinates x,y
+        to the squares next to it
+    '''
+    def ray_entry(x: int, y: int) -> tuple:
+        rays = (Ray(size, x, y, dx, dy) for dx, dy in bishop_directions)
+        return tuple(ray if size > sparse_size else tuple(ray) for ray in rays)
+    def neighbour_entry(x: int, y: int) -> tuple:
+        return tuple((x + dx, y + dy) for dx, dy in king_directions if 1 <= x + dx <= size and 1 <= y + dy <= size)
+    return SquareTable(size, ray_entry), SquareTable(size, neighbour_entry)
+
+def occupancy(B: Board) -> dict:
+    '''returns a dictionary from coordinates x,y to the piece there, the index of an IndexedPieceList if available
+
+    Parameters:
+        B (Board): board configuration
+    Returns:
+        dict: occupied coordinates of B, which must not be modified
+    '''
+    if isinstance(B[1], IndexedPieceList):
+        return B[1].squares
+    squares = {}
+    for piece in B[1]:
+        squares.setdefault((piece.pos_x, piece.pos_y), piece)
+    return squares
+
 class Bishop(Piece):
+    __slots__ = ()
+
     def __init__(self, pos_X : int, pos_Y : int, side_ : bool):
         '''sets initial values by calling the constructor of Piece'''
         super().__init__(pos_X, pos_Y, side_)
 	
+    @backend_dispatch(bitboard_can_reach)
     def can_reach(self, pos_X : int, pos_Y : int, B: Board) -> bool:
         '''checks if this bishop can move to coordinates pos_X, pos_Y
         on board B according to rule [Rule1] and [Rule3] of specification
@@ -158,31 +584,48 @@ class Bishop(Piece):
         Returns:
             bool: True if can reach coordinates x,y or False if not
         '''
-        size = B[0]
+        dx, dy = pos_X - self.pos_x, pos_Y - self.pos_y
+        if dx == 0 or abs(dx) != abs(dy):
+            return False
+        ray = board_tables(B[0])[0][(self.pos_x, self.pos_y)][bishop_directions.index((dx // abs(dx), dy // abs(dy)))]
+        if abs(dx) > len(ray):
+            return False
+        occupied = occupancy(B)
+        for square in ray[:abs(dx) - 1]:
+            if square in occupied:
+                return False
+        target = occupied.get((pos_X, pos_Y))
+        return target is None or target.side != self.side
+
+    def reachable_squares(self, B: Board) -> list[tuple[int, int]]:
+        '''returns the coordinates this bishop can reach on board B according to [Rule1] and [Rule3]
+
+        Parameters:
+            B (Board): board configuration
+        Returns:
+            list[tuple[int, int]]: list of coordinates x,y along the diagonals up to the first piece
+        '''
+        occupied = occupancy(B)
         reachable_ords = []
-        directions = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
-        for direction in directions:
-            dx, dy = direction
-            x, y = self.pos_x + dx, self.pos_y + dy
-            while 1 <= x <= size and 1 <= y <= size:
-                if is_piece_at(x, y, B):
-                    piece = piece_at(x, y, B)
-                    if piece.side == self.side:
-                        break
-                    else:
-                        reachable_ords.append((x, y))
-                        break
+        for ray in board_tables(B[0])[0][(self.pos_x, self.pos_y)]:
+            for square in ray:
+                piece = occupied.get(square)
+                if piece is None:
+                    reachable_ords.append(square)
                 else:
-                    reachable_ords.append((x, y))
-                x += dx
-                y += dy
-        return (pos_X, pos_Y) in reachable_ords
+                    if piece.side != self.side:
+                        reachable_ords.append(square)
+                    break
+        return reachable_ords
 
 class King(Piece):
+    __slots__ = ()
+
     def __init__(self, pos_X : int, pos_Y : int, side_ : bool):
         '''sets initial values by calling the constructor of Piece'''
         super().__init__(pos_X, pos_Y, side_)
 
+    @backend_dispatch(bitboard_can_reach)
     def can_reach(self, pos_X : int, pos_Y : int, B: Board) -> bool:
         '''checks if this king can move to coordinates pos_X, pos_Y
         on board B according to rule [Rule2] and [Rule3] of specification
@@ -194,17 +637,24 @@ class King(Piece):
         Returns:
             bool: True if can reach coordinates x,y or False if not
         '''
-        size = B[0]
-        reachable_ords = []
-        directions = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, -1), (1, -1), (-1, 1)]
-        for direction in directions:
-            dx, dy = direction
-            x, y = self.pos_x + dx, self.pos_y + dy
-            if 1 <= x <= size and 1 <= y <= size:
-                if not is_piece_at(x, y, B) or piece_at(x, y, B).side != self.side:
-                    reachable_ords.append((x, y))
-        return (pos_X, pos_Y) in reachable_ords
+        if (pos_X, pos_Y) not in board_tables(B[0])[1][(self.pos_x, self.pos_y)]:
+            return False
+        target = occupancy(B).get((pos_X, pos_Y))
+        return target is None or target.side != self.side
 
+    def reachable_squares(self, B: Board) -> list[tuple[int, int]]:
+        '''returns the coordinates this king can reach on board B according to [Rule2] and [Rule3]
+
+        Parameters:
+            B (Board): board configuration
+        Returns:
+            list[tuple[int, int]]: list of neighbouring coordinates x,y not occupied by own pieces
+        '''
+        occupied = occupancy(B)
+        return [square for square in board_tables(B[0])[1][(self.pos_x, self.pos_y)]
+                if square not in occupied or occupied[square].side != self.side]
+
+@backend_dispatch(bitboard_is_check)
 def is_check(side: bool, B: Board) -> bool:
     '''checks if configuration of B is check for side
 
@@ -222,6 +672,197 @@ def is_check(side: bool, B: Board) -> bool:
                 return True
     return False        
 
+class AttackMap:
+    '''squares attacked by the opponent of side, checkers of the king of side and pinned pieces of side,
+    computed in one pass over the enemy pieces and the diagonals of the king
+
+    the attacked squares are computed as if the king of side were not on the board,
+    so that the king cannot step back along the diagonal of a bishop giving check
+    '''
+    def __init__(self, side: bool, B: Board):
+        '''computes the attack map of board B for side
+
+        Parameters:
+            side (bool): True if white and False if black
+            B (Board): a board configuration
+        '''
+        rays, neighbours = board_tables(B[0])
+        occupied = occupancy(B)
+        self.king = None
+        for piece in B[1]:
+            if isinstance(piece, King) and piece.side == side:
+                self.king = piece
+                break
+        king_square = (self.king.pos_x, self.king.pos_y) if self.king is not None else None
+        self.attacked = set()
+        for piece in B[1]:
+            if piece.side == side:
+                continue
+            if isinstance(piece, King):
+                self.attacked.update(neighbours[(piece.pos_x, piece.pos_y)])
+                continue
+            for ray in rays[(piece.pos_x, piece.pos_y)]:
+                for square in ray:
+                    self.attacked.add(square)
+                    if square in occupied and square != king_square:
+                        break
+        self.checkers = []
+        self.block = set() # squares which end the check of a single checker
+        self.pins = {} # pinned piece -> squares it may move to
+        if king_square is None:
+            return
+        for square in neighbours[king_square]:
+            piece = occupied.get(square)
+            if isinstance(piece, King) and piece.side != side:
+                self.checkers.append(piece)
+                self.block.add(square)
+        for ray in rays[king_square]:
+            shield = None
+            for i, square in enumerate(ray):
+                piece = occupied.get(square)
+                if piece is None:
+                    continue
+                if piece.side == side:
+                    if shield is not None:
+                        break
+                    shield = piece
+                    continue
+                if isinstance(piece, Bishop):
+                    if shield is None:
+                        self.checkers.append(piece)
+                        self.block.update(ray[:i + 1])
+                    else:
+                        self.pins[shield] = set(ray[:i + 1])
+                break
+
+    def allows(self, piece: Piece, pos_X: int, pos_Y: int) -> bool:
+        '''checks if a move of piece of side to coordinates pos_X, pos_Y does not result in check for side
+        assumes piece can reach pos_X, pos_Y according to [Rule1]-[Rule3]
+
+        Parameters:
+            piece (Piece): a piece of side on the board of this attack map
+            pos_X (int): position x of coordinates
+            pos_Y (int): position y of coordinates
+        Returns:
+            bool: True if the move is allowed by [Rule4] or False if not
+        '''
+        if piece is self.king:
+            return (pos_X, pos_Y) not in self.attacked
+        if len(self.checkers) > 1:
+            return False
+        if self.checkers and (pos_X, pos_Y) not in self.block:
+            return False
+        return piece not in self.pins or (pos_X, pos_Y) in self.pins[piece]
+
+class CheckMap:
+    '''squares from which a bishop of side gives check to the king of the opponent, and pieces of side
+    whose move uncovers a check by a bishop behind them, computed by walking the diagonals of that king
+    '''
+    def __init__(self, side: bool, B: Board):
+        '''computes the check map of board B for side
+
+        Parameters:
+            side (bool): True if white and False if black
+            B (Board): a board configuration
+        '''
+        occupied = occupancy(B)
+        self.direct = set()
+        self.discoverers = {} # piece of side -> squares of the diagonal it may move to without uncovering check
+        king = next((piece for piece in B[1] if isinstance(piece, King) and piece.side != side), None)
+        if king is None:
+            return
+        for ray in board_tables(B[0])[0][(king.pos_x, king.pos_y)]:
+            shield = None
+            for i, square in enumerate(ray):
+                piece = occupied.get(square)
+                if shield is None:
+                    self.direct.add(square)
+                if piece is None:
+                    continue
+                if piece.side != side:
+                    break
+                if shield is not None:
+                    if isinstance(piece, Bishop):
+                        self.discoverers[shield] = set(ray[:i + 1])
+                    break
+                shield = piece
+
+    def gives_check(self, piece: Piece, pos_X: int, pos_Y: int) -> bool:
+        '''checks if a legal move of piece of side to coordinates pos_X, pos_Y results in check for the opponent
+
+        Parameters:
+            piece (Piece): a piece of side on the board of this check map
+            pos_X (int): position x of coordinates
+            pos_Y (int): position y of coordinates
+        Returns:
+            bool: True if the moved bishop or a bishop behind piece then attacks the king of the opponent
+        '''
+        if isinstance(piece, Bishop) and (pos_X, pos_Y) in self.direct:
+            return True
+        return piece in self.discoverers and (pos_X, pos_Y) not in self.discoverers[piece]
+
+def object_legal_moves(side: bool, B: Board, attacks: AttackMap = None):
+    '''generate_legal_moves answered by the object model
+    walks the reachable squares of each piece and tests [Rule4] with one AttackMap of B
+
+    Parameters:
+        side (bool): True if white and False if black
+        B (Board): a board configuration
+        attacks (AttackMap): attack map of B for side if already computed
+    Returns:
+        generator of tuple[Piece, int, int]: legal moves of side
+    '''
+    if attacks is None:
+        attacks = AttackMap(side, B)
+    for piece in [piece for piece in B[1] if piece.side == side]:
+        if len(attacks.checkers) > 1 and piece is not attacks.king:
+            continue
+        for x, y in piece.reachable_squares(B):
+            if attacks.allows(piece, x, y):
+                yield (piece, x, y)
+
+def bitboard_legal_moves(side: bool, B: Board):
+    '''generate_legal_moves answered by the bitboard backend'''
+    for x, y, pos_X, pos_Y in to_bitboard(B).legal_moves(side):
+        yield (piece_at(x, y, B), pos_X, pos_Y)
+
+def generate_legal_moves(side: bool, B: Board, attacks: AttackMap = None):
+    '''returns an iterator of (P, x, y) for every move of a piece P of side to coordinates x,y allowed by all chess rules,
+    from the selected backend; in compare mode the moves of the object model are returned
+    and a difference from the bitboard moves is warned about
+    B must not be changed while the moves are being generated
+
+    Parameters:
+        side (bool): True if white and False if black
+        B (Board): a board configuration
+        attacks (AttackMap): attack map of B for side if already computed, used by the object model
+    Returns:
+        iterator of tuple[Piece, int, int]: legal moves of side
+    '''
+    if backend == 'object':
+        return object_legal_moves(side, B, attacks)
+    if backend == 'bitboard':
+        return bitboard_legal_moves(side, B)
+    moves = list(object_legal_moves(side, B, attacks))
+    expected = {(piece.pos_x, piece.pos_y, x, y) for piece, x, y in moves}
+    other = set(to_bitboard(B).legal_moves(side))
+    if other != expected:
+        warnings.warn(f'generate_legal_moves{(side, B[0])} differs in the bitboard backend: '
+                      f'missing {sorted(expected - other)}, extra {sorted(other - expected)}',
+                      BackendMismatchWarning, stacklevel=2)
+    return iter(moves)
+
+def has_legal_move(side: bool, B: Board) -> bool:
+    '''checks if side has at least one move allowed by all chess rules
+
+    Parameters:
+        side (bool): True if white and False if black
+        B (Board): a board configuration
+    Returns:
+        bool: True if some piece of side can move or False if not
+    '''
+    return next(generate_legal_moves(side, B), None) is not None
+
 def is_checkmate(side: bool, B: Board) -> bool:
     '''checks if configuration of B is checkmate for side
 
@@ -231,23 +872,7 @@ def is_checkmate(side: bool, B: Board) -> bool:
     Returns:
         bool: True if checkmate or False if not
     '''
-    if is_check(side, B):
-        for piece in B[1]:
-            if piece.side == side:
-                for x in range(1, B[0] + 1):
-                    for y in range(1, B[0] + 1):
-                        if piece.can_move_to(x, y, B):
-                            B2 = copy.deepcopy(B)
-                            for item in B2[1]:
-                                if item.pos_x == piece.pos_x and item.pos_y == piece.pos_y and item.side == piece.side:
-                                    piece2 = item
-                                    break
-                            B2 = piece2.move_to(x, y, B2)
-                            if not is_check(piece2.side, B2):
-                                return False
-        return True
-    else:
-        return False
+    return is_check(side, B) and not has_legal_move(side, B)
 
 def is_stalemate(side: bool, B: Board) -> bool:
     '''checks if configuration of B is stalemate for side
@@ -258,21 +883,53 @@ def is_stalemate(side: bool, B: Board) -> bool:
     Returns:
         bool: True if stalemate or False if not
     '''
-    if not is_check(side, B):
-        for piece in B[1]:
-            if piece.side == side:
-                for x in range(1, B[0] + 1):
-                    for y in range(1, B[0] + 1):
-                        if piece.can_move_to(x, y, B):
-                            return False
-        return True
-    else:
-        return False
+    return not is_check(side, B) and not has_legal_move(side, B)
+
+class GameStatus(NamedTuple):
+    '''status of a board configuration for the side to move'''
+    check: bool
+    checkmate: bool
+    stalemate: bool
+
+def game_status(B: Board, side_to_move: bool, table: transposition.TranspositionTable = None) -> GameStatus:
+    '''computes check, checkmate and stalemate for the side to move with one AttackMap of B
+
+    Parameters:
+        B (Board): a board configuration
+        side_to_move (bool): True if white and False if black
+        table (TranspositionTable): optional table to look up and store the result by position_key
+    Returns:
+        GameStatus: whether the configuration is check, checkmate and stalemate for side_to_move
+    '''
+    if table is not None:
+        key = position_key(B, side_to_move)
+        status = table.probe(key)
+        if status is not None:
+            return status
+    attacks = AttackMap(side_to_move, B)
+    check = bool(attacks.checkers) if backend == 'object' else is_check(side_to_move, B)
+    can_move = next(generate_legal_moves(side_to_move, B, attacks), None) is not None
+    status = GameStatus(check, check and not can_move, not check and not can_move)
+    if table is not None:
+        table.store(key, status)
+    return status
 
 piece_map = {'K': King,
             'B': Bishop
             }
 
+def piece_key(piece: Piece) -> str:
+    '''returns the letter of piece in plain configuration
+
+    Parameters:
+        piece (Piece): a piece
+    Returns:
+        str: key of piece_map matching the class of piece
+    '''
+    for key, value in piece_map.items():
+        if isinstance(piece, value):
+            return key
+
 def read_pieces(pieces: list[str], side: bool) -> list[Piece]:
     '''reads individual pieces in plain configuration
     converts coordinates into numerical form and letter into piece class object
@@ -292,50 +949,81 @@ def read_pieces(pieces: list[str], side: bool) -> list[Piece]:
         objs.append(obj)
     return objs
 
-def read_board(filename: str) -> tuple[int, list[Piece]]:
+def parse_board(lines: list[str], max_size: int = 26) -> Board:
+    '''parses the lines of a board configuration in plain format
+    raises IOError exception with the reason if the lines are not valid (see section Plain board configurations)
+
+    Parameters:
+        lines (list[str]): size line, White pieces line, Black pieces line and optionally blank lines
+        max_size (int): largest valid size, 26 in the specification, None for no limit
+    Returns:
+        Board: board configuration with an IndexedPieceList
+    '''
+    lines = list(lines) + [''] * (3 - len(lines))
+    try:
+        size = int(lines[0].strip())
+        w_objs = read_pieces(lines[1].strip().split(', '), True)
+        b_objs = read_pieces(lines[2].strip().split(', '), False)
+    except (ValueError, KeyError, IndexError) as error:
+        raise IOError(f'syntax error: {error!r}') # invalid file if size or a piece location cannot be read
+    if size < 1 or (max_size is not None and size > max_size):
+        raise IOError(f'size {size} outside 1..{max_size}') # invalid file is size outside specification
+    w_king = sum(isinstance(piece, King) and piece.side for piece in w_objs)
+    b_king = sum(isinstance(piece, King) and not piece.side for piece in b_objs)
+    if any(line.strip() for line in lines[3:]):
+        raise IOError('unexpected text after the Black pieces') # invalid file if unexpected text is found
+    if w_king != 1 or b_king != 1:
+        raise IOError('each side must have exactly one king') # invalid file if side does not have 1 king
+    objs = IndexedPieceList(size=size)
+    objs.extend(w_objs + b_objs)
+    positions = set((piece.pos_x, piece.pos_y) for piece in objs)
+    if len(positions) != len(objs):
+        raise IOError('different pieces in the same location') # invalid file if different pieces in same location
+    for piece in objs:
+        if piece.pos_x < 1 or piece.pos_x > size or piece.pos_y < 1 or piece.pos_y > size:
+            raise IOError('piece outside the board') # invalid file if piece outside board configuration
+    return (size, objs)
+
+def load_board(filename: str, max_size: int = 26) -> Board:
+    '''reads board configuration from file in plain format without printing anything
+    raises IOError exception if the file cannot be read or is not valid
+
+    Parameters:
+        filename (str): filename to open
+        max_size (int): largest valid size, None for no limit
+    Returns:
+        Board: board configuration with an IndexedPieceList
+    '''
+    with open(filename, 'r') as file:
+        try:
+            lines = file.readlines()
+        except UnicodeDecodeError as error:
+            raise IOError(f'not a text file: {error.reason}') # invalid file if it cannot be decoded
+    return parse_board(lines, max_size)
+
+def read_board(filename: str, max_size: int = 26) -> tuple[int, list[Piece]]:
     '''reads board configuration from file in current directory in plain format
     raises IOError exception if file is not valid (see section Plain board configurations)
 
     Parameters:
         filename (str): filename to open in currnet directory
+        max_size (int): largest valid size, None for no limit
     Returns:
         tuple[int, list[Piece]]: returns a tuple with size of board and a list of pieces, to be used as a Board
     '''
     try:
-        with open(filename, 'r') as file:
-            size = int(file.readline().strip())
-            if size < 1 or size > 26:
-                raise IOError # invalid file is size outside specification
-            w_objs = read_pieces(file.readline().strip().split(', '), True)
-            b_objs = read_pieces(file.readline().strip().split(', '), False)
-            w_king = sum(isinstance(piece, King) and piece.side for piece in w_objs)
-            b_king = sum(isinstance(piece, King) and not piece.side for piece in b_objs)
-            if any(line.strip() for line in file):
-                raise IOError # invalid file if unexpected text is found
-            if w_king != 1 or b_king != 1:
-                raise IOError # invalid file if side does not have 1 king
-            objs = []
-            objs.extend(w_objs + b_objs)
-            positions = set((piece.pos_x, piece.pos_y) for piece in objs)
-            if len(positions) != len(objs):
-                raise IOError # invalid file if different pieces in same location
-            for piece in objs:
-                if piece.pos_x < 1 or piece.pos_x > size or piece.pos_y < 1 or piece.pos_y > size:
-                    raise IOError # invalid file if piece outside board configuration
-        return (size, objs)
+        return load_board(filename, max_size)
     except IOError as error:
         print('This is not a valid file.')
 
-def save_board(filename: str, B: Board) -> None:
-    '''saves board configuration into file in current directory in plain format
-    
+def board_lines(B: Board) -> list[str]:
+    '''returns the size line, White pieces line and Black pieces line of board configuration in plain format
+
     Parameters:
-        filename (str): a filename to save the file as
-        B (Board): board configuration to save
+        B (Board): board configuration
     Returns:
-        None
+        list[str]: the three lines without line endings
     '''
-    size = str(B[0])
     w_pieces = [
         key + index2location(piece.pos_x, piece.pos_y)
         for key, value in piece_map.items()
@@ -348,51 +1036,172 @@ def save_board(filename: str, B: Board) -> None:
         for piece in B[1]
         if isinstance(piece, value) and not piece.side
     ]
+    return [str(B[0]), ', '.join(w_pieces), ', '.join(b_pieces)]
+
+def save_board(filename: str, B: Board) -> None:
+    '''saves board configuration into file in current directory in plain format
+    
+    Parameters:
+        filename (str): a filename to save the file as
+        B (Board): board configuration to save
+    Returns:
+        None
+    '''
     with open(filename, 'w') as file:
-        file.write(size + '\n')
-        file.write(', '.join(w_pieces) + '\n')
-        file.write(', '.join(b_pieces) + '\n')   
+        for line in board_lines(B):
+            file.write(line + '\n')
 
-def find_black_move(B: Board) -> tuple[Piece, int, int]:
+class BoardRecordError(IOError):
+    '''invalid record of a multi-board file, with its position in the file'''
+    def __init__(self, reason: str, record: int, line: int, offset: int):
+        '''
+        Parameters:
+            reason (str): why the record is not valid, as raised by parse_board
+            record (int): index of the record in the file, starting at 0
+            line (int): line number of the first line of the record, starting at 1
+            offset (int): byte offset of the first line of the record
+        '''
+        super().__init__(f'record {record} (line {line}, byte {offset}): {reason}')
+        self.reason = reason
+        self.record = record
+        self.line = line
+        self.offset = offset
+
+def iter_records(filename: str):
+    '''reads the records of a multi-board file one at a time
+    a record is a group of consecutive non-blank lines, records are separated by blank lines
+
+    Parameters:
+        filename (str): filename to open
+    Returns:
+        generator of tuple[int, int, list[str]]: line number and byte offset of the first line, and the lines of each record
+    '''
+    lines = []
+    start = None
+    offset = 0
+    with open(filename, 'rb') as file:
+        for number, raw in enumerate(file, 1):
+            line = raw.decode('utf-8', errors='replace')
+            if line.strip():
+                if not lines:
+                    start = (number, offset)
+                lines.append(line)
+            elif lines:
+                yield (*start, lines)
+                lines = []
+            offset += len(raw)
+    if lines:
+        yield (*start, lines)
+
+def iter_boards(filename: str, errors: str = 'raise', max_size: int = 26):
+    '''parses the boards of a multi-board file lazily, keeping only the current record in memory
+    the file holds boards in plain format separated by blank lines, a plain board file is a file with one record
+    raises IOError exception if the file cannot be read
+
+    Parameters:
+        filename (str): filename to open
+        errors (str): what to do with an invalid record, 'raise' raises its BoardRecordError,
+            'yield' yields the BoardRecordError in place of the board and 'skip' ignores the record
+        max_size (int): largest valid size, None for no limit
+    Returns:
+        generator of Board: board configurations with an IndexedPieceList, in file order
+    '''
+    if errors not in ('raise', 'yield', 'skip'):
+        raise ValueError(f'unknown errors mode {errors!r}')
+    for record, (line, offset, lines) in enumerate(iter_records(filename)):
+        try:
+            B = parse_board(lines, max_size)
+        except IOError as error:
+            error = BoardRecordError(str(error), record, line, offset)
+            if errors == 'raise':
+                raise error
+            if errors == 'yield':
+                yield error
+            continue
+        yield B
+
+def save_boards(filename: str, boards) -> int:
+    '''saves board configurations into one multi-board file, writing each board as soon as it is produced
+
+    Parameters:
+        filename (str): a filename to save the file as
+        boards: iterable of Board, consumed lazily
+    Returns:
+        int: number of boards written
+    '''
+    count = 0
+    with open(filename, 'w') as file:
+        for B in boards:
+            if count:
+                file.write('\n')
+            for line in board_lines(B):
+                file.write(line + '\n')
+            count += 1
+    return count
+
+def greedy_move(side: bool, B: Board) -> tuple[Piece, int, int]:
+    '''returns a capture of side if there is one, otherwise a check, otherwise a random legal move
+
+    Parameters:
+        side (bool): True if white and False if black
+        B (Board): board configuration
+    Returns:
+        tuple[Piece, int, int]: a piece of side with a move to coordinates x and y, None if side cannot move
+    '''
+    moves = list(generate_legal_moves(side, B))
+    for piece, pos_X, pos_Y in moves:
+        if is_piece_at(pos_X, pos_Y, B): # capture
+            return (piece, pos_X, pos_Y)
+    checks = CheckMap(side, B)
+    for piece, pos_X, pos_Y in moves:
+        if checks.gives_check(piece, pos_X, pos_Y): # checkmate is a check too
+            return (piece, pos_X, pos_Y)
+    if moves:
+        return random.choice(moves)
+
+def search_move(side: bool, B: Board) -> tuple[Piece, int, int]:
+    '''returns the best move of side found by the alpha-beta search of search.py within its default budget
+
+    Parameters:
+        side (bool): True if white and False if black
+        B (Board): board configuration
+    Returns:
+        tuple[Piece, int, int]: a piece of side with a move to coordinates x and y, None if side cannot move
+    '''
+    import search # imported here because search imports this module
+    return search.best_move(B, side).move
+
+def tablebase_move(side: bool, B: Board) -> tuple[Piece, int, int]:
+    '''returns the move of side with perfect play from the endgame tables of tablebase.py, greedy_move if there is no table
+
+    Parameters:
+        side (bool): True if white and False if black
+        B (Board): board configuration
+    Returns:
+        tuple[Piece, int, int]: a piece of side with a move to coordinates x and y, None if side cannot move
+    '''
+    import tablebase # imported here because tablebase imports this module
+    return tablebase.tablebase_move(side, B)
+
+# strategies for computer moves, each called as strategy(side, B)
+strategies = {'greedy': greedy_move,
+              'search': search_move,
+              'tablebase': tablebase_move
+              }
+black_strategy = os.environ.get('CHESS_PUZZLE_STRATEGY', 'greedy')
+max_board_size = int(os.environ.get('CHESS_PUZZLE_MAX_SIZE', 26)) # largest board main accepts, beyond z columns go on with aa
+
+def find_black_move(B: Board, strategy: str = 'greedy') -> tuple[Piece, int, int]:
     '''returns (P, x, y) where a Black piece P can move on B to coordinates x,y according to chess rules 
     assumes there is at least one black piece that can move somewhere
 
     Parameters:
         B (Board): board configuration
+        strategy (str): key of strategies used to choose the move
     Returns:
         tuple[Piece, int, int]: a Black piece with a move to coordinates x and y
     '''
-    for piece in B[1]:
-        if piece.side == False:
-            for wpiece in B[1]:
-                if wpiece.side == True:
-                    if piece.can_move_to(wpiece.pos_x, wpiece.pos_y, B):
-                        return (piece, wpiece.pos_x, wpiece.pos_y)
-    for piece in B[1]:
-        if piece.side == False:
-            for pos_X in range(1, B[0] + 1):
-                for pos_Y in range(1, B[0] + 1):
-                    if piece.can_move_to(pos_X, pos_Y, B):
-                        B2 = copy.deepcopy(B)
-                        for item in B2[1]:
-                            if item.pos_x == piece.pos_x and item.pos_y == piece.pos_y and item.side == piece.side:
-                                piece2 = item
-                                break
-                        B2 = piece2.move_to(pos_X, pos_Y, B2)
-                        if is_checkmate(True, B2) or is_check(True, B2):
-                            return (piece, pos_X, pos_Y)
-    for piece in B[1]:        
-        if piece.side == False:
-            pos_X = random.randint(1, B[0])
-            pos_Y = random.randint(1, B[0])
-            max_attempts = B[0] * B[0]
-            attempts = 0
-            while not piece.can_move_to(pos_X, pos_Y, B) and attempts < max_attempts:
-                pos_X = random.randint(1, B[0])
-                pos_Y = random.randint(1, B[0])
-                attempts += 1
-            if piece.can_move_to(pos_X, pos_Y, B):
-                return (piece, pos_X, pos_Y)
+    return strategies[strategy](False, B)
 
 unicode_map = {
                 (True, King): '♔',
@@ -426,8 +1235,143 @@ def conf2unicode(B: Board) -> str:
     unicode_string = '\n'.join([' '.join(row) for row in unicode_matrix])
     return unicode_string
 
+profiler = instrumentation.Profiler()
+ply_hooks = [] # functions called with (ply, side, seconds) after every ply of run_play
+
+def profile_targets() -> list[tuple[object, str]]:
+    '''returns the (module or class, function name) pairs counted by enable_profiling'''
+    module = sys.modules[__name__]
+    functions = ['make_move', 'unmake_move', 'occupancy', 'is_check', 'generate_legal_moves', 'object_legal_moves',
+                 'bitboard_legal_moves', 'has_legal_move', 'is_checkmate', 'is_stalemate', 'game_status', 'find_black_move',
+                 'conf2unicode', 'parse_board', 'zobrist_hash', 'position_key']
+    methods = [(Piece, 'can_move_to'), (Bishop, 'can_reach'), (King, 'can_reach'), (Bishop, 'reachable_squares'),
+               (King, 'reachable_squares'), (AttackMap, '__init__')]
+    return [(module, name) for name in functions] + methods
+
+def enable_profiling(report: str = None) -> instrumentation.Profiler:
+    '''starts counting calls and time of the functions of profile_targets and the time of each ply of run_play
+    functions are wrapped now, so calls through names imported from this module before are not counted
+
+    Parameters:
+        report (str): file written at exit and on SIGUSR1, as JSON if it ends with .json and as text otherwise
+    Returns:
+        instrumentation.Profiler: the profiler, whose report_text, report and dump give the report on demand
+    '''
+    for owner, name in profile_targets():
+        profiler.wrap(owner, name)
+    if profiler.record_ply not in ply_hooks:
+        ply_hooks.append(profiler.record_ply)
+    if report is not None:
+        atexit.register(profiler.dump, report)
+        if hasattr(signal, 'SIGUSR1'):
+            try:
+                signal.signal(signal.SIGUSR1, lambda signum, frame: profiler.dump(report))
+            except ValueError: # signal handlers can only be set in the main thread
+                pass
+    return profiler
+
+def disable_profiling() -> None:
+    '''restores the original functions, the counters are kept until profiler.reset'''
+    profiler.unwrap_all()
+    if profiler.record_ply in ply_hooks:
+        ply_hooks.remove(profiler.record_ply)
+
+def parse_move(move: str) -> tuple[tuple[int, int], tuple[int, int]]:
+    '''converts a move in crCR notation, e.g. c1b2, a10b9 or ab100ac99, to the coordinates of its start and end
+    raises ValueError if move does not start with two locations
+    '''
+    match = re.match(r'([a-z]+[0-9]+)([a-z]+[0-9]+)', move)
+    if match is None:
+        raise ValueError(f'invalid move {move!r}')
+    return location2index(match.group(1)), location2index(match.group(2))
+
+def strategy_move(B: Board, side: bool, strategy: str) -> Union[tuple[int, int, int, int], None]:
+    '''returns the move of side chosen by strategy as coordinates (x, y, pos_X, pos_Y), which can be sent between processes
+
+    Parameters:
+        B (Board): board configuration
+        side (bool): True if white and False if black
+        strategy (str): key of strategies
+    Returns:
+        Union[tuple[int, int, int, int], None]: start and end coordinates, None if side cannot move
+    '''
+    move = strategies[strategy](side, B)
+    if move is None:
+        return None
+    return (move[0].pos_x, move[0].pos_y, move[1], move[2])
+
+class Game:
+    '''turn logic of a game between White, moved by the player, and Black, moved by a strategy
+    a game never waits for input or prints, so that run_play and the asyncio server of server.py can both drive it
+    '''
+    def __init__(self, B: Board, strategy: str = 'greedy'):
+        '''starts a game with White to move
+
+        Parameters:
+            B (Board): initial board configuration, changed by the moves of the game
+            strategy (str): key of strategies used for the moves of Black
+        '''
+        self.B = B
+        self.strategy = strategy
+        self.side = True # side to move
+        self.initial = True
+        self.result = None # 'White wins', 'Black wins' or 'Stalemate' once the game is over
+
+    def update_status(self) -> Union[str, None]:
+        '''checks if the side to move is checkmated or stalemated, on the initial board also if the other side is checkmated
+
+        Returns:
+            Union[str, None]: the result if the game is over, otherwise None
+        '''
+        side = self.side
+        status = game_status(self.B, side)
+        if self.initial and not status.checkmate:
+            other = game_status(self.B, not side) # initial configuration may be lost for the side not to move
+            if other.checkmate:
+                side, status = not side, other
+        self.initial = False
+        if status.checkmate:
+            self.result = 'Black wins' if side else 'White wins'
+        elif status.stalemate:
+            self.result = 'Stalemate'
+        return self.result
+
+    def play_white(self, move: str) -> bool:
+        '''plays move of White in crCR notation if White is to move and the move is valid
+
+        Parameters:
+            move (str): move such as c1b2
+        Returns:
+            bool: True if the move was played, False if it is not valid
+        '''
+        try:
+            (x, y), (pos_X, pos_Y) = parse_move(move)
+            piece = piece_at(x, y, self.B)
+            valid = self.side and piece is not None and piece.side and piece.can_move_to(pos_X, pos_Y, self.B)
+        except (ValueError, IndexError):
+            return False
+        if valid:
+            piece.move_to(pos_X, pos_Y, self.B)
+            self.side = False
+        return bool(valid)
+
+    def play_black(self, move: tuple[int, int, int, int] = None) -> str:
+        '''plays the move of Black, chosen by the strategy unless given
+
+        Parameters:
+            move (tuple[int, int, int, int]): coordinates from strategy_move, e.g. computed in another process
+        Returns:
+            str: the move in crCR notation
+        '''
+        if move is None:
+            move = strategy_move(self.B, False, self.strategy)
+        x, y, pos_X, pos_Y = move
+        piece_at(x, y, self.B).move_to(pos_X, pos_Y, self.B)
+        self.side = True
+        return index2location(x, y) + index2location(pos_X, pos_Y)
+
 def run_play(B: Board) -> None:
-    '''Function to run the play between white and black pieces based on counter
+    '''Function to run the play between white and black pieces, with the turn logic of Game
     stops play if checkmate or stalemate
     
     Parameters:
@@ -435,54 +1379,39 @@ def run_play(B: Board) -> None:
     Returns:
         None
     '''
+    game = Game(B, black_strategy)
     cont_play = True
-    counter = 2
+    ply = 0
     print('The initial configuration is:')
     while cont_play:
+        ply_start = time.perf_counter()
         print(conf2unicode(B))
-        if is_checkmate(False, B):
-            print('Game over. White wins.')
-            cont_play = False
-        elif is_checkmate(True, B):
-            print('Game over. Black wins.')
-            cont_play = False
-        elif is_stalemate(False, B) and counter % 2 != 0:
-            print('Game over. Stalemate.') # stalemate for black
-            cont_play = False
-        elif is_stalemate(True, B) and counter % 2 == 0:
-            print('Game over. Stalemate.') #stalemate for white
-            cont_play = False
-        else:
-            if counter % 2 == 0: # white plays
+        side = game.side
+        if game.update_status() is not None:
+            print(f'Game over. {game.result}.')
+            break
+        if side: # white plays
+            waiting = time.perf_counter()
+            move = input('Next move of White: ')
+            ply_start += time.perf_counter() - waiting # time waiting for the player is not counted
+            if move == 'QUIT': # quit program
+                filename = input('File name to store the configuration: ')
                 try:
-                    move = input('Next move of White: ')
-                    if move != 'QUIT':
-                        start = location2index(move[0:2])
-                        end = location2index(move[2:4])
-                        piece = piece_at(start[0], start[1], B)
-                        if piece.can_move_to(end[0], end[1], B):
-                            piece.move_to(end[0], end[1], B)
-                            print('The configuration after White\'s move is:')
-                        else:
-                            print('This is not a valid move.')
-                            counter -= 1
-                    else: # quit program
-                        filename = input('File name to store the configuration: ')
-                        save_board(filename, B)
-                        print('The game configuration saved')
-                        cont_play = False
-                except:
+                    save_board(filename, B)
+                    print('The game configuration saved')
+                    cont_play = False
+                except OSError:
                     print('This is not a valid move.')
-                    counter -= 1 # reduce counter if invalid move to request new move
-            else: # black plays
-                move = find_black_move(B)
-                piece = move[0]
-                move_from = index2location(piece.pos_x, piece.pos_y)
-                move_to = index2location(move[1], move[2])
-                print(f'Next move of Black is {move_from + move_to}.')
-                piece.move_to(move[1], move[2], B)
-                print('The configuration after Black\'s move is:')
-            counter += 1
+            elif game.play_white(move):
+                print('The configuration after White\'s move is:')
+            else:
+                print('This is not a valid move.')
+        else: # black plays
+            print(f'Next move of Black is {game.play_black()}.')
+            print('The configuration after Black\'s move is:')
+        for hook in ply_hooks:
+            hook(ply, side, time.perf_counter() - ply_start)
+        ply += 1
 
 def main() -> None:
     '''main function to execute application
@@ -497,7 +1426,7 @@ def main() -> None:
             break
         elif os.path.isfile(filename):
             try:
-                B = read_board(filename)
+                B = read_board(filename, max_board_size)
                 run_play(B)
                 stop_game = True
             except:
@@ -506,5 +1435,9 @@ def main() -> None:
             print('This is not a valid file')
             stop_game = False
 
+if os.environ.get('CHESS_PUZZLE_PROFILE'):
+    enable_profiling(os.environ['CHESS_PUZZLE_PROFILE'])
+
 if __name__ == '__main__': #keep this in
+   sys.modules['chess_puzzle'] = sys.modules[__name__] # so that helper modules share these classes
    main()
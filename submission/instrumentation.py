@@ -0,0 +1,117 @@
+'''opt-in call counters and timers for chess_puzzle
+
+functions are only wrapped while profiling is enabled, so there is no overhead at all when it is off
+chess_puzzle.enable_profiling chooses the functions, this module does not depend on chess_puzzle
+'''
+import functools
+import inspect
+import json
+import time
+
+class Profiler:
+    '''counts calls and accumulates time of wrapped functions and the time of each ply of a game'''
+    def __init__(self):
+        '''starts with no wrapped functions and empty counters'''
+        self.originals = {} # (owner, attribute) -> original function
+        self.counters = {} # name -> [calls, seconds, active calls]
+        self.plies = [] # (ply, side, seconds)
+
+    def wrap(self, owner, attribute: str) -> None:
+        '''replaces owner.attribute with a wrapper counting its calls and time
+        time spent in recursive calls is counted once, by the outermost call
+        generator functions are timed while they produce items, not while their consumer works
+
+        Parameters:
+            owner: module or class holding the function
+            attribute (str): name of the function in owner
+        '''
+        if (owner, attribute) in self.originals:
+            return
+        func = inspect.getattr_static(owner, attribute)
+        name = attribute if inspect.ismodule(owner) else f'{owner.__name__}.{attribute}'
+        counter = self.counters.setdefault(name, [0, 0.0, 0])
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                counter[0] += 1
+                iterator = func(*args, **kwargs)
+                while True:
+                    counter[2] += 1
+                    start = time.perf_counter()
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                    finally:
+                        counter[2] -= 1
+                        if not counter[2]:
+                            counter[1] += time.perf_counter() - start
+                    yield item
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                counter[0] += 1
+                counter[2] += 1
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    counter[2] -= 1
+                    if not counter[2]:
+                        counter[1] += time.perf_counter() - start
+        self.originals[(owner, attribute)] = func
+        setattr(owner, attribute, wrapper)
+
+    def unwrap_all(self) -> None:
+        '''restores all wrapped functions, the counters are kept'''
+        for (owner, attribute), func in self.originals.items():
+            setattr(owner, attribute, func)
+        self.originals = {}
+
+    def record_ply(self, ply: int, side: bool, seconds: float) -> None:
+        '''records the time spent computing ply of a game, for side True if white and False if black'''
+        self.plies.append((ply, side, seconds))
+
+    def reset(self) -> None:
+        '''sets all counters to zero and forgets the recorded plies'''
+        for counter in self.counters.values():
+            counter[0], counter[1] = 0, 0.0
+        self.plies = []
+
+    def report(self) -> dict:
+        '''returns the counters and plies as a JSON compatible dict
+
+        Returns:
+            dict: functions with calls, seconds and seconds per call, sorted by time, and plies with their summary
+        '''
+        functions = [{'name': name, 'calls': calls, 'seconds': seconds, 'per_call': seconds / calls if calls else 0.0}
+                     for name, (calls, seconds, _) in self.counters.items() if calls]
+        functions.sort(key=lambda function: function['seconds'], reverse=True)
+        seconds = [ply[2] for ply in self.plies]
+        summary = {'count': len(seconds), 'seconds': sum(seconds),
+                   'mean': sum(seconds) / len(seconds) if seconds else 0.0, 'max': max(seconds, default=0.0)}
+        plies = [{'ply': ply, 'side': 'white' if side else 'black', 'seconds': seconds} for ply, side, seconds in self.plies]
+        return {'functions': functions, 'plies': plies, 'ply_summary': summary}
+
+    def report_text(self) -> str:
+        '''returns the report as a table of text'''
+        report = self.report()
+        lines = [f"{'function':<32} {'calls':>10} {'total ms':>12} {'us/call':>10}"]
+        for function in report['functions']:
+            lines.append(f"{function['name']:<32} {function['calls']:>10} {function['seconds'] * 1000:>12.3f} "
+                         f"{function['per_call'] * 1e6:>10.2f}")
+        summary = report['ply_summary']
+        if summary['count']:
+            lines.append(f"{summary['count']} plies: total {summary['seconds'] * 1000:.3f} ms, "
+                         f"mean {summary['mean'] * 1000:.3f} ms, max {summary['max'] * 1000:.3f} ms")
+            for ply in report['plies']:
+                lines.append(f"  ply {ply['ply']:>4} {ply['side']:<5} {ply['seconds'] * 1000:.3f} ms")
+        return '\n'.join(lines)
+
+    def dump(self, filename: str) -> None:
+        '''writes the report to filename, as JSON if it ends with .json and as text otherwise'''
+        with open(filename, 'w') as file:
+            if filename.endswith('.json'):
+                json.dump(self.report(), file, indent=1)
+            else:
+                file.write(self.report_text() + '\n')
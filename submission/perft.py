@@ -0,0 +1,131 @@
+'''perft move-generation benchmark and correctness suite for chess_puzzle
+
+perft counts the leaf nodes of the tree of legal moves to a given depth, which checks
+generate_legal_moves, make_move and unmake_move against known counts and measures their speed, e.g.
+    python perft.py board_examp.txt --side white --depth 4 --divide
+    python perft.py --suite
+'''
+import argparse
+import sys
+import time
+from typing import NamedTuple
+from chess_puzzle import *
+
+def perft(B: Board, side: bool, depth: int) -> int:
+    '''returns the number of leaf nodes of the tree of legal moves of depth plies from board B
+
+    Parameters:
+        B (Board): board configuration, searched in place with make_move and unmake_move and unchanged on return
+        side (bool): side to move, True if white and False if black
+        depth (int): number of plies
+    Returns:
+        int: number of move sequences of length depth
+    '''
+    if depth == 0:
+        return 1
+    moves = list(generate_legal_moves(side, B))
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for piece, x, y in moves:
+        undo = make_move(piece, x, y, B)
+        try:
+            nodes += perft(B, not side, depth - 1)
+        finally:
+            unmake_move(undo, B)
+    return nodes
+
+def divide(B: Board, side: bool, depth: int) -> dict[str, int]:
+    '''returns the perft count below every legal move of side, to find the move where two generators differ
+
+    Parameters:
+        B (Board): board configuration, unchanged on return
+        side (bool): side to move
+        depth (int): number of plies including the root move, at least 1
+    Returns:
+        dict[str, int]: number of leaf nodes for each move in crCR notation
+    '''
+    B = indexed_board(B)
+    counts = {}
+    for piece, x, y in list(generate_legal_moves(side, B)):
+        notation = index2location(piece.pos_x, piece.pos_y) + index2location(x, y)
+        undo = make_move(piece, x, y, B)
+        try:
+            counts[notation] = perft(B, not side, depth - 1)
+        finally:
+            unmake_move(undo, B)
+    return counts
+
+class PerftPosition(NamedTuple):
+    '''reference position with its known perft counts'''
+    name: str
+    lines: tuple[str, str, str] # board in plain format
+    side: bool # side to move
+    counts: tuple[int, ...] # perft counts for depth 1, 2, ...
+
+# counts computed with the original implementation, which tries can_move_to on every square
+reference_positions = [
+    PerftPosition('open 4x4', ('4', 'Ka1, Bb1', 'Kd4'), True, (5, 9, 49, 191, 1140)),
+    PerftPosition('board_examp 5x5', ('5', 'Bb5, Kc5, Bd4, Bc1', 'Kb3, Bc3, Be3'), True, (10, 100, 941, 8452)),
+    PerftPosition('stalemate 5x5', ('5', 'Kd2, Bc1, Bc2, Bd4', 'Ka2'), False, (0, 0, 0)),
+    PerftPosition('checkmate 5x5', ('5', 'Kd5, Ba5, Bb4, Bc3, Bd2, Be1, Bb5, Bc4, Bd3, Be2', 'Kb1'), False, (0, 0)),
+    PerftPosition('open 8x8', ('8', 'Ke1, Bc1, Bf1', 'Ke8, Bc8, Bf8'), True, (18, 305, 5575, 99932)),
+    PerftPosition('pins 8x8', ('8', 'Ka1, Bc3, Bh2', 'Kg7, Be5, Bb8, Bf6'), True, (10, 188, 2372, 47170)),
+    PerftPosition('wide 12x12', ('12', 'Kf1, Bb2, Bk3, Bd9', 'Kg12, Bc11, Bj10, Be6'), False, (4, 180, 8313)),
+    PerftPosition('b2 26x26', ('26', 'Ba1, Bz26, Kb1', 'Bg8, By25, Ke9'), True, (27, 1553, 62091)),
+]
+
+def run_position(position: PerftPosition, depth: int = None) -> dict:
+    '''runs perft on a reference position and compares the result with the known count
+
+    Parameters:
+        position (PerftPosition): reference position
+        depth (int): depth to run, the deepest known count if None
+    Returns:
+        dict: name, depth, nodes, expected nodes, whether they match, seconds and nodes per second
+    '''
+    depth = depth or len(position.counts)
+    B = parse_board(position.lines)
+    start = time.perf_counter()
+    nodes = perft(B, position.side, depth)
+    seconds = time.perf_counter() - start
+    expected = position.counts[depth - 1] if depth <= len(position.counts) else None
+    return {'name': position.name, 'depth': depth, 'nodes': nodes, 'expected': expected,
+            'ok': expected is None or nodes == expected, 'seconds': seconds,
+            'nps': nodes / seconds if seconds else 0.0}
+
+def main() -> None:
+    '''runs perft on a board file or the reference suite and prints counts and nodes per second'''
+    parser = argparse.ArgumentParser(description='perft for chess_puzzle move generation')
+    parser.add_argument('filename', nargs='?', help='board file in plain format')
+    parser.add_argument('--side', choices=['white', 'black'], default='white', help='side to move')
+    parser.add_argument('--depth', type=int, default=3, help='depth in plies')
+    parser.add_argument('--divide', action='store_true', help='print the count below every root move')
+    parser.add_argument('--suite', action='store_true', help='check all reference positions')
+    args = parser.parse_args()
+    if args.suite:
+        failed = False
+        for position in reference_positions:
+            result = run_position(position)
+            failed = failed or not result['ok']
+            print(f"{result['name']}: depth {result['depth']}, {result['nodes']} nodes "
+                  f"({'ok' if result['ok'] else 'expected ' + str(result['expected'])}), "
+                  f"{result['nps']:.0f} nodes/s")
+        sys.exit(1 if failed else 0)
+    if args.filename is None:
+        parser.error('a board file or --suite is required')
+    B = load_board(args.filename)
+    side = args.side == 'white'
+    start = time.perf_counter()
+    if args.divide:
+        counts = divide(B, side, args.depth)
+        for notation, count in counts.items():
+            print(f'{notation}: {count}')
+        nodes = sum(counts.values())
+    else:
+        nodes = perft(B, side, args.depth)
+    seconds = time.perf_counter() - start
+    print(f'depth {args.depth}: {nodes} nodes in {seconds:.3f} s, {nodes / seconds if seconds else 0:.0f} nodes/s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+'''persistent cache of analysed positions in an sqlite database
+
+positions are keyed by canonical_key, a text encoding of the board and the side to move which does not
+depend on the order of the pieces, so a position analysed once is a single lookup in every later run;
+by default the key is taken of the representative from symmetry.canonicalize, so that the up to 16 positions
+equivalent under symmetries and colour swap share one entry;
+the database runs in WAL mode with a busy timeout, so several worker processes can share one file,
+each opening its own connection
+
+the cache keeps about max_entries results and evicts the least recently used ones,
+checking the size every max_entries // 16 stores of each process;
+hits are read-only, their times of use are kept in memory and written in one transaction
+before each size check, every max_entries // 16 hits and on close
+'''
+import os
+import sqlite3
+import time
+from typing import Union
+from chess_puzzle import *
+import symmetry
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS positions (
+    key TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (key, kind)
+);
+CREATE INDEX IF NOT EXISTS positions_used ON positions (used);
+'''
+
+def canonical_key(B: Board, side_to_move: bool) -> str:
+    '''returns the canonical encoding of B with side_to_move, e.g. 5/Bb5,Kc5/Bc3,Kb3/w
+
+    Parameters:
+        B (Board): board configuration
+        side_to_move (bool): True if white and False if black
+    Returns:
+        str: size, sorted White pieces and sorted Black pieces in plain format and w or b
+    '''
+    sides = [sorted(piece_key(piece) + index2location(piece.pos_x, piece.pos_y) for piece in B[1] if piece.side == side)
+             for side in (True, False)]
+    return f"{B[0]}/{','.join(sides[0])}/{','.join(sides[1])}/{'w' if side_to_move else 'b'}"
+
+class PositionCache:
+    '''maps canonical keys of positions to their game status and to the moves chosen by strategies'''
+    def __init__(self, filename: str, max_entries: int = 1000000, timeout: float = 30.0, symmetric: bool = True):
+        '''sets up the cache, the database is opened or created on first use
+
+        Parameters:
+            filename (str): sqlite database file, shared by all processes using the cache
+            max_entries (int): number of results kept, the least recently used are evicted beyond it
+            timeout (float): seconds to wait for a lock held by another process
+            symmetric (bool): True to store equivalent positions once under their canonical representative
+        '''
+        self.filename = filename
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.symmetric = symmetric
+        self.connection = None
+        self.pid = None
+        self.used = {} # (key, kind) -> time of the last hit not yet written
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def __getstate__(self) -> dict:
+        '''pickles the settings only, a worker process opens its own connection'''
+        return {'filename': self.filename, 'max_entries': self.max_entries, 'timeout': self.timeout,
+                'symmetric': self.symmetric}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    def connect(self) -> sqlite3.Connection:
+        '''returns the connection of this process, opening it on first use or after a fork'''
+        if self.connection is None or self.pid != os.getpid():
+            self.connection = sqlite3.connect(self.filename, timeout=self.timeout, isolation_level=None)
+            self.connection.execute(f'PRAGMA busy_timeout = {int(self.timeout * 1000)}')
+            self.connection.execute('PRAGMA journal_mode = WAL')
+            self.connection.execute('PRAGMA synchronous = NORMAL')
+            self.connection.executescript(SCHEMA)
+            self.pid = os.getpid()
+        return self.connection
+
+    def get(self, key: str, kind: str) -> Union[str, None]:
+        '''returns the value stored for key and kind and marks it as used, None if there is none'''
+        connection = self.connect()
+        row = connection.execute('SELECT value FROM positions WHERE key = ? AND kind = ?', (key, kind)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.used[(key, kind)] = time.time()
+        if len(self.used) >= max(1, self.max_entries // 16):
+            self.flush()
+        return row[0]
+
+    def flush(self) -> None:
+        '''writes the times of use recorded by get since the last flush'''
+        if not self.used:
+            return
+        connection = self.connect()
+        connection.execute('BEGIN')
+        try:
+            connection.executemany('UPDATE positions SET used = MAX(used, ?) WHERE key = ? AND kind = ?',
+                                   [(used, key, kind) for (key, kind), used in self.used.items()])
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        self.used.clear()
+
+    def put(self, key: str, kind: str, value: str) -> None:
+        '''stores value for key and kind, evicting the least recently used results if the cache is full'''
+        self.connect().execute('INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?)', (key, kind, value, time.time()))
+        self.stores += 1
+        if self.stores % max(1, self.max_entries // 16) == 0:
+            self.evict()
+
+    def evict(self) -> int:
+        '''deletes the least recently used results beyond max_entries
+
+        Returns:
+            int: number of deleted results
+        '''
+        self.flush()
+        connection = self.connect()
+        excess = connection.execute('SELECT COUNT(*) FROM positions').fetchone()[0] - self.max_entries
+        if excess <= 0:
+            return 0
+        connection.execute('DELETE FROM positions WHERE rowid IN '
+                           '(SELECT rowid FROM positions ORDER BY used LIMIT ?)', (excess,))
+        return excess
+
+    def position(self, B: Board, side_to_move: bool) -> tuple[Board, bool, symmetry.Transform]:
+        '''returns the position stored for B with side_to_move, its side to move and the transform from B to it'''
+        if self.symmetric:
+            return symmetry.canonicalize(B, side_to_move)
+        return B, side_to_move, symmetry.Transform(0, False)
+
+    def status(self, B: Board, side_to_move: bool) -> GameStatus:
+        '''returns game_status(B, side_to_move), computed only if the position is not in the cache'''
+        B, side_to_move, _ = self.position(B, side_to_move)
+        key = canonical_key(B, side_to_move)
+        value = self.get(key, 'status')
+        if value is not None:
+            return GameStatus(*(flag == '1' for flag in value))
+        status = game_status(B, side_to_move)
+        self.put(key, 'status', ''.join('1' if flag else '0' for flag in status))
+        return status
+
+    def move(self, B: Board, side: bool, strategy: str = 'greedy') -> Union[str, None]:
+        '''returns the move chosen by strategy for side in crCR notation, None if side cannot move,
+        computed only if the position is not in the cache, so later runs repeat the first choice of a random strategy
+
+        Parameters:
+            B (Board): board configuration with side to move
+            side (bool): True if white and False if black
+            strategy (str): key of chess_puzzle.strategies
+        Returns:
+            str: move such as c1b2 or None
+        '''
+        stored, side, transform = self.position(B, side)
+        key = canonical_key(stored, side)
+        notation = self.get(key, 'move:' + strategy)
+        if notation is None:
+            move = strategy_move(stored, side, strategy)
+            notation = '' if move is None else index2location(move[0], move[1]) + index2location(move[2], move[3])
+            self.put(key, 'move:' + strategy, notation)
+        if not notation:
+            return None
+        (x, y), (X, Y) = parse_move(notation)
+        x, y, X, Y = transform.inverse().move((x, y, X, Y), B[0])
+        return index2location(x, y) + index2location(X, Y)
+
+    def __len__(self) -> int:
+        '''returns the number of stored results'''
+        return self.connect().execute('SELECT COUNT(*) FROM positions').fetchone()[0]
+
+    def clear(self) -> None:
+        '''removes all results and resets the counters'''
+        self.connect().execute('DELETE FROM positions')
+        self.used.clear()
+        self.hits = self.misses = self.stores = 0
+
+    def close(self) -> None:
+        '''writes the pending times of use and closes the connection of this process'''
+        if self.connection is not None and self.pid == os.getpid():
+            self.flush()
+            self.connection.close()
+        self.connection = None
+
+    def stats(self) -> dict:
+        '''returns the counters of this process
+
+        Returns:
+            dict: stored results, hits, misses, hit rate and stores
+        '''
+        probes = self.hits + self.misses
+        return {'entries': len(self), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / probes if probes else 0.0, 'stores': self.stores}
+
+caches = {} # filename -> PositionCache used by open_cache in this process
+
+def open_cache(filename: str) -> PositionCache:
+    '''returns the PositionCache of filename, created on first use and then shared within the process'''
+    if filename not in caches:
+        caches[filename] = PositionCache(filename)
+    return caches[filename]
@@ -0,0 +1,239 @@
+'''alpha-beta search engine for chess_puzzle
+
+negamax with alpha-beta pruning, iterative deepening, a transposition table
+and move ordering (table move, captures, direct checks), under a node and/or time budget
+'''
+import time
+from typing import Union, NamedTuple
+from chess_puzzle import *
+from transposition import TranspositionTable
+
+MATE = 100000 # score of giving checkmate, reduced by the number of plies needed
+MATE_BOUND = MATE - 1000 # scores beyond this are mate scores
+BISHOP_VALUE = 100
+MOBILITY_VALUE = 2
+
+EXACT, LOWER, UPPER = 0, 1, 2 # kinds of scores stored in the transposition table
+
+class SearchTimeout(Exception):
+    '''raised inside the search when the node or time budget runs out'''
+
+class SearchResult(NamedTuple):
+    '''result of best_move'''
+    move: Union[tuple[Piece, int, int], None]
+    score: int
+    depth: int
+    nodes: int
+    seconds: float
+
+def mobility(side: bool, B: Board) -> int:
+    '''returns the number of squares the pieces of side can reach according to [Rule1]-[Rule3]
+
+    Parameters:
+        side (bool): True if white and False if black
+        B (Board): board configuration
+    Returns:
+        int: number of pseudo-legal moves of side
+    '''
+    return sum(len(piece.reachable_squares(B)) for piece in B[1] if piece.side == side)
+
+def evaluate(side: bool, B: Board, legal_moves: int = None) -> int:
+    '''returns the static score of board B from the point of view of side
+    material counts bishops, mobility counts reachable squares
+
+    Parameters:
+        side (bool): True if white and False if black
+        B (Board): board configuration
+        legal_moves (int): number of legal moves of side if known, used instead of its mobility
+    Returns:
+        int: score, positive if side is better
+    '''
+    material = 0
+    for piece in B[1]:
+        if isinstance(piece, Bishop):
+            material += BISHOP_VALUE if piece.side == side else -BISHOP_VALUE
+    own = mobility(side, B) if legal_moves is None else legal_moves
+    return material + MOBILITY_VALUE * (own - mobility(not side, B))
+
+def checking_squares(side: bool, B: Board) -> set:
+    '''returns the squares from which a bishop of side would attack the king of the other side'''
+    for piece in B[1]:
+        if isinstance(piece, King) and piece.side != side:
+            return set(Bishop(piece.pos_x, piece.pos_y, piece.side).reachable_squares(B))
+    return set()
+
+def order_moves(moves: list, side: bool, B: Board, first: tuple = None) -> list:
+    '''sorts moves so that the table move comes first, then captures, then direct checks
+
+    Parameters:
+        moves (list): list of (piece, x, y) of side
+        side (bool): True if white and False if black
+        B (Board): board configuration
+        first (tuple): (x, y, pos_X, pos_Y) of the move to try first
+    Returns:
+        list: the sorted moves
+    '''
+    checks = checking_squares(side, B)
+    def priority(move):
+        piece, x, y = move
+        if first is not None and (piece.pos_x, piece.pos_y, x, y) == first:
+            return 0
+        if is_piece_at(x, y, B):
+            return 1
+        if isinstance(piece, Bishop) and (x, y) in checks:
+            return 2
+        return 3
+    return sorted(moves, key=priority)
+
+def score_to_table(score: int, ply: int) -> int:
+    '''converts a mate score relative to the root into one relative to the stored position'''
+    if score > MATE_BOUND:
+        return score + ply
+    if score < -MATE_BOUND:
+        return score - ply
+    return score
+
+def score_from_table(score: int, ply: int) -> int:
+    '''converts a stored mate score back into one relative to the root'''
+    if score > MATE_BOUND:
+        return score - ply
+    if score < -MATE_BOUND:
+        return score + ply
+    return score
+
+class Searcher:
+    '''state of one search: the board, the budget, the node counter and the transposition table'''
+    def __init__(self, B: Board, max_nodes: int = None, max_time: float = None, table: TranspositionTable = None):
+        '''prepares a search of board B
+
+        Parameters:
+            B (Board): board configuration, searched in place with make_move and unmake_move
+            max_nodes (int): node budget or None
+            max_time (float): time budget in seconds or None
+            table (TranspositionTable): table shared between searches, a new one if None
+        '''
+        self.B = indexed_board(B)
+        self.max_nodes = max_nodes
+        self.deadline = time.perf_counter() + max_time if max_time is not None else None
+        self.table = table if table is not None else TranspositionTable(2 ** 22)
+        self.nodes = 0
+
+    def count_node(self) -> None:
+        '''counts a node and raises SearchTimeout when the budget is used up'''
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchTimeout
+        if self.deadline is not None and self.nodes % 256 == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+
+    def negamax(self, side: bool, depth: int, alpha: int, beta: int, ply: int) -> int:
+        '''returns the score of the position for side searched to depth plies
+
+        Parameters:
+            side (bool): side to move
+            depth (int): remaining depth
+            alpha (int): lower bound of the window
+            beta (int): upper bound of the window
+            ply (int): distance from the root
+        Returns:
+            int: score from the point of view of side
+        '''
+        self.count_node()
+        B = self.B
+        key = position_key(B, side)
+        entry = self.table.probe(key)
+        first = None
+        if entry is not None:
+            entry_depth, score, kind, first = entry
+            score = score_from_table(score, ply)
+            if entry_depth >= depth and (kind == EXACT or (kind == LOWER and score >= beta) or (kind == UPPER and score <= alpha)):
+                return score
+        attacks = AttackMap(side, B)
+        moves = list(generate_legal_moves(side, B, attacks))
+        if not moves:
+            return -MATE + ply if attacks.checkers else 0
+        if depth <= 0:
+            return evaluate(side, B, len(moves))
+        alpha_start = alpha
+        best_score = -MATE - 1
+        best = None
+        for piece, x, y in order_moves(moves, side, B, first):
+            origin = (piece.pos_x, piece.pos_y, x, y)
+            undo = make_move(piece, x, y, B)
+            try:
+                score = -self.negamax(not side, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                unmake_move(undo, B)
+            if score > best_score:
+                best_score = score
+                best = origin
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+        kind = EXACT
+        if best_score <= alpha_start:
+            kind = UPPER
+        elif best_score >= beta:
+            kind = LOWER
+        self.table.store(key, (depth, score_to_table(best_score, ply), kind, best), depth)
+        return best_score
+
+    def root(self, side: bool, depth: int, moves: list, result: list) -> None:
+        '''searches the moves of side at the root to depth, keeping the best move found so far in result
+
+        Parameters:
+            side (bool): side to move
+            depth (int): depth of this iteration
+            moves (list): legal moves of side, best move of the previous iteration first
+            result (list): [move, score], updated after every fully searched move
+        '''
+        alpha = -MATE - 1
+        for piece, x, y in moves:
+            undo = make_move(piece, x, y, self.B)
+            try:
+                score = -self.negamax(not side, depth - 1, -MATE - 1, -alpha, 1)
+            finally:
+                unmake_move(undo, self.B)
+            if score > alpha:
+                alpha = score
+                result[:] = [(piece, x, y), score]
+
+def best_move(B: Board, side: bool, max_depth: int = 64, max_nodes: int = None, max_time: float = 1.0,
+              table: TranspositionTable = None) -> SearchResult:
+    '''searches board B with iterative deepening and returns the best move found for side
+    when the budget runs out the best move of the deepest search is returned,
+    including a partly searched last iteration
+
+    Parameters:
+        B (Board): board configuration, unchanged on return
+        side (bool): True if white and False if black
+        max_depth (int): maximum depth in plies
+        max_nodes (int): node budget or None for no limit
+        max_time (float): time budget in seconds or None for no limit
+        table (TranspositionTable): table to reuse between searches
+    Returns:
+        SearchResult: the move (None if side cannot move), its score, the depth completed, nodes and seconds used
+    '''
+    start = time.perf_counter()
+    searcher = Searcher(B, max_nodes, max_time, table)
+    searcher.table.new_generation()
+    moves = order_moves(list(generate_legal_moves(side, searcher.B)), side, searcher.B)
+    best = [moves[0] if moves else None, 0]
+    completed = 0
+    for depth in range(1, max_depth + 1):
+        if not moves:
+            break
+        result = []
+        try:
+            searcher.root(side, depth, moves, result)
+        except SearchTimeout:
+            if result:
+                best = result
+            break
+        best = result
+        completed = depth
+        moves.remove(best[0])
+        moves.insert(0, best[0])
+        if abs(best[1]) > MATE_BOUND:
+            break
+    return SearchResult(best[0], best[1], completed, searcher.nodes, time.perf_counter() - start)
@@ -0,0 +1,124 @@
+'''asyncio game server for chess_puzzle
+
+every connection plays one game at a time through chess_puzzle.Game, and the moves of Black are computed
+on an executor so that the event loop never waits for them, e.g.
+    python server.py --port 8765
+    python server.py --unix /tmp/chess_puzzle.sock
+
+line protocol in UTF-8, the server greets with READY, then answers each command of the client:
+    NEW 5|Bb5, Kc5|Kb3, Bc3    starts a game on a board in plain format with lines joined by |
+    c1b2                       plays a move of White in crCR notation
+    BOARD                      sends the board and the state again
+    SAVE                       answers SAVED with the board in plain format with lines joined by |
+    QUIT                       answers BYE and closes the connection
+a board is sent as BOARD n followed by its n lines in Unicode, a move of Black as BLACK c3d4, and
+the state as TURN white or RESULT White wins, RESULT Black wins or RESULT Stalemate;
+errors are answered with ERROR and the reason, e.g. ERROR This is not a valid move.
+'''
+import argparse
+import asyncio
+import concurrent.futures
+import os
+import random
+from chess_puzzle import *
+
+class GameServer:
+    '''serves games over TCP or a Unix socket, computing moves of Black on executor'''
+    def __init__(self, executor: concurrent.futures.Executor, strategy: str = 'greedy'):
+        '''
+        Parameters:
+            executor (Executor): executor running strategy_move, a process pool keeps the event loop responsive
+            strategy (str): key of chess_puzzle.strategies used for the moves of Black
+        '''
+        self.executor = executor
+        self.strategy = strategy
+        self.sessions = 0 # connections currently open
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765, unix: str = None) -> asyncio.AbstractServer:
+        '''starts listening on host and port, or on the Unix socket unix if given'''
+        if unix is not None:
+            return await asyncio.start_unix_server(self.handle, unix)
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        '''runs the session of one connection until QUIT or end of file'''
+        self.sessions += 1
+        game = None
+        send = lambda *lines: writer.write(''.join(line + '\n' for line in lines).encode())
+        try:
+            send('READY')
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors='replace').strip()
+                if command == 'QUIT':
+                    send('BYE')
+                    break
+                if command.startswith('NEW '):
+                    try:
+                        game = Game(parse_board(command[4:].split('|')), self.strategy)
+                    except IOError as error:
+                        send(f'ERROR This is not a valid board: {error}')
+                    else:
+                        send(*self.board_lines(game))
+                        await self.send_state(game, send)
+                elif game is None:
+                    send('ERROR No game, start one with NEW')
+                elif command == 'BOARD':
+                    send(*self.board_lines(game), *self.state_lines(game))
+                elif command == 'SAVE':
+                    send('SAVED ' + '|'.join(board_lines(game.B)))
+                elif game.result is not None:
+                    send(f'ERROR Game over. {game.result}.')
+                elif not game.play_white(command):
+                    send('ERROR This is not a valid move.')
+                else:
+                    send(*self.board_lines(game))
+                    await self.send_state(game, send)
+                await writer.drain()
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    def board_lines(self, game: Game) -> list[str]:
+        '''returns the BOARD reply of the board of game'''
+        lines = conf2unicode(game.B).split('\n')
+        return [f'BOARD {len(lines)}'] + lines
+
+    def state_lines(self, game: Game) -> list[str]:
+        '''returns the RESULT or TURN reply of game'''
+        return [f'RESULT {game.result}'] if game.result is not None else ['TURN white']
+
+    async def send_state(self, game: Game, send) -> None:
+        '''checks the status of the side to move, plays Black if it is to move, and sends the state'''
+        if game.update_status() is None and not game.side:
+            move = await asyncio.get_running_loop().run_in_executor(
+                self.executor, strategy_move, game.B, False, game.strategy)
+            send(f'BLACK {game.play_black(move)}', *self.board_lines(game))
+            game.update_status()
+        send(*self.state_lines(game))
+
+async def serve(host: str, port: int, unix: str, jobs: int, strategy: str) -> None:
+    '''runs the server until it is cancelled'''
+    with concurrent.futures.ProcessPoolExecutor(jobs, initializer=random.seed) as executor:
+        server = await GameServer(executor, strategy).start(host, port, unix)
+        async with server:
+            await server.serve_forever()
+
+def main() -> None:
+    '''parses the command line and runs the server'''
+    parser = argparse.ArgumentParser(description='asyncio game server for chess_puzzle')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', default=None, help='path of a Unix socket to listen on instead of TCP')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='worker processes for the moves of Black')
+    parser.add_argument('--strategy', choices=sorted(strategies), default=black_strategy)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.jobs, args.strategy))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
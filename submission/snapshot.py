@@ -0,0 +1,145 @@
+'''immutable board snapshots with structural sharing for chess_puzzle
+
+a BoardSnapshot keeps its pieces in a tuple of small tuples (chunks); the snapshot after a move
+shares every piece and every chunk that the move does not touch, so a game history or a search path
+costs about one chunk per position instead of a copy of the whole board
+
+snapshots are Board-compatible for reading: size, pieces = snapshot, snapshot[0] and snapshot[1] work,
+so functions which only look at the board (is_check, AttackMap, generate_legal_moves, game_status, conf2unicode)
+accept them; functions which move pieces need the mutable copy given by snapshot.board()
+'''
+from collections.abc import Sequence
+from typing import Union
+from chess_puzzle import *
+
+CHUNK = 16 # pieces per chunk
+
+class PieceView(Sequence):
+    '''read-only sequence of the pieces of a snapshot, in board order'''
+    __slots__ = ('chunks',)
+
+    def __init__(self, chunks: tuple):
+        self.chunks = chunks
+
+    def __len__(self) -> int:
+        return sum(len(chunk) for chunk in self.chunks)
+
+    def __getitem__(self, i: int) -> Piece:
+        if i < 0:
+            i += len(self)
+        for chunk in self.chunks:
+            if i < len(chunk):
+                return chunk[i]
+            i -= len(chunk)
+        raise IndexError('piece index out of range')
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            yield from chunk
+
+class BoardSnapshot:
+    '''immutable board configuration; its pieces are shared with other snapshots and must not be moved'''
+    __slots__ = ('size', 'chunks', 'hash')
+
+    def __init__(self, size: int, chunks: tuple, hash_: int):
+        '''use from_board and move to create snapshots
+
+        Parameters:
+            size (int): size of the board
+            chunks (tuple): tuple of tuples of pieces
+            hash_ (int): Zobrist hash of the pieces
+        '''
+        self.size = size
+        self.chunks = chunks
+        self.hash = hash_
+
+    @classmethod
+    def from_board(cls, B: Board) -> 'BoardSnapshot':
+        '''returns a snapshot of board B, which can go on changing independently
+
+        Parameters:
+            B (Board): board configuration
+        Returns:
+            BoardSnapshot: snapshot holding copies of the pieces of B
+        '''
+        size = B[0]
+        pieces = [type(piece)(piece.pos_x, piece.pos_y, piece.side) for piece in B[1]]
+        chunks = tuple(tuple(pieces[i:i + CHUNK]) for i in range(0, len(pieces), CHUNK))
+        return cls(size, chunks, zobrist_hash((size, pieces)))
+
+    def board(self) -> Board:
+        '''returns a mutable copy of the snapshot
+
+        Returns:
+            Board: board configuration with an IndexedPieceList of new pieces
+        '''
+        return (self.size, IndexedPieceList([type(piece)(piece.pos_x, piece.pos_y, piece.side) for piece in self.pieces],
+                                            size=self.size))
+
+    @property
+    def pieces(self) -> PieceView:
+        '''the pieces of the snapshot'''
+        return PieceView(self.chunks)
+
+    def __len__(self) -> int:
+        return 2
+
+    def __getitem__(self, i: int):
+        '''returns the size for 0 and the pieces for 1, like a Board'''
+        return (self.size, self.pieces)[i]
+
+    def __iter__(self):
+        yield self.size
+        yield self.pieces
+
+    def locate(self, pos_X: int, pos_Y: int) -> Union[tuple[int, int], None]:
+        '''returns (chunk index, index in chunk) of the piece at coordinates pos_X, pos_Y, or None if the square is empty'''
+        for c, chunk in enumerate(self.chunks):
+            for i, piece in enumerate(chunk):
+                if piece.pos_x == pos_X and piece.pos_y == pos_Y:
+                    return (c, i)
+        return None
+
+    def move(self, pos_x: int, pos_y: int, pos_X: int, pos_Y: int) -> 'BoardSnapshot':
+        '''returns the snapshot after the piece at pos_x, pos_y moves to pos_X, pos_Y, capturing what is there
+        assumes this move is valid according to chess rules, the snapshot itself is unchanged
+
+        Parameters:
+            pos_x (int): position x of the piece to move
+            pos_y (int): position y of the piece to move
+            pos_X (int): position x of the destination
+            pos_Y (int): position y of the destination
+        Returns:
+            BoardSnapshot: the new snapshot, sharing all untouched chunks and pieces with this one
+        '''
+        origin = self.locate(pos_x, pos_y)
+        if origin is None:
+            raise ValueError(f'no piece at {index2location(pos_x, pos_y)}')
+        target = self.locate(pos_X, pos_Y)
+        chunks = list(self.chunks)
+        piece = chunks[origin[0]][origin[1]]
+        moved = type(piece)(pos_X, pos_Y, piece.side)
+        hash_ = self.hash ^ piece_hash(self.size, piece) ^ piece_hash(self.size, moved)
+        chunk = list(chunks[origin[0]])
+        chunk[origin[1]] = moved
+        chunks[origin[0]] = tuple(chunk)
+        if target is not None:
+            hash_ ^= piece_hash(self.size, chunks[target[0]][target[1]])
+            chunk = list(chunks[target[0]])
+            del chunk[target[1]]
+            chunks[target[0]] = tuple(chunk)
+        return BoardSnapshot(self.size, tuple(chunk for chunk in chunks if chunk), hash_)
+
+    def __eq__(self, other) -> bool:
+        '''snapshots are equal when they have the same size and the same pieces on the same squares'''
+        if not isinstance(other, BoardSnapshot):
+            return NotImplemented
+        return (self.size == other.size and self.hash == other.hash and
+                {(piece_key(piece), piece.side, piece.pos_x, piece.pos_y) for piece in self.pieces} ==
+                {(piece_key(piece), piece.side, piece.pos_x, piece.pos_y) for piece in other.pieces})
+
+    def __hash__(self) -> int:
+        return self.hash
+
+    def __repr__(self) -> str:
+        return f"BoardSnapshot({' / '.join(board_lines(self))})"
@@ -0,0 +1,509 @@
+'''mate-in-N puzzle solver for chess_puzzle
+
+finds the shortest forced mate for a side within N of its moves, or proves that there is none,
+and solves directories of plain board files from the command line, e.g.
+    python solver.py puzzles/ --depth 3 --side white
+which prints one JSON object per file
+
+for deep puzzles, --method pn runs a depth-first proof-number search (df-pn) instead, which proves
+or disproves a forced mate at any depth by expanding the moves with the fewest replies first, e.g.
+    python solver.py puzzles/ --method pn --max-nodes 1000000
+'''
+import argparse
+import collections
+import json
+import os
+from typing import Union
+from chess_puzzle import *
+from search import SearchTimeout
+from transposition import TranspositionTable
+
+def move_notation(x: int, y: int, pos_X: int, pos_Y: int) -> str:
+    '''returns the move from x,y to pos_X,pos_Y in crCR notation, e.g. a1b2'''
+    return index2location(x, y) + index2location(pos_X, pos_Y)
+
+class MateSolver:
+    '''depth-first mate search for attacker on a board searched in place
+    results are remembered per position in a transposition table as (disproved up to n, proved from n)
+    '''
+    def __init__(self, B: Board, attacker: bool, table: TranspositionTable = None, max_nodes: int = None):
+        '''prepares a search of board B
+
+        Parameters:
+            B (Board): board configuration, searched in place with make_move and unmake_move
+            attacker (bool): side trying to give checkmate
+            table (TranspositionTable): table for the results, a new one if None
+            max_nodes (int): node budget, SearchTimeout is raised when it is exceeded
+        '''
+        self.B = indexed_board(B)
+        self.attacker = attacker
+        self.table = table if table is not None else TranspositionTable(2 ** 22)
+        self.max_nodes = max_nodes
+        self.nodes = 0
+
+    def count_node(self) -> None:
+        '''counts a node and raises SearchTimeout when the budget is used up'''
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchTimeout
+
+    def attacking_moves(self, n: int) -> list:
+        '''returns the legal moves of attacker worth trying for a mate in n, checks first
+        for n == 1 only moves giving check can mate
+        '''
+        B = self.B
+        checks, others = [], []
+        for piece, x, y in generate_legal_moves(self.attacker, B):
+            undo = make_move(piece, x, y, B)
+            try:
+                check = is_check(not self.attacker, B)
+            finally:
+                unmake_move(undo, B)
+            if check:
+                checks.append((piece, x, y))
+            elif n > 1:
+                others.append((piece, x, y))
+        return checks + others
+
+    def attack(self, n: int) -> bool:
+        '''checks if attacker, to move, can force checkmate within n of its moves'''
+        if n <= 0:
+            return False
+        self.count_node()
+        key = position_key(self.B, self.attacker)
+        disproved, proved = self.table.probe(key) or (0, None)
+        if n <= disproved:
+            return False
+        if proved is not None and n >= proved:
+            return True
+        result = False
+        for piece, x, y in self.attacking_moves(n):
+            undo = make_move(piece, x, y, self.B)
+            try:
+                result = self.defend(n - 1)
+            finally:
+                unmake_move(undo, self.B)
+            if result:
+                break
+        disproved, proved = self.table.probe(key) or (0, None)
+        if result:
+            proved = n if proved is None else min(proved, n)
+        else:
+            disproved = max(disproved, n)
+        self.table.store(key, (disproved, proved))
+        return result
+
+    def defend(self, n: int) -> bool:
+        '''checks if attacker forces checkmate within n more of its moves whatever the defender, to move, plays'''
+        self.count_node()
+        defender = not self.attacker
+        attacks = AttackMap(defender, self.B)
+        moves = list(generate_legal_moves(defender, self.B, attacks))
+        if not moves:
+            return bool(attacks.checkers)
+        for piece, x, y in moves:
+            undo = make_move(piece, x, y, self.B)
+            try:
+                result = self.attack(n)
+            finally:
+                unmake_move(undo, self.B)
+            if not result:
+                return False
+        return True
+
+    def shortest(self, max_depth: int) -> Union[int, None]:
+        '''returns the smallest n <= max_depth for which attacker, to move, mates in n, or None'''
+        for n in range(1, max_depth + 1):
+            if self.attack(n):
+                return n
+        return None
+
+    def principal_line(self, n: int) -> list[str]:
+        '''returns the mating line when attacker, to move, mates in exactly n at best
+        the defender replies are chosen to delay the mate as long as possible
+
+        Parameters:
+            n (int): shortest mate of the current position
+        Returns:
+            list[str]: moves in crCR notation, attacker first, ending with the mating move
+        '''
+        B = self.B
+        line = []
+        undos = []
+        try:
+            while True:
+                for piece, x, y in self.attacking_moves(n):
+                    notation = move_notation(piece.pos_x, piece.pos_y, x, y)
+                    undos.append(make_move(piece, x, y, B))
+                    if self.defend(n - 1):
+                        break
+                    unmake_move(undos.pop(), B)
+                line.append(notation)
+                replies = list(generate_legal_moves(not self.attacker, B))
+                if not replies:
+                    return line
+                longest = None
+                for piece, x, y in replies:
+                    notation = move_notation(piece.pos_x, piece.pos_y, x, y)
+                    undo = make_move(piece, x, y, B)
+                    try:
+                        mate_in = self.shortest(n - 1)
+                    finally:
+                        unmake_move(undo, B)
+                    if longest is None or mate_in > longest[0]:
+                        longest = (mate_in, piece, x, y, notation)
+                n, piece, x, y, notation = longest
+                undos.append(make_move(piece, x, y, B))
+                line.append(notation)
+        finally:
+            for undo in reversed(undos):
+                unmake_move(undo, B)
+
+INFINITY = 10 ** 15 # proof or disproof number of a solved position
+
+def can_mate(B: Board, attacker: bool) -> bool:
+    '''checks if the material of B allows any checkmate of the other side by attacker
+    only a bishop gives check, and a lone king can only be mated if the attacker has bishops on both colours,
+    since its orthogonal neighbours, which have the other colour, cannot all be covered by the attacking king
+
+    Parameters:
+        B (Board): board configuration
+        attacker (bool): side trying to give checkmate
+    Returns:
+        bool: False if no sequence of moves can lead to checkmate by attacker, True if one may
+    '''
+    colours = {(piece.pos_x + piece.pos_y) % 2 for piece in B[1] if isinstance(piece, Bishop) and piece.side == attacker}
+    if not colours:
+        return False
+    return len(colours) == 2 or any(isinstance(piece, Bishop) and piece.side != attacker for piece in B[1])
+
+class ProofNumberSolver:
+    '''depth-first proof-number search (df-pn) for a forced mate by attacker on a board searched in place
+
+    every position has a proof number, the least number of positions which must be shown to be mates
+    to prove a forced mate from it, and a disproof number, the least number which must be shown to be
+    escapes to disprove it; they are kept per position_key in table as [proof, disproof, moves to mate, loops]
+    a position repeating the current line is an escape for the defender, as a forced mate never needs to
+    repeat a position; loops is the set of keys of earlier positions on the line which a disproof repeats,
+    such a disproof is kept in loops instead of table and holds whenever all of them are on the line again,
+    since more repeated positions only give the defender more escapes
+
+    draws where the defender can keep repeating positions are disproved by close, which runs each time the
+    number of searched nodes has grown by a quarter and finds the searched positions from which attacker
+    cannot force checkmate even if every position not searched yet were a mate
+    '''
+    def __init__(self, B: Board, attacker: bool, max_nodes: int = None, max_entries: int = 2 ** 20):
+        '''prepares a search of board B
+
+        Parameters:
+            B (Board): board configuration, searched in place with make_move and unmake_move
+            attacker (bool): side trying to give checkmate
+            max_nodes (int): node budget, SearchTimeout is raised when it is exceeded
+            max_entries (int): memory budget in positions of table and loops, SearchTimeout is raised beyond it
+        '''
+        self.B = indexed_board(B)
+        self.attacker = attacker
+        self.max_nodes = max_nodes
+        self.max_entries = max_entries
+        self.table = {}
+        self.loops = {} # key -> entry of a disproof which holds while the keys of its loops are on the line
+        self.graph = {} # key of a searched position -> (True if attacker is to move, its children)
+        self.path = set() # keys of the positions on the current line
+        self.nodes = 0
+        self.next_close = 1024
+
+    def count_node(self) -> None:
+        '''counts a node, raises SearchTimeout when the budget is used up and runs close when it is due'''
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchTimeout
+        if self.nodes >= self.next_close:
+            self.close()
+            self.next_close = self.nodes + self.nodes // 4
+
+    def close(self) -> int:
+        '''disproves every searched position from which attacker cannot force checkmate within the searched graph,
+        counting each position not searched yet as a mate unless it is disproved already;
+        this is exact for positions which repeat each other, so it settles the draws df-pn alone cannot
+
+        Returns:
+            int: number of newly disproved positions
+        '''
+        parents = collections.defaultdict(list)
+        pending = {} # position of the defender -> children not known to be mates
+        queue = []
+        won = set()
+        for key, (attacking, children) in self.graph.items():
+            entry = self.table.get(key)
+            if entry is not None and entry[0] == 0 and key not in won:
+                won.add(key)
+                queue.append(key)
+            if not attacking:
+                pending[key] = len(children)
+            for *_, child in children:
+                parents[child].append(key)
+                if child not in self.graph and child not in won:
+                    entry = self.table.get(child)
+                    if entry is None or entry[1] != 0:
+                        won.add(child)
+                        queue.append(child)
+        while queue:
+            key = queue.pop()
+            for parent in parents[key]:
+                if parent in won:
+                    continue
+                if not self.graph[parent][0]:
+                    pending[parent] -= 1
+                    if pending[parent]:
+                        continue
+                won.add(parent)
+                queue.append(parent)
+        count = 0
+        for key in self.graph:
+            entry = self.table.get(key)
+            if key not in won and (entry is None or entry[1] != 0):
+                self.table[key] = [INFINITY, 0, None, frozenset()]
+                self.loops.pop(key, None)
+                count += 1
+        return count
+
+    def store(self, key: int, entry: list) -> None:
+        '''stores entry for key, in loops if its disproof holds only while its loops are on the line,
+        and raises SearchTimeout when the memory budget is used up
+        '''
+        if entry[3]:
+            self.loops[key] = entry
+        else:
+            self.table[key] = entry
+            self.loops.pop(key, None)
+        if len(self.table) + len(self.loops) > self.max_entries:
+            raise SearchTimeout
+
+    def terminal(self, side: bool) -> list:
+        '''returns the table entry of the current position with side to move if it has no legal move'''
+        if side != self.attacker and is_check(side, self.B):
+            return [0, INFINITY, 0, frozenset()]
+        return [INFINITY, 0, None, frozenset()]
+
+    def lookup(self, key: int) -> list:
+        '''returns the entry of the position key on the current line'''
+        if key in self.path:
+            return [INFINITY, 0, None, frozenset([key])]
+        entry = self.loops.get(key)
+        if entry is not None and entry[3] <= self.path:
+            return entry
+        return self.table.get(key, [1, 1, None, frozenset()])
+
+    def children(self, side: bool) -> list:
+        '''returns (x, y, X, Y, key) for the legal moves of side from x,y to X,Y, checks first if side is attacker
+        moves are kept by their squares, as the same position may be reached with pieces of one kind swapped
+        a position not in the table yet is stored with the number of its moves as the disproof number
+        if it is the turn of attacker and as the proof number otherwise,
+        so that the moves leaving the defender fewest replies are tried first
+        '''
+        B = self.B
+        moves = []
+        for piece, x, y in list(generate_legal_moves(side, B)):
+            undo = make_move(piece, x, y, B)
+            try:
+                key = position_key(B, not side)
+                if key not in self.table and key not in self.path:
+                    count = sum(1 for _ in generate_legal_moves(not side, B))
+                    if not can_mate(B, self.attacker):
+                        self.store(key, [INFINITY, 0, None, frozenset()])
+                    elif count == 0:
+                        self.store(key, self.terminal(not side))
+                    else:
+                        self.store(key, [1, count, None, frozenset()] if (not side) == self.attacker
+                                   else [count, 1, None, frozenset()])
+                check = side == self.attacker and is_check(not side, B)
+            finally:
+                unmake_move(undo, B)
+            moves.append((not check, piece.pos_x, piece.pos_y, x, y, key))
+        moves.sort(key=lambda move: move[0])
+        return [move[1:] for move in moves]
+
+    def search(self, side: bool, max_phi: int, max_delta: int) -> list:
+        '''expands the current position with side to move until its numbers reach the thresholds
+
+        the thresholds are in the view of side: phi is the proof number if side is attacker and the disproof
+        number otherwise, delta the other one
+
+        Parameters:
+            side (bool): side to move
+            max_phi (int): threshold of phi
+            max_delta (int): threshold of delta
+        Returns:
+            list: the entry of the position
+        '''
+        self.count_node()
+        B = self.B
+        key = position_key(B, side)
+        attacking = side == self.attacker
+        if key in self.graph:
+            children = self.graph[key][1]
+        else:
+            children = self.children(side)
+            if not children:
+                entry = self.terminal(side)
+                self.store(key, entry)
+                return entry
+            self.graph[key] = (attacking, children)
+        self.path.add(key)
+        try:
+            while True:
+                entries = [self.lookup(child_key) for *_, child_key in children]
+                # phi of a position is the least delta of its children, delta the sum of their phi
+                views = [(entry[1], entry[0]) if attacking else (entry[0], entry[1]) for entry in entries]
+                phi = min(delta for _, delta in views)
+                delta = sum(child_phi for child_phi, _ in views)
+                if delta >= INFINITY:
+                    # sums over transpositions and cycles can grow without bound, only solved children give INFINITY
+                    delta = INFINITY if max(child_phi for child_phi, _ in views) >= INFINITY else INFINITY - 1
+                if phi >= max_phi or delta >= max_delta:
+                    break
+                best = min(range(len(views)), key=lambda i: views[i][1])
+                second = min((views[i][1] for i in range(len(views)) if i != best), default=INFINITY)
+                pos_x, pos_y, x, y, child_key = children[best]
+                undo = make_move(piece_at(pos_x, pos_y, B), x, y, B)
+                try:
+                    # the 1 + 1/4 margin over the second best child keeps the search from switching too often
+                    self.search(not side, min(INFINITY, max_delta - delta + views[best][0]),
+                                min(max_phi, second + 1 + second // 4))
+                finally:
+                    unmake_move(undo, B)
+        finally:
+            self.path.discard(key)
+        proof, disproof = (phi, delta) if attacking else (delta, phi)
+        moves_to_mate = None
+        loops = frozenset()
+        if proof == 0:
+            mates = [entry[2] for entry in entries if entry[0] == 0]
+            moves_to_mate = min(mates) + 1 if attacking else max(mates)
+        elif disproof == 0:
+            # every move of attacker must be disproved, one escape of the defender is enough
+            escapes = [entry[3] for entry in entries if entry[1] == 0]
+            loops = frozenset().union(*escapes) if attacking else min(escapes, key=len)
+            loops = loops - {key}
+        entry = [proof, disproof, moves_to_mate, loops]
+        self.store(key, entry)
+        return entry
+
+    def principal_line(self) -> list[str]:
+        '''returns the proven mating line from the current position with attacker to move,
+        the attacker choosing the quickest proven mate and the defender the slowest
+
+        Returns:
+            list[str]: moves in crCR notation, attacker first, ending with the mating move
+        '''
+        B = self.B
+        line = []
+        undos = []
+        side = self.attacker
+        try:
+            while True:
+                proven = [(self.lookup(key)[2], pos_x, pos_y, x, y) for pos_x, pos_y, x, y, key in self.children(side)
+                          if self.lookup(key)[0] == 0]
+                if not proven:
+                    return line
+                moves_to_mate, pos_x, pos_y, x, y = min(proven, key=lambda move: move[0]) if side == self.attacker \
+                    else max(proven, key=lambda move: move[0])
+                line.append(move_notation(pos_x, pos_y, x, y))
+                undos.append(make_move(piece_at(pos_x, pos_y, B), x, y, B))
+                side = not side
+        finally:
+            for undo in reversed(undos):
+                unmake_move(undo, B)
+
+    def solve(self) -> Union[list[str], None]:
+        '''proves or disproves a forced mate by attacker, to move
+
+        Returns:
+            Union[list[str], None]: principal mating line, None if attacker cannot force checkmate
+        '''
+        if not can_mate(self.B, self.attacker):
+            return None
+        proof = self.search(self.attacker, INFINITY, INFINITY)[0]
+        return self.principal_line() if proof == 0 else None
+
+def prove_mate(B: Board, side: bool, max_nodes: int = None, max_entries: int = 2 ** 20) -> Union[list[str], None]:
+    '''returns a forced mate line for side, to move on board B, at any depth, found by proof-number search
+    raises SearchTimeout if max_nodes or max_entries is exceeded before the answer is known
+    raises ValueError if the other side is in check, so that its king could be captured
+
+    Parameters:
+        B (Board): board configuration, unchanged on return
+        side (bool): True if white and False if black
+        max_nodes (int): node budget or None for no limit
+        max_entries (int): number of positions the search may remember
+    Returns:
+        Union[list[str], None]: moves in crCR notation of both sides ending with checkmate,
+        or None if side cannot force checkmate
+    '''
+    if is_check(not side, B):
+        raise ValueError('the side not to move is in check')
+    return ProofNumberSolver(B, side, max_nodes, max_entries).solve()
+
+def solve_mate(B: Board, side: bool, max_depth: int, max_nodes: int = None) -> Union[list[str], None]:
+    '''returns the shortest forced mate line for side, to move on board B, within max_depth moves of side
+    raises SearchTimeout if max_nodes is exceeded before the answer is known
+    raises ValueError if the other side is in check, so that its king could be captured
+
+    Parameters:
+        B (Board): board configuration, unchanged on return
+        side (bool): True if white and False if black
+        max_depth (int): maximum number of moves of side
+        max_nodes (int): node budget or None for no limit
+    Returns:
+        Union[list[str], None]: moves in crCR notation of both sides ending with checkmate,
+        or None if side cannot force checkmate within max_depth moves
+    '''
+    if is_check(not side, B):
+        raise ValueError('the side not to move is in check')
+    solver = MateSolver(B, side, max_nodes=max_nodes)
+    n = solver.shortest(max_depth)
+    if n is None:
+        return None
+    return solver.principal_line(n)
+
+def solve_file(filename: str, side: bool, max_depth: int, max_nodes: int = None, method: str = 'depth') -> dict:
+    '''solves the puzzle in a plain board file and returns the result as a JSON compatible dict
+    method 'depth' finds the shortest mate within max_depth with solve_mate, 'pn' any mate with prove_mate
+    '''
+    result = {'file': filename, 'side': 'white' if side else 'black'}
+    try:
+        B = load_board(filename)
+    except IOError as error:
+        result['error'] = str(error)
+        return result
+    try:
+        line = solve_mate(B, side, max_depth, max_nodes) if method == 'depth' else prove_mate(B, side, max_nodes)
+    except SearchTimeout:
+        result['status'] = 'unknown'
+        return result
+    except ValueError as error:
+        result['error'] = str(error)
+        return result
+    result['status'] = 'mate' if line is not None else 'no mate'
+    result['mate_in'] = (len(line) + 1) // 2 if line is not None else None
+    result['line'] = line
+    return result
+
+def main() -> None:
+    '''solves every board file of the directories or files given on the command line'''
+    parser = argparse.ArgumentParser(description='mate-in-N solver for plain board files')
+    parser.add_argument('paths', nargs='+', help='board files or directories of board files')
+    parser.add_argument('--depth', type=int, default=3, help='maximum number of moves of the mating side')
+    parser.add_argument('--side', choices=['white', 'black'], default='white', help='side to move and mate')
+    parser.add_argument('--max-nodes', type=int, default=None, help='node budget per puzzle')
+    parser.add_argument('--method', choices=['depth', 'pn'], default='depth',
+                        help='shortest mate within --depth, or any mate by proof-number search')
+    args = parser.parse_args()
+    for path in args.paths:
+        filenames = sorted(os.path.join(path, name) for name in os.listdir(path)) if os.path.isdir(path) else [path]
+        for filename in filenames:
+            print(json.dumps(solve_file(filename, args.side == 'white', args.depth, args.max_nodes, args.method)),
+                  flush=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+'''symmetries of bishop and king positions
+
+with only kings and bishops every position on a square board is equivalent to its images under the
+8 symmetries of the square, and to the position with the colours of all pieces and the side to move swapped;
+canonicalize picks one representative of these 16 positions and the Transform which maps the position to it,
+so that caches and tables can store equivalent positions once
+'''
+from typing import NamedTuple
+from chess_puzzle import *
+
+# the 8 symmetries of a board of size, each mapping coordinates x,y to their image
+symmetries = [lambda x, y, size: (x, y),                       # identity
+              lambda x, y, size: (y, size + 1 - x),            # rotation by 90 degrees
+              lambda x, y, size: (size + 1 - x, size + 1 - y), # rotation by 180 degrees
+              lambda x, y, size: (size + 1 - y, x),            # rotation by 270 degrees
+              lambda x, y, size: (size + 1 - x, y),            # reflection in the vertical axis
+              lambda x, y, size: (x, size + 1 - y),            # reflection in the horizontal axis
+              lambda x, y, size: (y, x),                       # reflection in the diagonal a1-z26
+              lambda x, y, size: (size + 1 - y, size + 1 - x)  # reflection in the other diagonal
+              ]
+inverses = [0, 3, 2, 1, 4, 5, 6, 7] # index of the symmetry undoing each symmetry
+
+class Transform(NamedTuple):
+    '''a symmetry of the board, optionally followed by swapping the colours of the pieces and the side to move'''
+    symmetry: int
+    swap: bool
+
+    def square(self, x: int, y: int, size: int) -> tuple[int, int]:
+        '''returns the image of coordinates x,y on a board of size'''
+        return symmetries[self.symmetry](x, y, size)
+
+    def inverse(self) -> 'Transform':
+        '''returns the transform undoing this one'''
+        return Transform(inverses[self.symmetry], self.swap)
+
+    def move(self, move: tuple[int, int, int, int], size: int) -> tuple[int, int, int, int]:
+        '''returns the image of a move from x,y to X,Y as (x, y, X, Y)'''
+        return (*self.square(move[0], move[1], size), *self.square(move[2], move[3], size))
+
+transforms = [Transform(symmetry, swap) for swap in (False, True) for symmetry in range(8)]
+
+def image(B: Board, side_to_move: bool, transform: Transform) -> tuple:
+    '''returns the image of B with side_to_move under transform as a sortable tuple
+    (side to move, sorted (side, piece letter, x, y) of every piece)
+    '''
+    return (side_to_move != transform.swap,
+            tuple(sorted((piece.side != transform.swap, piece_key(piece), *transform.square(piece.pos_x, piece.pos_y, B[0]))
+                         for piece in B[1])))
+
+def transform_board(B: Board, side_to_move: bool, transform: Transform) -> tuple[Board, bool]:
+    '''returns the image of B with side_to_move under transform
+
+    Parameters:
+        B (Board): board configuration
+        side_to_move (bool): True if white and False if black
+        transform (Transform): the transform to apply
+    Returns:
+        tuple[Board, bool]: new board with an IndexedPieceList and its side to move
+    '''
+    side, pieces = image(B, side_to_move, transform)
+    return (B[0], IndexedPieceList([piece_map[kind](x, y, piece_side) for piece_side, kind, x, y in pieces], B[0])), side
+
+def canonicalize(B: Board, side_to_move: bool) -> tuple[Board, bool, Transform]:
+    '''returns the canonical representative of B with side_to_move among its 16 equivalent positions
+
+    Parameters:
+        B (Board): board configuration
+        side_to_move (bool): True if white and False if black
+    Returns:
+        tuple[Board, bool, Transform]: the representative, its side to move and the transform from B to it;
+        moves of the representative map back to B with transform.inverse().move
+    '''
+    transform = min(transforms, key=lambda transform: image(B, side_to_move, transform))
+    return (*transform_board(B, side_to_move, transform), transform)
+
+def canonical_position_key(B: Board, side_to_move: bool) -> int:
+    '''returns position_key of the canonical representative of B, the same for all equivalent positions,
+    to key a TranspositionTable
+    '''
+    canonical, side, _ = canonicalize(B, side_to_move)
+    return position_key(canonical, side)
@@ -0,0 +1,496 @@
+'''retrograde endgame tablebases for chess_puzzle
+
+a table holds the exact result of every position of one material, such as KB-K (White king and bishop
+against the Black king) or KB-KB, on one board size, for either side to move:
+    0 for a draw, dtm + 1 for a position decided in dtm plies (odd dtm: the side to move mates,
+    even dtm: the side to move is mated, 0 meaning it is checkmated now), and the largest value for
+    positions that cannot occur because the side not to move is in check
+
+positions are indexed by the squares of the pieces, White king, White bishops, Black king, Black bishops,
+    index = ((sq_0 * S^2 + sq_1) * S^2 + ...) * 2 + (1 if Black is to move else 0)
+with sq = (y - 1) * S + (x - 1)
+
+generation scans all positions on a process pool, then propagates results backwards from the checkmates
+by distance, using un-moves within the material and sub-tables for captures; the result depends only
+on size and material, so files can be cached, e.g.
+    python tablebase.py KB-K KBB-K KB-KB --size 5 --directory tablebases
+the file is a header followed by the values, and is memory-mapped when loaded
+'''
+import argparse
+import array
+import collections
+import concurrent.futures
+import functools
+import mmap
+import os
+import struct
+import sys
+from typing import Union
+from chess_puzzle import *
+from bitboard import bishop_attacks, king_attacks, squares_of
+
+MAGIC = b'CPTB'
+VERSION = 1
+HEADER = struct.Struct('<4sBBBx16sQ') # magic, version, size, bytes per value, material, number of positions
+MAX_SIZE = 8
+
+OPEN, ILLEGAL, MATED, STALEMATE = 0, 1, 2, 3 # kinds of positions found by the scan
+DRAWABLE = 4 # flag of an open position with a capture into a drawn sub-table
+
+directory = os.environ.get('CHESS_PUZZLE_TABLEBASES', 'tablebases') # where tablebase_move looks for tables
+
+def parse_material(material: str) -> tuple[str, str]:
+    '''splits a material such as 'KBB-K' into the pieces of White and Black
+    raises ValueError if a side does not have exactly one king followed by bishops
+    '''
+    sides = material.split('-')
+    if len(sides) != 2 or any(not side.startswith('K') or side[1:].strip('B') for side in sides):
+        raise ValueError(f'invalid material {material!r}, expected e.g. KB-K')
+    return sides[0], sides[1]
+
+def board_material(B: Board) -> str:
+    '''returns the material of board B, e.g. 'KB-K\''''
+    counts = {True: 0, False: 0}
+    for piece in B[1]:
+        if isinstance(piece, Bishop):
+            counts[piece.side] += 1
+    return 'K' + 'B' * counts[True] + '-K' + 'B' * counts[False]
+
+def filename_of(size: int, material: str, path: str = None) -> str:
+    '''returns the file name of the table of material on board size in directory path'''
+    return os.path.join(directory if path is None else path, f'{material}_{size}.cptb')
+
+class Layout:
+    '''order of the pieces of a material and the index of its positions on one board size'''
+    def __init__(self, size: int, material: str):
+        white, black = parse_material(material)
+        self.size = size
+        self.material = material
+        self.pieces = [(kind, True) for kind in white] + [(kind, False) for kind in black]
+        self.kings = {True: 0, False: len(white)}
+        self.n = size * size
+        self.count = self.n ** len(self.pieces) * 2
+
+    def index(self, squares, side: bool) -> int:
+        '''returns the index of the position with the pieces on squares and side to move'''
+        i = 0
+        for sq in squares:
+            i = i * self.n + sq
+        return i * 2 + (not side)
+
+    def position(self, index: int) -> tuple[list[int], bool]:
+        '''returns the squares of the pieces and the side to move of index'''
+        side = not index & 1
+        index >>= 1
+        squares = []
+        for _ in self.pieces:
+            index, sq = divmod(index, self.n)
+            squares.append(sq)
+        squares.reverse()
+        return squares, side
+
+    def without(self, k: int) -> 'Layout':
+        '''returns the layout of the material after piece k is captured'''
+        white, black = parse_material(self.material)
+        if k < len(white):
+            white = white[:-1]
+        else:
+            black = black[:-1]
+        return layout_of(self.size, f'{white}-{black}')
+
+@functools.lru_cache(maxsize=None)
+def layout_of(size: int, material: str) -> Layout:
+    '''returns the shared Layout of material on board size'''
+    return Layout(size, material)
+
+def king_attacked(layout: Layout, squares, side: bool, occupied: int) -> bool:
+    '''checks if the king of side is attacked on squares, like is_check, captured pieces have square None'''
+    king = squares[layout.kings[side]]
+    for k, (kind, owner) in enumerate(layout.pieces):
+        if owner != side and squares[k] is not None:
+            if kind == 'K':
+                if king_attacks(layout.size, squares[k]) >> king & 1:
+                    return True
+            elif bishop_attacks(layout.size, squares[k], occupied) >> king & 1:
+                return True
+    return False
+
+def occupancy_mask(squares) -> int:
+    '''returns the mask of the occupied squares, or -1 if two pieces share a square'''
+    occupied = 0
+    for sq in squares:
+        if occupied >> sq & 1:
+            return -1
+        occupied |= 1 << sq
+    return occupied
+
+def legal_moves(layout: Layout, squares, side: bool, occupied: int) -> list[tuple[int, int, Union[int, None]]]:
+    '''returns (piece index, target square, captured piece index or None) for every legal move of side'''
+    own = 0
+    for sq, (_, owner) in zip(squares, layout.pieces):
+        if owner == side:
+            own |= 1 << sq
+    moves = []
+    for j, (kind, owner) in enumerate(layout.pieces):
+        if owner != side:
+            continue
+        sq = squares[j]
+        if kind == 'K':
+            targets = king_attacks(layout.size, sq) & ~own
+        else:
+            targets = bishop_attacks(layout.size, sq, occupied) & ~own
+        for target in squares_of(targets):
+            captured = squares.index(target) if occupied >> target & 1 else None
+            after = list(squares)
+            after[j] = target
+            if captured is not None:
+                after[captured] = None
+            if not king_attacked(layout, after, side, occupied & ~(1 << sq) | 1 << target):
+                moves.append((j, target, captured))
+    return moves
+
+def sub_value(tables: dict, layout: Layout, squares: list, k: int, j: int, target: int, side: bool) -> int:
+    '''returns the value of the position after piece j captures piece k on target, from the sub-table'''
+    sub = layout.without(k)
+    if 'B' not in sub.material:
+        return 0 # two bare kings cannot mate
+    after = list(squares)
+    after[j] = target
+    del after[k]
+    return tables[sub.material][sub.index(after, not side)]
+
+def scan(layout: Layout, tables: dict, start: int, stop: int) -> tuple[bytes, bytes, bytes, bytes]:
+    '''classifies positions start to stop - 1 by looking at their moves
+
+    Parameters:
+        layout (Layout): layout of the table
+        tables (dict): values of the sub-tables by material
+        start (int): first index
+        stop (int): index after the last one
+    Returns:
+        tuple of bytes: kinds (OPEN, ILLEGAL, MATED, STALEMATE, with the DRAWABLE flag),
+        number of non-capture moves, shortest win through a capture and longest loss through a capture
+        as arrays of unsigned 8, 8, 16 and 16 bit ints
+    '''
+    kinds = array.array('B')
+    remaining = array.array('B')
+    wins = array.array('H')
+    losses = array.array('H')
+    for index in range(start, stop):
+        squares, side = layout.position(index)
+        occupied = occupancy_mask(squares)
+        kind, quiet, win, loss = ILLEGAL, 0, 0, 0
+        if occupied >= 0 and not king_attacked(layout, squares, not side, occupied):
+            moves = legal_moves(layout, squares, side, occupied)
+            if not moves:
+                kind = MATED if king_attacked(layout, squares, side, occupied) else STALEMATE
+            else:
+                kind = OPEN
+                for j, target, captured in moves:
+                    if captured is None:
+                        quiet += 1
+                        continue
+                    value = sub_value(tables, layout, squares, captured, j, target, side)
+                    if value == 0:
+                        kind |= DRAWABLE
+                    elif (value - 1) % 2 == 0: # the opponent is mated in value - 1 plies
+                        win = value if not win else min(win, value)
+                    else:
+                        loss = max(loss, value)
+        kinds.append(kind)
+        remaining.append(quiet)
+        wins.append(win)
+        losses.append(loss)
+    return kinds.tobytes(), remaining.tobytes(), wins.tobytes(), losses.tobytes()
+
+def predecessors(layout: Layout, index: int):
+    '''yields the indexes of the positions from which a non-capture move leads to index'''
+    squares, side = layout.position(index)
+    mover = not side
+    occupied = occupancy_mask(squares)
+    for j, (kind, owner) in enumerate(layout.pieces):
+        if owner != mover:
+            continue
+        sq = squares[j]
+        if kind == 'K':
+            origins = king_attacks(layout.size, sq) & ~occupied
+        else:
+            origins = bishop_attacks(layout.size, sq, occupied) & ~occupied
+        for origin in squares_of(origins):
+            before = list(squares)
+            before[j] = origin
+            yield layout.index(before, mover)
+
+_worker_tables = {}
+
+def _init_worker(tables: dict) -> None:
+    '''keeps the sub-tables in each worker process'''
+    _worker_tables.update(tables)
+
+def _scan_chunk(size: int, material: str, start: int, stop: int):
+    '''scans one range of positions in a worker process'''
+    return scan(layout_of(size, material), _worker_tables, start, stop)
+
+class Tablebase:
+    '''values of all positions of one material on one board size'''
+    def __init__(self, size: int, material: str, values, mapped: tuple = None):
+        '''
+        Parameters:
+            size (int): size of the board
+            material (str): material such as 'KB-K'
+            values: sequence of ints indexed like Layout
+            mapped (tuple): (file, mmap) the values are a view of, closed by close
+        '''
+        self.size = size
+        self.material = material
+        self.layout = layout_of(size, material)
+        self.values = values
+        self.illegal = 0xFF if getattr(values, 'itemsize', 2) == 1 else 0xFFFF
+        self.mapped = mapped
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, index: int) -> int:
+        return self.values[index]
+
+    def board_index(self, B: Board, side: bool) -> int:
+        '''returns the index of board B with side to move, B must have the material of the table'''
+        squares = [None] * len(self.layout.pieces)
+        slots = {True: [], False: []}
+        for k, (kind, owner) in enumerate(self.layout.pieces):
+            slots[owner].append(k)
+        used = {True: 1, False: 1}
+        for piece in B[1]:
+            sq = (piece.pos_y - 1) * self.size + (piece.pos_x - 1)
+            if isinstance(piece, King):
+                squares[self.layout.kings[piece.side]] = sq
+            else:
+                squares[slots[piece.side][used[piece.side]]] = sq
+                used[piece.side] += 1
+        return self.layout.index(squares, side)
+
+    def probe(self, B: Board, side: bool) -> Union[tuple[int, Union[int, None]], None]:
+        '''returns the result of board B with side to move
+
+        Parameters:
+            B (Board): board configuration with the material and size of the table
+            side (bool): side to move
+        Returns:
+            Union[tuple[int, Union[int, None]], None]: (1, dtm) if side mates in dtm plies, (-1, dtm) if it is mated
+            in dtm plies, (0, None) for a draw, None if the side not to move is in check
+        '''
+        value = self.values[self.board_index(B, side)]
+        if value == self.illegal:
+            return None
+        if value == 0:
+            return (0, None)
+        return (1 if (value - 1) % 2 else -1, value - 1)
+
+    def save(self, filename: str) -> None:
+        '''writes the table into filename, using one byte per value if the distances allow it'''
+        itemsize = 1 if max((value for value in self.values if value != self.illegal), default=0) < 0xFF else 2
+        values = array.array('B' if itemsize == 1 else 'H',
+                             ((0xFF if itemsize == 1 else 0xFFFF) if value == self.illegal else value for value in self.values))
+        if sys.byteorder != 'little':
+            values.byteswap()
+        with open(filename, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.size, itemsize, self.material.encode(), len(values)))
+            file.write(values.tobytes())
+
+    @classmethod
+    def load(cls, filename: str) -> 'Tablebase':
+        '''maps the table stored in filename
+        raises IOError exception if the file is not a table
+        '''
+        file = open(filename, 'rb')
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, size, itemsize, material, count = HEADER.unpack_from(data)
+        except (ValueError, struct.error):
+            file.close()
+            raise IOError('not a tablebase file')
+        if magic != MAGIC or version != VERSION or itemsize not in (1, 2) or len(data) != HEADER.size + itemsize * count:
+            data.close()
+            file.close()
+            raise IOError('not a tablebase file')
+        view = memoryview(data)[HEADER.size:]
+        if itemsize == 2 and sys.byteorder != 'little':
+            values = array.array('H', view.tobytes())
+            values.byteswap()
+        else:
+            values = view.cast('B' if itemsize == 1 else 'H')
+        return cls(size, material.rstrip(b'\0').decode(), values, (file, data, view, values))
+
+    def close(self) -> None:
+        '''releases the memory map of a loaded table'''
+        if self.mapped is not None:
+            file, data, view, values = self.mapped
+            self.values = None
+            if isinstance(values, memoryview):
+                values.release()
+            view.release()
+            data.close()
+            file.close()
+            self.mapped = None
+
+def generate(size: int, material: str, jobs: int = None, path: str = None, tables: dict = None) -> Tablebase:
+    '''generates the table of material on board size, and first the tables of the materials left by captures
+
+    Parameters:
+        size (int): size of the board, at most MAX_SIZE
+        material (str): material such as 'KB-K'
+        jobs (int): number of worker processes for the scan, all cores if None, no pool if 1
+        path (str): directory where tables are loaded from if present and saved to if generated, None to keep them in memory
+        tables (dict): tables already known by (size, material), shared between the recursive calls
+    Returns:
+        Tablebase: the table
+    '''
+    if size < 1 or size > MAX_SIZE:
+        raise ValueError(f'size {size} outside 1..{MAX_SIZE}')
+    parse_material(material)
+    tables = {} if tables is None else tables
+    if (size, material) in tables:
+        return tables[(size, material)]
+    if path is not None and os.path.isfile(filename_of(size, material, path)):
+        tables[(size, material)] = Tablebase.load(filename_of(size, material, path))
+        return tables[(size, material)]
+    layout = layout_of(size, material)
+    for k, (kind, _) in enumerate(layout.pieces):
+        sub = layout.without(k) if kind == 'B' else None
+        if sub is not None and 'B' in sub.material:
+            generate(size, sub.material, jobs, path, tables)
+    values = retrograde(layout, {name: table.values for (n, name), table in tables.items() if n == size}, jobs)
+    table = Tablebase(size, material, values)
+    if path is not None:
+        os.makedirs(path, exist_ok=True)
+        table.save(filename_of(size, material, path))
+        table = Tablebase.load(filename_of(size, material, path))
+    tables[(size, material)] = table
+    return table
+
+def retrograde(layout: Layout, tables: dict, jobs: int = None) -> array.array:
+    '''computes the values of all positions of layout
+
+    Parameters:
+        layout (Layout): layout of the table
+        tables (dict): values of the sub-tables by material
+        jobs (int): number of worker processes for the scan, all cores if None, no pool if 1
+    Returns:
+        array.array: unsigned 16 bit values, see the module documentation
+    '''
+    jobs = jobs or os.cpu_count() or 1
+    step = max(1, -(-layout.count // (8 * jobs)))
+    ranges = [(start, min(start + step, layout.count)) for start in range(0, layout.count, step)]
+    if jobs == 1:
+        parts = [scan(layout, tables, start, stop) for start, stop in ranges]
+    else:
+        plain = {name: array.array('H', values) for name, values in tables.items()} # memory maps cannot be pickled
+        func = functools.partial(_scan_chunk, layout.size, layout.material)
+        with concurrent.futures.ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(plain,)) as executor:
+            parts = list(executor.map(func, *zip(*ranges)))
+    kinds, remaining, wins, losses = bytearray(), array.array('B'), array.array('H'), array.array('H')
+    for part in parts:
+        kinds += part[0]
+        remaining.frombytes(part[1])
+        wins.frombytes(part[2])
+        losses.frombytes(part[3])
+    values = array.array('H', bytes(2 * layout.count))
+    buckets = collections.defaultdict(list) # dtm + 1 -> indexes to resolve at that distance
+    for index in range(layout.count):
+        kind = kinds[index]
+        if kind == ILLEGAL:
+            values[index] = 0xFFFF
+        elif kind == MATED:
+            buckets[1].append(index)
+        elif kind & ~DRAWABLE == OPEN:
+            if wins[index]:
+                buckets[wins[index] + 1].append(index)
+            elif not remaining[index] and not kind & DRAWABLE:
+                buckets[losses[index] + 1].append(index)
+    while buckets:
+        value = min(buckets)
+        for index in buckets.pop(value):
+            if values[index]:
+                continue
+            values[index] = value
+            for before in predecessors(layout, index):
+                if values[before] or kinds[before] & ~DRAWABLE != OPEN:
+                    continue
+                if (value - 1) % 2 == 0: # index is lost for its side to move, so before is won
+                    buckets[value + 1].append(before)
+                else:
+                    remaining[before] -= 1
+                    losses[before] = max(losses[before], value)
+                    if not remaining[before] and not wins[before] and not kinds[before] & DRAWABLE:
+                        buckets[losses[before] + 1].append(before)
+    return values
+
+loaded = {} # loaded tables by (size, material), None if there is no file
+
+def open_table(size: int, material: str) -> Union[Tablebase, None]:
+    '''returns the table of material on board size from directory, loaded once, or None if there is no file'''
+    if (size, material) not in loaded:
+        filename = filename_of(size, material)
+        loaded[(size, material)] = Tablebase.load(filename) if os.path.isfile(filename) else None
+    return loaded[(size, material)]
+
+def move_value(B: Board, side: bool, piece: Piece, x: int, y: int, table: Tablebase) -> Union[int, None]:
+    '''returns the value, for the opponent to move, of the position after piece moves to x, y
+    None if the table of the material after a capture is missing
+    '''
+    undo = make_move(piece, x, y, B)
+    try:
+        material = board_material(B)
+        if material == table.material:
+            return table[table.board_index(B, not side)]
+        if 'B' not in material:
+            return 0
+        sub = open_table(B[0], material)
+        return None if sub is None else sub[sub.board_index(B, not side)]
+    finally:
+        unmake_move(undo, B)
+
+def tablebase_move(side: bool, B: Board) -> tuple[Piece, int, int]:
+    '''returns a move of side with perfect play from the tables in directory, or greedy_move if there is no table
+    a won position is won in the fewest plies, a lost one lost in the most and a drawn one kept drawn
+
+    Parameters:
+        side (bool): True if white and False if black
+        B (Board): board configuration
+    Returns:
+        tuple[Piece, int, int]: a piece of side with a move to coordinates x and y, None if side cannot move
+    '''
+    table = open_table(B[0], board_material(B)) if B[0] <= MAX_SIZE else None
+    moves = list(generate_legal_moves(side, B))
+    if table is None or not moves:
+        return greedy_move(side, B)
+    def rank(move):
+        value = move_value(B, side, *move, table)
+        if value is None:
+            return (1, 0) # unknown, preferred to a loss only
+        if value == 0:
+            return (2, 0)
+        if (value - 1) % 2 == 0:
+            return (3, -value) # the opponent is mated, sooner is better
+        return (0, value) # the opponent mates, later is better
+    return max(moves, key=rank)
+
+def main() -> None:
+    '''generates the tables given on the command line'''
+    parser = argparse.ArgumentParser(description='retrograde tablebase generator for chess_puzzle')
+    parser.add_argument('materials', nargs='+', help='materials such as KB-K, KBB-K or KB-KB')
+    parser.add_argument('--size', type=int, default=5, help=f'board size, at most {MAX_SIZE}')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes, all cores by default')
+    parser.add_argument('--directory', default=directory, help='directory of the table files')
+    args = parser.parse_args()
+    known = {}
+    for material in args.materials:
+        table = generate(args.size, material, args.jobs, args.directory, known)
+        values = [value for value in table.values if value != table.illegal]
+        wins = sum(1 for value in values if value and (value - 1) % 2)
+        print(f'{material} {args.size}x{args.size}: {len(values)} positions, {wins} won for the side to move, '
+              f'longest mate {max(values, default=1) - 1} plies, {filename_of(args.size, material, args.directory)}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import json
+import pytest
+from chess_puzzle import *
+from batch import *
+
+files = ["submission/test_files/board_b2.txt", "submission/test_files/board_checkmate.txt",
+         "submission/test_files/board_stalemate.txt", "submission/test_files/invalid_file_2kings.txt",
+         "submission/board_examp.txt"]
+
+def test_iter_paths():
+    paths = list(iter_paths(["submission/test_files", "submission/board_*.txt"]))
+    assert paths[:3] == files[:3]
+    assert paths[-1] == "submission/board_examp.txt"
+    assert len(paths) == 8
+
+@pytest.mark.parametrize("filename, valid, black_checkmate, black_stalemate", [
+    ("submission/test_files/board_b2.txt", True, False, False),
+    ("submission/test_files/board_checkmate.txt", True, True, False),
+    ("submission/test_files/board_stalemate.txt", True, False, True),
+    ("submission/test_files/invalid_file_size.txt", False, None, None)
+    ]
+)
+def test_analyse_file(filename, valid, black_checkmate, black_stalemate):
+    result = analyse_file(filename)
+    assert result['file'] == filename and result['valid'] == valid
+    if not valid:
+        assert result['error']
+        return
+    assert result['black']['checkmate'] == black_checkmate
+    assert result['black']['stalemate'] == black_stalemate
+    assert (result['black_move'] is None) == (black_checkmate or black_stalemate)
+
+def test_analyse_paths_binary(tmp_path):
+    binary = tmp_path / "binary.txt"
+    binary.write_bytes(b"\xff\xfe5\n")
+    results = list(analyse_paths([str(binary)] + files[:1], 2, 1))
+    assert results[0]['file'] == str(binary) and not results[0]['valid']
+    assert results[0]['error'].startswith('not a text file')
+    assert results[1] == analyse_file(files[0])
+
+def test_analyse_file_reproducible():
+    assert analyse_file("submission/board_examp.txt") == analyse_file("submission/board_examp.txt")
+
+def test_chunks():
+    assert list(chunks(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+@pytest.mark.parametrize("jobs, chunk_size", [(1, 64), (2, 1), (3, 2)])
+def test_analyse_paths_order(jobs, chunk_size):
+    results = list(analyse_paths(files, jobs, chunk_size))
+    assert [result['file'] for result in results] == files
+    assert results == [analyse_file(filename) for filename in files]
+
+def test_main(tmp_path):
+    output = tmp_path / "results.jsonl"
+    main(files + ["--jobs", "2", "--output", str(output)])
+    lines = output.read_text().splitlines()
+    assert [json.loads(line)['file'] for line in lines] == files
@@ -0,0 +1,49 @@
+import pytest
+from chess_puzzle import *
+from binformat import *
+
+filenames = ["submission/board_examp.txt", "submission/test_files/board_b2.txt",
+             "submission/test_files/board_checkmate.txt", "submission/test_files/board_stalemate.txt"]
+
+@pytest.mark.parametrize("filename", filenames)
+def test_encode_decode(filename):
+    B = read_board(filename)
+    record = encode_board(B)
+    assert len(record) == 3 + 2 * len(B[1]) == record_length(record)
+    decoded = decode_board(record)
+    assert isinstance(decoded[1], IndexedPieceList)
+    assert board_lines(decoded) == board_lines(B)
+    assert zobrist_hash(decoded) == zobrist_hash(B)
+
+@pytest.mark.parametrize("record", [b"", b"\x05\x02\x00\x00\x00", b"\x05\x01\x00\x0e\x00", b"\x05\x01\x00\x91\x01"])
+def test_decode_invalid(record):
+    with pytest.raises(IOError):
+        decode_board(record)
+
+def test_encode_too_large():
+    with pytest.raises(ValueError):
+        encode_board((65, [King(1, 1, True), King(3, 3, False)]))
+
+def test_archive(tmp_path):
+    boards = [read_board(filename) for filename in filenames]
+    path = tmp_path / "boards.bin"
+    assert write_archive(path, iter(boards)) == 4
+    with BoardArchive(path) as archive:
+        assert len(archive) == 4
+        assert board_lines(archive[2]) == board_lines(boards[2])
+        assert board_lines(archive[-1]) == board_lines(boards[-1])
+        assert [board_lines(B) for B in archive] == [board_lines(B) for B in boards]
+        with pytest.raises(IndexError):
+            archive[4]
+
+def test_archive_empty(tmp_path):
+    path = tmp_path / "boards.bin"
+    assert write_archive(path, []) == 0
+    with BoardArchive(path) as archive:
+        assert list(archive) == []
+
+def test_archive_invalid(tmp_path):
+    path = tmp_path / "boards.bin"
+    path.write_bytes(b"5\nKa1\nKc3\n")
+    with pytest.raises(IOError):
+        BoardArchive(path)
@@ -0,0 +1,91 @@
+import pytest
+import warnings
+import subprocess
+import os
+import sys
+import chess_puzzle
+from chess_puzzle import *
+from bitboard import *
+
+boards = ["submission/board_examp.txt",
+          "submission/test_files/board_b2.txt",
+          "submission/test_files/board_checkmate.txt",
+          "submission/test_files/board_stalemate.txt"]
+
+@pytest.mark.parametrize("size, sq, occupied, expected_result", [
+    (3, 4, 0, {0, 2, 6, 8}),
+    (3, 0, 0, {4, 8}),
+    (3, 0, 1 << 4, {4}),
+    (5, 12, (1 << 18) | (1 << 6), {18, 6, 16, 20, 8, 4}),
+    (5, 0, 1 << 24, {6, 12, 18, 24})
+    ]
+)
+def test_bishop_attacks(size, sq, occupied, expected_result):
+    assert set(squares_of(bishop_attacks(size, sq, occupied))) == expected_result
+
+@pytest.mark.parametrize("filename", boards)
+def test_bitboard_is_check(filename):
+    B = read_board(filename)
+    bb = to_bitboard(B)
+    for side in (True, False):
+        assert bb.is_check(side) == is_check(side, B)
+
+@pytest.mark.parametrize("filename", boards)
+def test_bitboard_can_reach(filename):
+    B = read_board(filename)
+    bb = to_bitboard(B)
+    for piece in B[1]:
+        for x in range(1, B[0] + 1):
+            for y in range(1, B[0] + 1):
+                assert bb.can_reach(piece_key(piece), piece.side, piece.pos_x, piece.pos_y, x, y) == piece.can_reach(x, y, B)
+
+@pytest.mark.parametrize("filename", boards)
+def test_bitboard_legal_moves(filename):
+    B = read_board(filename)
+    bb = to_bitboard(B)
+    for side in (True, False):
+        expected = sorted((piece.pos_x, piece.pos_y, x, y) for piece in B[1] if piece.side == side
+                          for x in range(1, B[0] + 1) for y in range(1, B[0] + 1) if piece.can_move_to(x, y, B))
+        assert sorted(bb.legal_moves(side)) == expected
+
+@pytest.mark.parametrize("name", ['bitboard', 'compare'])
+def test_backend_flag(name, monkeypatch):
+    monkeypatch.setattr(chess_puzzle, 'backend', name)
+    B = read_board("submission/test_files/board_checkmate.txt")
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', BackendMismatchWarning)
+        assert is_check(False, B) == True
+        assert is_checkmate(False, B) == True
+        assert piece_at(4, 5, B).can_reach(3, 5, B) == True
+        assert game_status(B, False) == GameStatus(True, True, False)
+
+@pytest.mark.parametrize("filename", boards)
+def test_backend_legal_moves(filename, monkeypatch):
+    B = read_board(filename)
+    for side in (True, False):
+        expected = sorted((piece.pos_x, piece.pos_y, x, y) for piece, x, y in generate_legal_moves(side, B))
+        monkeypatch.setattr(chess_puzzle, 'backend', 'bitboard')
+        moves = list(generate_legal_moves(side, B))
+        monkeypatch.setattr(chess_puzzle, 'backend', 'object')
+        assert all(piece_at(piece.pos_x, piece.pos_y, B) is piece for piece, x, y in moves)
+        assert sorted((piece.pos_x, piece.pos_y, x, y) for piece, x, y in moves) == expected
+
+def test_compare_legal_moves(monkeypatch):
+    B = read_board("submission/board_examp.txt")
+    monkeypatch.setattr(chess_puzzle, 'backend', 'compare')
+    legal_moves = BitBoard.legal_moves
+    monkeypatch.setattr(BitBoard, 'legal_moves', lambda self, side: list(legal_moves(self, side))[1:])
+    with pytest.warns(BackendMismatchWarning, match='generate_legal_moves'):
+        moves = list(generate_legal_moves(True, B))
+    monkeypatch.setattr(chess_puzzle, 'backend', 'object')
+    assert len(moves) == len(list(generate_legal_moves(True, B)))
+
+def test_set_backend_invalid():
+    with pytest.raises(ValueError):
+        set_backend('numpy')
+
+def test_backend_environment_invalid():
+    env = dict(os.environ, CHESS_PUZZLE_BACKEND='bitbord')
+    result = subprocess.run([sys.executable, '-c', 'import chess_puzzle'], cwd='submission', env=env,
+                            capture_output=True, text=True)
+    assert result.returncode != 0 and 'unknown backend' in result.stderr
@@ -7,7 +7,11 @@ from chess_puzzle import *
         ("a1", (1,1)),
         ("z26", (26,26)),
         ("e7", (5,7)),
-        ("e2",(5,2))
+        ("e2",(5,2)),
+        ("aa1", (27,1)),
+        ("az100", (52,100)),
+        ("ba3", (53,3)),
+        ("all1000", (1000,1000))
     ]
 )
 def test_location2index(input_str, expected_result):
@@ -19,7 +23,11 @@ def test_location2index(input_str, expected_result):
         ((1,1), "a1"),
         ((26,26), "z26"),
         ((5,7), "e7"),
-        ((5,2), "e2")
+        ((5,2), "e2"),
+        ((27,1), "aa1"),
+        ((52,100), "az100"),
+        ((702,5), "zz5"),
+        ((703,5), "aaa5")
     ]
 )
 def test_index2location(input_ords, expected_result):
@@ -242,3 +250,240 @@ def test_move_to(piece, move, board, board2, size, expected_result):
             if piece.pos_x == piece1.pos_x and piece.pos_y == piece1.pos_y and piece.side == piece1.side and type(piece) == type(piece1):
                 found = True
         assert found == expected_result
+
+@pytest.mark.parametrize("input_ord, expected_result", [
+    ((2,5), True),
+    ((3,3), True),
+    ((2,2), False),
+    ((5,5), False),
+    ((1,1), False)
+    ]
+)
+def test_is_piece_at_indexed(input_ord, expected_result):
+    B = read_board("submission/board_examp.txt")
+    assert isinstance(B[1], IndexedPieceList)
+    assert is_piece_at(input_ord[0], input_ord[1], B) == expected_result
+    if expected_result:
+        piece = piece_at(input_ord[0], input_ord[1], B)
+        assert (piece.pos_x, piece.pos_y) == input_ord
+
+@pytest.mark.parametrize("start, end, captured", [
+    ((4,4), (3,3), True),
+    ((4,4), (5,5), False),
+    ((3,5), (4,5), False),
+    ((2,3), (3,4), False),
+    ((5,3), (4,4), True)
+    ]
+)
+def test_move_to_indexed(start, end, captured):
+    B = read_board("submission/board_examp.txt")
+    count = len(B[1])
+    before = list(B[1])
+    piece = piece_at(start[0], start[1], B)
+    B = piece.move_to(end[0], end[1], B)
+    assert piece_at(end[0], end[1], B) is piece
+    assert not is_piece_at(start[0], start[1], B)
+    assert len(B[1]) == count - captured
+    assert B[1].squares == {(p.pos_x, p.pos_y): p for p in B[1]}
+    assert [p for p in before if p in B[1].slots] == list(B[1])
+
+def test_indexed_stacked_square():
+    first, second = Bishop(2, 2, True), King(2, 2, False)
+    pieces = IndexedPieceList([first, second, King(5, 5, True)], size=5)
+    assert pieces.stacked and pieces.squares[(2, 2)] is first
+    pieces.relocate(first, 3, 3)
+    assert pieces.squares[(2, 2)] is second and pieces.squares[(3, 3)] is first
+    assert not read_board("submission/board_examp.txt")[1].stacked
+
+@pytest.mark.parametrize("filename, start, end, captured", [
+    ("submission/board_examp.txt", (4,4), (3,3), True),
+    ("submission/board_examp.txt", (4,4), (5,5), False),
+    ("submission/board_examp.txt", (2,3), (3,4), False),
+    ("submission/test_files/board_stalemate.txt", (4,4), (1,1), False),
+    ("submission/test_files/board_b2.txt", (26,26), (25,25), True)
+    ]
+)
+def test_make_unmake_move(filename, start, end, captured):
+    B = read_board(filename)
+    before = [(type(p), p.pos_x, p.pos_y, p.side) for p in B[1]]
+    piece = piece_at(start[0], start[1], B)
+    undo = make_move(piece, end[0], end[1], B)
+    assert piece_at(end[0], end[1], B) is piece
+    assert len(B[1]) == len(before) - captured
+    assert (undo[3] is not None) == captured
+    assert B[1].slots == {p: i for i, p in enumerate(B[1])}
+    unmake_move(undo, B)
+    assert [(type(p), p.pos_x, p.pos_y, p.side) for p in B[1]] == before
+    assert B[1].squares == {(p.pos_x, p.pos_y): p for p in B[1]}
+    assert B[1].slots == {p: i for i, p in enumerate(B[1])}
+
+@pytest.mark.parametrize("filename", [
+    "submission/board_examp.txt",
+    "submission/test_files/board_checkmate.txt",
+    "submission/test_files/board_stalemate.txt"
+    ]
+)
+def test_can_move_to_leaves_board(filename):
+    B = read_board(filename)
+    before = [(p, p.pos_x, p.pos_y) for p in B[1]]
+    for piece in list(B[1]):
+        for x in range(1, B[0] + 1):
+            for y in range(1, B[0] + 1):
+                piece.can_move_to(x, y, B)
+    assert [(p, p.pos_x, p.pos_y) for p in B[1]] == before
+
+@pytest.mark.parametrize("filename, side, count", [
+    ("submission/board_examp.txt", True, 10),
+    ("submission/board_examp.txt", False, 12),
+    ("submission/test_files/board_checkmate.txt", False, 0),
+    ("submission/test_files/board_stalemate.txt", False, 0),
+    ("submission/test_files/board_stalemate.txt", True, 20),
+    ("submission/test_files/board_b2.txt", False, 72),
+    ("submission/test_files/board_b2.txt", True, 27)
+    ]
+)
+def test_generate_legal_moves(filename, side, count):
+    B = read_board(filename)
+    moves = [(piece, x, y) for piece, x, y in generate_legal_moves(side, B)]
+    expected = [(piece, x, y) for piece in B[1] if piece.side == side
+                for x in range(1, B[0] + 1) for y in range(1, B[0] + 1) if piece.can_move_to(x, y, B)]
+    assert len(moves) == count
+    assert sorted(moves, key=lambda m: (m[0].pos_x, m[0].pos_y, m[1], m[2])) == \
+        sorted(expected, key=lambda m: (m[0].pos_x, m[0].pos_y, m[1], m[2]))
+
+@pytest.mark.parametrize("filename", [
+    "submission/board_examp.txt",
+    "submission/test_files/board_b2.txt"
+    ]
+)
+def test_find_black_move(filename):
+    B = read_board(filename)
+    piece, x, y = find_black_move(B)
+    assert piece.side == False
+    assert piece.can_move_to(x, y, B)
+
+@pytest.mark.parametrize("size, square, rays, neighbours", [
+    (3, (2,2), (((3,3),), ((3,1),), ((1,3),), ((1,1),)), ((3,2), (1,2), (2,3), (2,1), (3,3), (1,1), (3,1), (1,3))),
+    (3, (1,1), (((2,2), (3,3)), (), (), ()), ((2,1), (1,2), (2,2))),
+    (5, (5,3), ((), (), ((4,4), (3,5)), ((4,2), (3,1))), ((4,3), (5,4), (5,2), (4,2), (4,4))),
+    (26, (26,26), ((), (), (), tuple((i,i) for i in range(25, 0, -1))), ((25,26), (26,25), (25,25))),
+    (4, (2,1), (((3,2), (4,3)), (), ((1,2),), ()), ((3,1), (1,1), (2,2), (3,2), (1,2)))
+    ]
+)
+def test_board_tables(size, square, rays, neighbours):
+    assert board_tables(size)[0][square] == rays
+    assert board_tables(size)[1][square] == neighbours
+    assert board_tables(size) is board_tables(size)
+
+def test_sparse_board_tables():
+    size = sparse_size + 36
+    rays, neighbours = board_tables(size)
+    for square in [(1,1), (50,3), (size,size), (size,1)]:
+        for ray, (dx, dy) in zip(rays[square], bishop_directions):
+            assert isinstance(ray, Ray)
+            expected = tuple((square[0] + i * dx, square[1] + i * dy) for i in range(1, size)
+                             if 1 <= square[0] + i * dx <= size and 1 <= square[1] + i * dy <= size)
+            assert tuple(ray) == expected and len(ray) == len(expected)
+            assert ray[:3] == expected[:3] and ray[-1:] == expected[-1:]
+    assert neighbours[(size,size)] == ((size-1,size), (size,size-1), (size-1,size-1))
+    with pytest.raises(KeyError):
+        rays[(size+1,1)]
+
+def test_large_board():
+    B = parse_board(['1000', 'Kall998, Ba1, Ba2', 'Kall1000'], max_size=None)
+    assert board_lines(B) == ['1000', 'Kall998, Ba1, Ba2', 'Kall1000']
+    assert is_check(False, B) and is_checkmate(False, B) and not is_stalemate(False, B)
+    assert game_status(B, True) == GameStatus(False, False, False)
+    assert len(list(generate_legal_moves(True, B))) == 5 + 998 + 998
+    assert parse_move('aaa1all1000') == ((703,1), (1000,1000))
+    with pytest.raises(IOError, match='size 1000 outside 1..26'):
+        parse_board(['1000', 'Kall998, Ba1, Ba2', 'Kall1000'])
+
+@pytest.mark.parametrize("size, n_pieces", [(4, 5), (8, 10), (12, 30), (26, 60)])
+def test_check_map(size, n_pieces):
+    from bench_chess_puzzle import random_board
+    for seed in range(10):
+        B = random_board(size, n_pieces, seed)
+        for side in (True, False):
+            if is_check(not side, B): # the opponent cannot be in check with side to move
+                continue
+            checks = CheckMap(side, B)
+            for piece, x, y in list(generate_legal_moves(side, B)):
+                undo = make_move(piece, x, y, B)
+                expected = is_check(not side, B)
+                unmake_move(undo, B)
+                assert checks.gives_check(piece, x, y) == expected
+
+@pytest.mark.parametrize("pieces, checkers, pinned, move, expected_result", [
+    ([King(1,1,True), Bishop(2,2,True), Bishop(4,4,False), King(5,1,False)], 0, 1, ((2,2), (3,1)), False),
+    ([King(1,1,True), Bishop(2,2,True), Bishop(4,4,False), King(5,1,False)], 0, 1, ((2,2), (4,4)), True),
+    ([King(1,1,True), Bishop(3,3,False), King(5,5,False), Bishop(3,2,True)], 1, 0, ((3,2), (2,1)), False),
+    ([King(1,1,True), Bishop(3,3,False), King(5,5,False), Bishop(1,3,True)], 1, 0, ((1,3), (2,2)), True),
+    ([King(1,1,True), King(2,2,False), Bishop(3,3,False)], 1, 0, ((1,1), (2,2)), False),
+    ([King(3,3,True), Bishop(1,1,False), Bishop(5,1,False), King(5,5,False), Bishop(1,2,True)], 2, 0, ((1,2), (2,1)), False),
+    ([King(2,2,True), Bishop(1,1,False), King(5,5,False)], 1, 0, ((2,2), (3,3)), False),
+    ([King(2,2,True), Bishop(1,1,False), King(5,5,False)], 1, 0, ((2,2), (1,1)), True)
+    ]
+)
+def test_attack_map(pieces, checkers, pinned, move, expected_result):
+    B = (5, pieces)
+    attacks = AttackMap(True, B)
+    assert len(attacks.checkers) == checkers
+    assert len(attacks.pins) == pinned
+    piece = piece_at(move[0][0], move[0][1], B)
+    assert attacks.allows(piece, move[1][0], move[1][1]) == expected_result
+    assert piece.can_move_to(move[1][0], move[1][1], B) == expected_result
+
+@pytest.mark.parametrize("filename, side, expected_result", [
+    ("submission/board_examp.txt", True, (False, False, False)),
+    ("submission/board_examp.txt", False, (False, False, False)),
+    ("submission/test_files/board_checkmate.txt", False, (True, True, False)),
+    ("submission/test_files/board_checkmate.txt", True, (False, False, False)),
+    ("submission/test_files/board_stalemate.txt", False, (False, False, True)),
+    ("submission/test_files/board_b2.txt", True, (False, False, False))
+    ]
+)
+def test_game_status(filename, side, expected_result):
+    B = read_board(filename)
+    status = game_status(B, side)
+    assert status == expected_result
+    assert status == (is_check(side, B), is_checkmate(side, B), is_stalemate(side, B))
+
+def test_save_boards_iter_boards(tmp_path):
+    filenames = ["submission/board_examp.txt", "submission/test_files/board_b2.txt",
+                 "submission/test_files/board_checkmate.txt"]
+    boards = [read_board(filename) for filename in filenames]
+    path = tmp_path / "boards.txt"
+    assert save_boards(path, iter(boards)) == 3
+    loaded = list(iter_boards(path))
+    assert [board_lines(B) for B in loaded] == [board_lines(B) for B in boards]
+    assert all(isinstance(B[1], IndexedPieceList) for B in loaded)
+
+def test_iter_boards_single_file():
+    assert [board_lines(B) for B in iter_boards("submission/board_examp.txt")] == [board_lines(read_board("submission/board_examp.txt"))]
+
+def test_iter_boards_errors(tmp_path):
+    path = tmp_path / "boards.txt"
+    path.write_text("5\nKe1\nKe5\n\n\n5\nKe1, Ke2\nKe5\n\n5\nKa1\nKa5\nBb2\n\n3\nKa1\nKc3\n")
+    with pytest.raises(BoardRecordError) as info:
+        list(iter_boards(path))
+    assert (info.value.record, info.value.line, info.value.offset) == (1, 6, 12)
+    results = list(iter_boards(path, errors='yield'))
+    assert [isinstance(result, BoardRecordError) for result in results] == [False, True, True, False]
+    assert (results[2].record, results[2].line) == (2, 10)
+    assert results[2].reason == 'unexpected text after the Black pieces'
+    assert [B[0] for B in iter_boards(path, errors='skip')] == [5, 3]
+
+@pytest.mark.parametrize("move, expected", [("c1b2", True), ("c1c2", False), ("b3b4", False), ("zz", False), ("c1z9", False)])
+def test_game_play_white(move, expected):
+    game = Game(read_board("submission/board_examp.txt"))
+    assert game.update_status() is None
+    assert game.play_white(move) == expected
+    assert game.side == (not expected)
+
+def test_game_play_black():
+    game = Game(read_board("submission/board_examp.txt"))
+    game.play_white("c1b2")
+    notation = game.play_black((2, 3, 2, 2))
+    assert notation == "b3b2" and game.side
+    assert piece_at(2, 2, game.B).side is False
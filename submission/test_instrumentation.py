@@ -0,0 +1,61 @@
+import json
+import pytest
+import chess_puzzle
+from chess_puzzle import *
+from instrumentation import Profiler
+
+@pytest.fixture
+def profiling():
+    profiler = enable_profiling()
+    profiler.reset()
+    yield profiler
+    disable_profiling()
+    profiler.reset()
+
+def test_enable_disable():
+    original = chess_puzzle.is_check, Bishop.can_reach
+    enable_profiling()
+    assert chess_puzzle.is_check is not original[0] and Bishop.can_reach is not original[1]
+    disable_profiling()
+    assert (chess_puzzle.is_check, Bishop.can_reach) == original
+    assert chess_puzzle.profiler.record_ply not in ply_hooks
+
+def test_counters(profiling):
+    B = read_board("submission/board_examp.txt")
+    chess_puzzle.is_checkmate(False, B)
+    moves = list(chess_puzzle.generate_legal_moves(True, B))
+    counters = {function['name']: function for function in profiling.report()['functions']}
+    assert counters['parse_board']['calls'] == 1
+    assert counters['is_checkmate']['calls'] == 1
+    assert counters['generate_legal_moves']['calls'] >= 1
+    assert counters['AttackMap.__init__']['calls'] >= 1
+    assert len(moves) == 10
+
+def test_recursion_counted_once():
+    profiler = Profiler()
+    class Counter:
+        @staticmethod
+        def fib(n):
+            return n if n < 2 else Counter.fib(n - 1) + Counter.fib(n - 2)
+    profiler.wrap(Counter, 'fib')
+    assert Counter.fib(10) == 55
+    calls, seconds, active = profiler.counters['Counter.fib']
+    assert calls == 177 and active == 0 and seconds > 0
+    profiler.unwrap_all()
+    assert not hasattr(Counter.fib, '__wrapped__')
+
+def test_run_play_plies(profiling, monkeypatch, tmp_path):
+    answers = iter(["c1b2", "QUIT", str(tmp_path / "saved.txt")])
+    monkeypatch.setattr('builtins.input', lambda prompt: next(answers))
+    run_play(read_board("submission/board_examp.txt"))
+    plies = profiling.report()['plies']
+    assert [ply['side'] for ply in plies] == ['white', 'black', 'white']
+    assert all(ply['seconds'] >= 0 for ply in plies)
+
+def test_dump(profiling, tmp_path):
+    is_check(True, read_board("submission/board_examp.txt"))
+    profiling.dump(str(tmp_path / "report.json"))
+    profiling.dump(str(tmp_path / "report.txt"))
+    report = json.loads((tmp_path / "report.json").read_text())
+    assert report['functions'][0]['calls'] >= 1
+    assert (tmp_path / "report.txt").read_text().startswith('function')
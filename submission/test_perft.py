@@ -0,0 +1,25 @@
+import pytest
+from chess_puzzle import *
+from perft import *
+
+@pytest.mark.parametrize("position", reference_positions, ids=[position.name for position in reference_positions])
+def test_reference_positions(position):
+    B = parse_board(position.lines)
+    before = board_lines(B)
+    for depth, count in enumerate(position.counts, 1):
+        assert perft(B, position.side, depth) == count
+    assert board_lines(B) == before
+    assert B[1].hash == zobrist_hash(B)
+
+@pytest.mark.parametrize("position", reference_positions[:2], ids=[position.name for position in reference_positions[:2]])
+def test_divide(position):
+    counts = divide(parse_board(position.lines), position.side, 3)
+    assert len(counts) == position.counts[0]
+    assert sum(counts.values()) == position.counts[2]
+
+def test_run_position():
+    result = run_position(reference_positions[1], 2)
+    assert result['nodes'] == result['expected'] == 100 and result['ok']
+
+def test_perft_depth_0():
+    assert perft(read_board("submission/board_examp.txt"), True, 0) == 1
@@ -0,0 +1,84 @@
+import concurrent.futures
+import pickle
+import sqlite3
+import pytest
+from chess_puzzle import *
+from poscache import *
+from batch import analyse_file, analyse_paths
+
+def test_canonical_key():
+    B = read_board("submission/board_examp.txt")
+    shuffled = (B[0], list(reversed(B[1])))
+    assert canonical_key(B, True) == canonical_key(shuffled, True) == '5/Bb5,Bc1,Bd4,Kc5/Bc3,Be3,Kb3/w'
+    assert canonical_key(B, False).endswith('/b')
+
+@pytest.mark.parametrize("filename", ["submission/board_examp.txt", "submission/test_files/board_checkmate.txt",
+                                      "submission/test_files/board_stalemate.txt"])
+def test_status_persists(tmp_path, filename):
+    B = read_board(filename)
+    path = str(tmp_path / "cache.sqlite")
+    cache = PositionCache(path)
+    expected = [game_status(B, side) for side in (True, False)]
+    assert [cache.status(B, side) for side in (True, False)] == expected
+    cache.close()
+    cache = PositionCache(path)
+    assert [cache.status(B, side) for side in (True, False)] == expected
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 0
+
+def test_move_persists(tmp_path):
+    B = read_board("submission/board_examp.txt")
+    cache = PositionCache(str(tmp_path / "cache.sqlite"))
+    move = cache.move(B, False)
+    (x, y), (X, Y) = parse_move(move)
+    assert piece_at(x, y, B).side == False and piece_at(x, y, B).can_move_to(X, Y, B)
+    assert all(cache.move(B, False) == move for _ in range(5))
+    checkmate = read_board("submission/test_files/board_checkmate.txt")
+    assert cache.move(checkmate, False) is None and cache.move(checkmate, False) is None
+
+def test_eviction(tmp_path):
+    cache = PositionCache(str(tmp_path / "cache.sqlite"), max_entries=16)
+    for i in range(40):
+        cache.put(f'key{i}', 'status', '000')
+    assert len(cache) <= 16
+    assert cache.get('key39', 'status') == '000' and cache.get('key0', 'status') is None
+    cache.clear()
+    assert len(cache) == 0
+
+def test_hits_batched(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    used = lambda: dict(sqlite3.connect(path).execute('SELECT key, used FROM positions'))
+    cache = PositionCache(path, max_entries=32)
+    for i in range(32):
+        cache.put(f'key{i}', 'status', '000')
+    before = used()
+    assert cache.get('key0', 'status') == '000'
+    assert used() == before
+    cache.put('key32', 'status', '000')
+    cache.put('key33', 'status', '000')
+    assert sorted(used()) == sorted(f'key{i}' for i in range(34) if i not in (1, 2))
+    assert cache.get('key3', 'status') == '000'
+    pending = cache.used[('key3', 'status')]
+    cache.close()
+    assert used()['key3'] == pending
+
+def store_statuses(args):
+    path, filename = args
+    cache = open_cache(path)
+    B = read_board(filename)
+    return [tuple(cache.status(B, side)) for side in (True, False)]
+
+def test_shared_between_processes(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    files = ["submission/board_examp.txt", "submission/test_files/board_b2.txt"] * 4
+    with concurrent.futures.ProcessPoolExecutor(2) as executor:
+        results = list(executor.map(store_statuses, [(path, filename) for filename in files]))
+    assert results == [store_statuses((path, filename)) for filename in files]
+    assert len(PositionCache(path)) == 4
+    assert pickle.loads(pickle.dumps(open_cache(path))).filename == path
+
+def test_batch_with_cache(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    first = analyse_file("submission/board_examp.txt", cache=path)
+    assert analyse_file("submission/board_examp.txt", cache=path) == first
+    assert first['white'] == analyse_file("submission/board_examp.txt")['white']
+    assert len(list(analyse_paths(["submission/test_files"], jobs=2, cache=path))) == 7
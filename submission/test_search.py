@@ -0,0 +1,58 @@
+import pytest
+from chess_puzzle import *
+from search import *
+
+def swap_sides(B):
+    return (B[0], [type(piece)(piece.pos_x, piece.pos_y, not piece.side) for piece in B[1]])
+
+@pytest.mark.parametrize("filename, side, swap, mate_plies", [
+    ("submission/test_files/board_stalemate.txt", True, False, 3),
+    ("submission/test_files/board_stalemate.txt", False, True, 3),
+    ("submission/test_files/board_checkmate.txt", False, False, 0),
+    ("submission/test_files/board_checkmate.txt", True, True, 0)
+    ]
+)
+def test_best_move_mate(filename, side, swap, mate_plies):
+    B = read_board(filename)
+    if swap:
+        B = swap_sides(B)
+    result = best_move(B, side, max_depth=4, max_time=None)
+    if mate_plies == 0:
+        assert result.move is None
+    else:
+        assert result.score == MATE - mate_plies
+        piece, x, y = result.move
+        assert piece.side == side and piece.can_move_to(x, y, B)
+
+@pytest.mark.parametrize("filename, side, max_nodes", [
+    ("submission/board_examp.txt", False, 1),
+    ("submission/board_examp.txt", False, 50),
+    ("submission/board_examp.txt", True, 500),
+    ("submission/test_files/board_b2.txt", False, 200),
+    ("submission/test_files/board_b2.txt", True, 1000)
+    ]
+)
+def test_best_move_budget(filename, side, max_nodes):
+    B = read_board(filename)
+    before = [(piece, piece.pos_x, piece.pos_y) for piece in B[1]]
+    result = best_move(B, side, max_nodes=max_nodes, max_time=None)
+    assert [(piece, piece.pos_x, piece.pos_y) for piece in B[1]] == before
+    assert result.nodes <= max_nodes + 1
+    piece, x, y = result.move
+    assert piece in B[1] and piece.side == side and piece.can_move_to(x, y, B)
+
+@pytest.mark.parametrize("pieces, side, expected_result", [
+    ([King(1,1,True), King(5,5,False)], True, 0),
+    ([King(1,1,True), Bishop(3,1,True), King(5,5,False)], True, BISHOP_VALUE + MOBILITY_VALUE * 4),
+    ([King(1,1,True), Bishop(3,1,True), King(5,5,False)], False, -BISHOP_VALUE - MOBILITY_VALUE * 4),
+    ([King(1,1,True), Bishop(3,3,False), King(5,5,False)], True, -BISHOP_VALUE - MOBILITY_VALUE * 7),
+    ([King(3,3,True), King(5,5,False)], True, MOBILITY_VALUE * 5)
+    ]
+)
+def test_evaluate(pieces, side, expected_result):
+    assert evaluate(side, (5, pieces)) == expected_result
+
+def test_find_black_move_search():
+    B = swap_sides(read_board("submission/test_files/board_stalemate.txt"))
+    piece, x, y = find_black_move(B, 'search')
+    assert piece.side == False and piece.can_move_to(x, y, B)
@@ -0,0 +1,63 @@
+import asyncio
+import concurrent.futures
+from chess_puzzle import *
+from server import GameServer
+
+examp = "5|Bb5, Kc5, Bd4, Bc1|Kb3, Bc3, Be3"
+
+async def read_reply(reader):
+    '''reads replies up to and including the next TURN, RESULT, ERROR, SAVED or BYE line'''
+    lines = []
+    while True:
+        line = (await reader.readline()).decode().rstrip('\n')
+        lines.append(line)
+        if line.startswith('BOARD '):
+            for _ in range(int(line.split()[1])):
+                lines.append((await reader.readline()).decode().rstrip('\n'))
+        elif line.split(' ')[0] in ('TURN', 'RESULT', 'ERROR', 'SAVED', 'BYE'):
+            return lines
+
+async def session(port, commands):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    assert (await reader.readline()) == b'READY\n'
+    replies = []
+    for command in commands:
+        writer.write((command + '\n').encode())
+        await writer.drain()
+        replies.append(await read_reply(reader))
+    writer.close()
+    return replies
+
+def run_server(executor, sessions):
+    async def scenario():
+        server = await GameServer(executor).start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await asyncio.gather(*(session(port, commands) for commands in sessions))
+    return asyncio.run(scenario())
+
+def test_game():
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        [replies] = run_server(executor, [["c1b2", "NEW " + examp, "c1b2", "a1a1", "SAVE", "QUIT"]])
+    assert replies[0] == ['ERROR No game, start one with NEW']
+    assert replies[1][0] == 'BOARD 5' and replies[1][-1] == 'TURN white'
+    assert replies[2][0] == 'BOARD 5' and replies[2][6].startswith('BLACK ') and replies[2][-1] == 'TURN white'
+    assert replies[3] == ['ERROR This is not a valid move.']
+    assert replies[4][0].startswith('SAVED 5|') and 'Bb2' not in replies[4][0].split('|')[2]
+    assert replies[5] == ['BYE']
+
+def test_results():
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        replies = run_server(executor, [["NEW 5|Kd5, Ba5, Bb4, Bc3, Bd2, Be1, Bb5, Bc4, Bd3, Be2|Kb1", "c3d4"],
+                                        ["NEW 5|Kd2, Bc1, Bc2, Bd4|Ka2"], ["NEW 5|Ka1|Ka1"]])
+    assert replies[0][0][-1] == 'RESULT White wins'
+    assert replies[0][1] == ['ERROR Game over. White wins.']
+    assert replies[1][0][-1] == 'TURN white'
+    assert replies[2][0][0].startswith('ERROR This is not a valid board')
+
+def test_concurrent_games_on_process_pool():
+    with concurrent.futures.ProcessPoolExecutor(2) as executor:
+        all_replies = run_server(executor, [["NEW " + examp, "c1b2", "BOARD"]] * 20)
+    for replies in all_replies:
+        assert replies[1][6].startswith('BLACK ')
+        assert replies[2][:6] == replies[1][7:13]
@@ -0,0 +1,63 @@
+import pytest
+from chess_puzzle import *
+from snapshot import *
+
+def test_slots():
+    piece = Bishop(1, 2, True)
+    assert not hasattr(piece, '__dict__')
+    with pytest.raises(AttributeError):
+        piece.colour = 'white'
+
+def test_from_board_and_board():
+    B = read_board("submission/test_files/board_b2.txt")
+    snapshot = BoardSnapshot.from_board(B)
+    size, pieces = snapshot
+    assert size == 26 and len(pieces) == len(B[1]) == len(snapshot[1])
+    assert board_lines(snapshot) == board_lines(B)
+    assert snapshot.hash == zobrist_hash(B)
+    copy = snapshot.board()
+    assert isinstance(copy[1], IndexedPieceList) and board_lines(copy) == board_lines(B)
+    assert all(a is not b for a, b in zip(copy[1], snapshot.pieces))
+
+@pytest.mark.parametrize("filename", ["submission/board_examp.txt", "submission/test_files/board_checkmate.txt",
+                                      "submission/test_files/board_stalemate.txt"])
+def test_read_only_functions(filename):
+    B = read_board(filename)
+    snapshot = BoardSnapshot.from_board(B)
+    for side in (True, False):
+        assert is_check(side, snapshot) == is_check(side, B)
+        assert game_status(snapshot, side) == game_status(B, side)
+        assert len(list(generate_legal_moves(side, snapshot))) == len(list(generate_legal_moves(side, B)))
+    assert conf2unicode(snapshot) == conf2unicode(B)
+
+def test_move_shares_structure():
+    B = read_board("submission/board_examp.txt")
+    B[1].extend(Bishop(x, 1, True) for x in range(2, 5) if not is_piece_at(x, 1, B))
+    B[1].extend(Bishop(x, 2, False) for x in range(1, 6) if not is_piece_at(x, 2, B))
+    B[1].extend(Bishop(x, 5, True) for x in (1, 4) if not is_piece_at(x, 5, B))
+    B[1].extend(Bishop(x, 4, False) for x in (2, 3, 5) if not is_piece_at(x, 4, B))
+    first = BoardSnapshot.from_board(B)
+    assert len(first.chunks) == 2
+    piece = first.chunks[1][0]
+    second = first.move(piece.pos_x, piece.pos_y, 1, 1)
+    assert second.chunks[0] is first.chunks[0]
+    assert len(second[1]) == len(first[1])
+    moved = piece_at(piece.pos_x, piece.pos_y, B)
+    make_move(moved, 1, 1, B)
+    assert second == BoardSnapshot.from_board(B)
+    assert second.hash == zobrist_hash(B)
+    assert first != second and first.locate(1, 1) is None
+
+def test_move_capture():
+    B = read_board("submission/board_examp.txt")
+    first = BoardSnapshot.from_board(B)
+    second = first.move(2, 5, 3, 4) # Bb5 to the empty c4
+    B2 = first.board()
+    piece_at(2, 5, B2).move_to(3, 4, B2)
+    assert board_lines(second) == board_lines(B2)
+    third = second.move(5, 3, 4, 4) # Be3 takes Bd4
+    piece_at(5, 3, B2).move_to(4, 4, B2)
+    assert len(third[1]) == len(second[1]) - 1
+    assert board_lines(third) == board_lines(B2) and third.hash == zobrist_hash(B2)
+    with pytest.raises(ValueError):
+        third.move(5, 3, 1, 1)
@@ -0,0 +1,155 @@
+import pytest
+from chess_puzzle import *
+from search import SearchTimeout
+from solver import *
+
+def play_line(B, side, line):
+    '''plays the moves of line on B checking each of them, returns the side to move at the end'''
+    for move in line:
+        start, end = location2index(move[:2]), location2index(move[2:])
+        piece = piece_at(start[0], start[1], B)
+        assert piece.side == side and piece.can_move_to(end[0], end[1], B)
+        piece.move_to(end[0], end[1], B)
+        side = not side
+    return side
+
+@pytest.mark.parametrize("pieces, side, max_depth, mate_in", [
+    ([King(4,2,True), Bishop(3,1,True), Bishop(3,2,True), Bishop(4,4,True), King(1,2,False)], True, 3, 2),
+    ([King(4,2,True), Bishop(3,1,True), Bishop(3,2,True), Bishop(4,4,True), King(1,2,False)], True, 1, None),
+    ([King(4,2,False), Bishop(3,1,False), Bishop(3,2,False), Bishop(4,4,False), King(1,2,True)], False, 2, 2),
+    ([King(3,1,True), Bishop(3,4,True), Bishop(5,1,True), King(1,1,False)], True, 2, 1),
+    ([King(1,1,True), Bishop(3,2,True), King(5,5,False)], True, 2, None),
+    ([King(3,3,True), King(5,5,False), Bishop(1,2,False)], False, 2, None)
+    ]
+)
+def test_solve_mate(pieces, side, max_depth, mate_in):
+    B = (5, pieces)
+    before = [(piece, piece.pos_x, piece.pos_y) for piece in B[1]]
+    line = solve_mate(B, side, max_depth)
+    assert [(piece, piece.pos_x, piece.pos_y) for piece in B[1]] == before
+    if mate_in is None:
+        assert line is None
+    else:
+        assert len(line) == 2 * mate_in - 1
+        loser = play_line(indexed_board(B), side, line)
+        assert is_checkmate(loser, B)
+
+def test_solve_mate_in_check():
+    B = read_board("submission/test_files/board_checkmate.txt")
+    with pytest.raises(ValueError):
+        solve_mate(B, True, 2)
+
+def test_solve_mate_budget():
+    B = read_board("submission/board_examp.txt")
+    with pytest.raises(SearchTimeout):
+        solve_mate(B, True, 3, max_nodes=10)
+
+@pytest.mark.parametrize("max_nodes", [5, 12, 19])
+def test_solve_mate_budget_restores_board(max_nodes):
+    B = read_board("submission/test_files/board_stalemate.txt")
+    before = ([(piece, piece.pos_x, piece.pos_y) for piece in B[1]], zobrist_hash(B))
+    with pytest.raises(SearchTimeout):
+        solve_mate(B, True, 3, max_nodes=max_nodes)
+    assert ([(piece, piece.pos_x, piece.pos_y) for piece in B[1]], zobrist_hash(B)) == before
+
+@pytest.mark.parametrize("filename, key, expected_result", [
+    ("submission/test_files/board_stalemate.txt", 'mate_in', 2),
+    ("submission/test_files/board_b2.txt", 'status', 'no mate'),
+    ("submission/test_files/invalid_file_size.txt", 'error', 'size 27 outside 1..26'),
+    ("submission/test_files/board_checkmate.txt", 'error', 'the side not to move is in check'),
+    ("submission/no_such_file.txt", 'status', None)
+    ]
+)
+def test_solve_file(filename, key, expected_result):
+    result = solve_file(filename, True, 2)
+    assert result.get(key) == expected_result
+
+def test_solve_file_binary(tmp_path):
+    filename = tmp_path / "binary.txt"
+    filename.write_bytes(b"\xff\xfe5\n")
+    assert solve_file(str(filename), True, 2)['error'].startswith('not a text file')
+
+@pytest.mark.parametrize("pieces, side, mates", [
+    ([King(4,2,True), Bishop(3,1,True), Bishop(3,2,True), Bishop(4,4,True), King(1,2,False)], True, True),
+    ([King(4,2,False), Bishop(3,1,False), Bishop(3,2,False), Bishop(4,4,False), King(1,2,True)], False, True),
+    ([King(3,1,True), Bishop(3,4,True), Bishop(5,1,True), King(1,1,False)], True, True),
+    ([King(1,1,True), Bishop(3,2,True), King(5,5,False)], True, False),
+    ([King(3,3,True), King(5,5,False), Bishop(1,2,False)], False, False)
+    ]
+)
+def test_prove_mate(pieces, side, mates):
+    B = (5, pieces)
+    before = [(piece, piece.pos_x, piece.pos_y) for piece in B[1]]
+    line = prove_mate(B, side)
+    assert [(piece, piece.pos_x, piece.pos_y) for piece in B[1]] == before
+    if not mates:
+        assert line is None
+    else:
+        assert len(line) % 2 == 1
+        loser = play_line(indexed_board(B), side, line)
+        assert is_checkmate(loser, B)
+
+def test_prove_mate_deep():
+    # White needs 9 moves against best defence, beyond the reach of solve_mate
+    B = parse_board(['4', 'Ka1, Bd1, Bb4', 'Kc4'])
+    line = prove_mate(B, True)
+    assert len(line) >= 17
+    assert is_checkmate(play_line(indexed_board(B), True, line), B)
+
+@pytest.mark.parametrize("lines, attacker, expected_result", [
+    (['4', 'Ka1, Bd1, Bb4', 'Kc4'], True, True),
+    (['4', 'Kb1, Ba4, Ba2', 'Kd2'], True, False),
+    (['4', 'Kb1, Ba4, Ba2', 'Kd2, Bd1'], True, True),
+    (['4', 'Kb1, Ba4, Ba2', 'Kd2'], False, False),
+    (['4', 'Kb1', 'Kd2'], True, False)
+    ]
+)
+def test_can_mate(lines, attacker, expected_result):
+    assert can_mate(parse_board(lines), attacker) == expected_result
+
+@pytest.mark.parametrize("filename, budget", [
+    ("submission/board_examp.txt", {'max_nodes': 10}),
+    ("submission/board_examp.txt", {'max_entries': 10}),
+    ("submission/test_files/board_stalemate.txt", {'max_entries': 5}),
+    ("submission/test_files/board_stalemate.txt", {'max_entries': 11})
+    ]
+)
+def test_prove_mate_budget(filename, budget):
+    B = read_board(filename)
+    before = (board_lines(B), zobrist_hash(B))
+    with pytest.raises(SearchTimeout):
+        prove_mate(B, True, **budget)
+    assert (board_lines(B), zobrist_hash(B)) == before
+
+# draws of tablebase.generate(5, 'KB-KB') with White to move, settled within max_nodes
+@pytest.mark.parametrize("lines, max_nodes", [
+    (['5', 'Kb1, Bd2', 'Ke5, Ba1'], 2000),
+    (['5', 'Ka1, Bb4', 'Kb3, Bc4'], 5000),
+    (['5', 'Ke1, Bd5', 'Kc2, Ba1'], 50000)
+    ]
+)
+def test_prove_mate_draw(lines, max_nodes):
+    B = parse_board(lines)
+    assert can_mate(B, True)
+    assert prove_mate(B, True, max_nodes=max_nodes) is None
+    assert board_lines(B) == lines
+
+def test_prove_mate_close():
+    # the defender draws by repeating positions, which df-pn alone does not disprove within the budget
+    B = parse_board(['5', 'Ka1, Bb4', 'Kb3, Bc4'])
+    solver = ProofNumberSolver(B, True, max_nodes=5000)
+    solver.next_close = float('inf')
+    with pytest.raises(SearchTimeout):
+        solver.solve()
+    solver = ProofNumberSolver(B, True, max_nodes=5000)
+    assert solver.solve() is None
+    assert solver.close() == 0
+
+def test_prove_mate_in_check():
+    B = read_board("submission/test_files/board_checkmate.txt")
+    with pytest.raises(ValueError):
+        prove_mate(B, True)
+
+def test_solve_file_pn():
+    result = solve_file("submission/test_files/board_stalemate.txt", True, 2, method='pn')
+    assert result['status'] == 'mate' and len(result['line']) % 2 == 1
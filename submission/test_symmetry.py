@@ -0,0 +1,57 @@
+import pytest
+from chess_puzzle import *
+from symmetry import *
+from bench_chess_puzzle import random_board
+from poscache import PositionCache, canonical_key
+import perft
+
+def legal_moves(side, B):
+    return sorted((piece.pos_x, piece.pos_y, x, y) for piece, x, y in generate_legal_moves(side, B))
+
+@pytest.mark.parametrize("transform", transforms)
+def test_inverse(transform):
+    for x, y in [(1, 1), (2, 5), (5, 3), (4, 4)]:
+        assert transform.inverse().square(*transform.square(x, y, 5), 5) == (x, y)
+
+def test_symmetries_distinct():
+    assert len({tuple(f(x, y, 4) for x in range(1, 5) for y in range(1, 5)) for f in symmetries}) == 8
+
+@pytest.mark.parametrize("size, n_pieces", [(3, 4), (5, 7), (8, 12), (26, 40)])
+def test_images_equivalent(size, n_pieces):
+    for seed in range(5):
+        B = random_board(size, n_pieces, seed)
+        for side in (True, False):
+            keys = set()
+            canonical, canonical_side, transform = canonicalize(B, side)
+            for t in transforms:
+                image_B, image_side = transform_board(B, side, t)
+                assert game_status(image_B, image_side) == game_status(B, side)
+                assert legal_moves(image_side, image_B) == sorted(t.move(move, size) for move in legal_moves(side, B))
+                assert canonical_position_key(image_B, image_side) == canonical_position_key(B, side)
+                keys.add(canonical_key(*canonicalize(image_B, image_side)[:2]))
+            assert keys == {canonical_key(canonical, canonical_side)}
+            moves = [transform.inverse().move(move, size) for move in legal_moves(canonical_side, canonical)]
+            assert sorted(moves) == legal_moves(side, B)
+
+def test_perft_invariant():
+    B = read_board("submission/board_examp.txt")
+    expected = perft.perft(B, True, 3)
+    for t in transforms:
+        assert perft.perft(*transform_board(B, True, t), 3) == expected
+
+def test_symmetric_position():
+    B = parse_board(['5', 'Kc1, Ba1, Be1', 'Kc5'])
+    images = {canonical_key(*transform_board(B, True, t)) for t in transforms}
+    assert len(images) == 8 # the reflection in the vertical axis is a symmetry of B
+
+def test_position_cache_symmetric(tmp_path):
+    B = read_board("submission/board_examp.txt")
+    cache = PositionCache(str(tmp_path / "cache.sqlite"))
+    assert cache.status(B, False) == game_status(B, False)
+    move = cache.move(B, False)
+    for t in transforms[1:]:
+        image_B, image_side = transform_board(B, False, t)
+        assert cache.status(image_B, image_side) == game_status(B, False)
+        (x, y), (X, Y) = parse_move(cache.move(image_B, image_side))
+        assert t.inverse().move((x, y, X, Y), 5) == (*parse_move(move)[0], *parse_move(move)[1])
+    assert len(cache) == 2 and cache.stats()['misses'] == 2
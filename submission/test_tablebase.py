@@ -0,0 +1,89 @@
+import filecmp
+import pytest
+from chess_puzzle import *
+import tablebase
+from tablebase import *
+from solver import solve_mate
+
+@pytest.fixture(scope="module")
+def tables(tmp_path_factory):
+    path = tmp_path_factory.mktemp("tablebases")
+    known = {}
+    generate(4, 'K-KBB', 1, str(path), known)
+    generate(3, 'KB-KB', 1, str(path), known)
+    return path, known
+
+@pytest.fixture
+def table_directory(tables, monkeypatch):
+    monkeypatch.setattr(tablebase, 'directory', str(tables[0]))
+    monkeypatch.setattr(tablebase, 'loaded', {})
+
+@pytest.mark.parametrize("material, expected", [("KB-K", ("KB", "K")), ("KBB-KB", ("KBB", "KB"))])
+def test_parse_material(material, expected):
+    assert parse_material(material) == expected
+
+@pytest.mark.parametrize("material", ["KB", "BK-K", "KQ-K", "KB-K-K"])
+def test_parse_material_invalid(material):
+    with pytest.raises(ValueError):
+        parse_material(material)
+
+def test_layout_index():
+    layout = Layout(4, 'KB-KB')
+    assert layout.count == 16 ** 4 * 2
+    for index in (0, 1, 12345, layout.count - 1):
+        assert layout.index(*layout.position(index)) == index
+
+def test_files(tables):
+    path, known = tables
+    assert sorted(known) == [(3, 'K-KB'), (3, 'KB-K'), (3, 'KB-KB'), (4, 'K-KB'), (4, 'K-KBB')]
+    table = Tablebase.load(str(path / "K-KBB_4.cptb"))
+    assert (table.size, table.material, len(table)) == (4, 'K-KBB', 16 ** 4 * 2)
+    assert list(table.values) == list(known[(4, 'K-KBB')].values)
+    table.close()
+
+def test_deterministic(tables, tmp_path):
+    generate(3, 'KB-KB', 2, str(tmp_path))
+    for name in ("KB-KB_3.cptb", "KB-K_3.cptb", "K-KB_3.cptb"):
+        assert filecmp.cmp(tables[0] / name, tmp_path / name, shallow=False)
+
+def test_no_mate_without_two_bishops(tables):
+    table = tables[1][(4, 'K-KB')]
+    assert all(value in (0, table.illegal) for value in table.values)
+
+@pytest.mark.parametrize("index", range(1, 16 ** 4 * 2, 997))
+def test_probe_matches_solver(tables, index):
+    table = tables[1][(4, 'K-KBB')]
+    squares, side = table.layout.position(index)
+    if len(set(squares)) < len(squares):
+        return
+    pieces = [piece_map[kind](sq % 4 + 1, sq // 4 + 1, owner) for (kind, owner), sq in zip(table.layout.pieces, squares)]
+    B = (4, IndexedPieceList(pieces, size=4))
+    result = table.probe(B, side)
+    assert (result is None) == is_check(not side, B)
+    if result is None:
+        return
+    wdl, dtm = result
+    if wdl == 1:
+        assert len(solve_mate(B, side, (dtm + 1) // 2)) == dtm
+        assert dtm == 1 or solve_mate(B, side, (dtm - 1) // 2) is None
+    else:
+        assert solve_mate(B, side, 2) is None
+    if wdl == -1 and dtm == 0:
+        assert is_checkmate(side, B)
+
+def test_find_black_move_tablebase(table_directory):
+    B = (4, IndexedPieceList([King(1, 1, True), King(3, 1, False), Bishop(3, 2, False), Bishop(2, 4, False)], size=4))
+    table = open_table(4, 'K-KBB')
+    assert table.probe(B, False) == (1, 5)
+    side = False
+    for ply in range(5):
+        piece, x, y = find_black_move(B, 'tablebase') if not side else tablebase_move(True, B)
+        assert piece.side == side and piece.can_move_to(x, y, B)
+        piece.move_to(x, y, B)
+        side = not side
+    assert is_checkmate(True, B)
+
+def test_tablebase_move_without_table(table_directory):
+    B = read_board("submission/board_examp.txt")
+    piece, x, y = find_black_move(B, 'tablebase')
+    assert piece.side is False and piece.can_move_to(x, y, B)
@@ -0,0 +1,42 @@
+import pytest
+from chess_puzzle import *
+from tournament import *
+
+def strip_times(games):
+    return [{key: value for key, value in game.items() if not key.endswith('seconds')} for game in games]
+
+@pytest.fixture
+def suite():
+    return load_suite(["submission/board_examp.txt", "submission/test_files"])
+
+def test_load_suite(suite):
+    assert [name for name, _ in suite] == ["submission/board_examp.txt", "submission/test_files/board_b2.txt",
+                                           "submission/test_files/board_checkmate.txt", "submission/test_files/board_stalemate.txt"]
+    assert suite[0][1] == board_lines(read_board("submission/board_examp.txt"))
+
+@pytest.mark.parametrize("filename, result, plies", [
+    ("submission/test_files/board_checkmate.txt", 'white', 0),
+    ("submission/board_examp.txt", 'limit', 6)
+    ]
+)
+def test_play_game(filename, result, plies):
+    game = play_game(board_lines(read_board(filename)), 'greedy', 'greedy', 6, 'seed')
+    assert game['result'] == result and game['plies'] == plies
+
+def test_deterministic(suite):
+    first = run_tournament(suite, ['greedy'], ['greedy'], games=2, max_plies=40, seed=1, jobs=1)
+    second = run_tournament(suite, ['greedy'], ['greedy'], games=2, max_plies=40, seed=1, jobs=2)
+    assert strip_times(first) == strip_times(second)
+    assert [game['board'] for game in first] == [name for name, _ in suite for _ in range(2)]
+
+def test_deterministic_search(suite):
+    first = run_tournament(suite[:2], ['search'], ['greedy'], max_plies=4, jobs=1, max_nodes=500)
+    second = run_tournament(suite[:2], ['search'], ['greedy'], max_plies=4, jobs=2, max_nodes=500)
+    assert strip_times(first) == strip_times(second)
+
+def test_summarize(suite):
+    games = run_tournament(suite, ['greedy'], ['greedy'], games=2, max_plies=40, jobs=1)
+    [row] = summarize(games)
+    assert row['games'] == 8
+    assert row['white_rate'] + row['black_rate'] + row['stalemate_rate'] + row['limit_rate'] == pytest.approx(1)
+    assert row['plies'] == sum(game['plies'] for game in games)
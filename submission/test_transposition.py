@@ -0,0 +1,88 @@
+import pytest
+from chess_puzzle import *
+from transposition import *
+
+boards = ["submission/board_examp.txt",
+          "submission/test_files/board_b2.txt",
+          "submission/test_files/board_checkmate.txt",
+          "submission/test_files/board_stalemate.txt"]
+
+@pytest.mark.parametrize("filename", boards)
+def test_zobrist_hash_incremental(filename):
+    B = read_board(filename)
+    for side in (True, False, True):
+        start = zobrist_hash(B)
+        assert start == zobrist_hash((B[0], list(B[1])))
+        moves = list(generate_legal_moves(side, B))
+        if not moves:
+            break
+        piece, x, y = moves[len(moves) // 2]
+        undo = make_move(piece, x, y, B)
+        assert zobrist_hash(B) == zobrist_hash((B[0], list(B[1])))
+        assert zobrist_hash(B) != start
+        unmake_move(undo, B)
+        assert zobrist_hash(B) == start
+        piece.move_to(x, y, B)
+        assert zobrist_hash(B) == zobrist_hash((B[0], list(B[1])))
+
+@pytest.mark.parametrize("pieces_a, pieces_b, size_a, size_b, expected_result", [
+    ([King(1,1,True), King(3,3,False)], [King(3,3,False), King(1,1,True)], 5, 5, True),
+    ([King(1,1,True), King(3,3,False)], [King(1,1,False), King(3,3,True)], 5, 5, False),
+    ([King(1,1,True), King(3,3,False)], [King(1,1,True), King(3,3,False)], 5, 6, False),
+    ([King(1,1,True), Bishop(2,2,True), King(3,3,False)], [King(1,1,True), King(2,2,True), King(3,3,False)], 5, 5, False),
+    ([King(1,1,True), King(3,3,False)], [King(1,1,True), King(3,4,False)], 5, 5, False)
+    ]
+)
+def test_zobrist_hash_identity(pieces_a, pieces_b, size_a, size_b, expected_result):
+    assert (zobrist_hash((size_a, pieces_a)) == zobrist_hash((size_b, pieces_b))) == expected_result
+
+def test_position_key_side():
+    B = read_board("submission/board_examp.txt")
+    assert position_key(B, True) == zobrist_hash(B)
+    assert position_key(B, False) != position_key(B, True)
+
+@pytest.mark.parametrize("max_bytes, slots", [
+    (1, 1),
+    (ENTRY_BYTES, 1),
+    (ENTRY_BYTES * 10, 10),
+    (ENTRY_BYTES * 10 + 1, 10),
+    (2 ** 20, 2 ** 20 // ENTRY_BYTES)
+    ]
+)
+def test_table_memory_cap(max_bytes, slots):
+    table = TranspositionTable(max_bytes)
+    for key in range(3 * slots):
+        table.store(key, key)
+    assert len(table.slots) == slots
+    assert len(table) == slots
+
+def test_table_probe_and_counters():
+    table = TranspositionTable(ENTRY_BYTES * 4)
+    assert table.probe(5) is None
+    assert table.store(5, 'a', depth=2)
+    assert table.probe(5) == 'a'
+    assert table.probe(5, depth=3) is None
+    assert table.probe(9) is None
+    assert table.stats()['hits'] == 1
+    assert table.stats()['misses'] == 3
+
+def test_table_replacement_policy():
+    table = TranspositionTable(ENTRY_BYTES)
+    assert table.store(1, 'deep', depth=5)
+    assert not table.store(2, 'shallow', depth=1)
+    assert table.probe(1) == 'deep'
+    table.new_generation()
+    assert table.store(2, 'shallow', depth=1)
+    assert table.probe(2) == 'shallow'
+    assert table.store(2, 'same key', depth=0)
+    assert table.stats()['replacements'] == 1
+
+@pytest.mark.parametrize("filename", boards)
+def test_game_status_table(filename):
+    B = read_board(filename)
+    table = TranspositionTable(2 ** 16)
+    for side in (True, False):
+        assert game_status(B, side, table) == game_status(B, side)
+        assert game_status(B, side, table) == game_status(B, side)
+    assert table.hits == 2
+    assert table.misses == 2
@@ -0,0 +1,39 @@
+import pytest
+from chess_puzzle import *
+from bench_chess_puzzle import random_board
+import search
+
+np = pytest.importorskip("numpy")
+from vectorized import *
+
+def scalar_results(B):
+    bitboard_B = to_bitboard(B)
+    return tuple([is_check(True, B), is_check(False, B),
+                  bin(bitboard_B.attacked(True)).count('1'), bin(bitboard_B.attacked(False)).count('1'),
+                  search.mobility(True, B), search.mobility(False, B)])
+
+def test_pack_boards():
+    B = read_board("submission/board_examp.txt")
+    packed = pack_boards([B, B])
+    assert packed.shape == (2, 5, 5, PLANES) and packed.dtype == bool
+    assert packed[0, 1, 4, WHITE_BISHOPS] and packed[0, 2, 4, WHITE_KING] and packed[0, 1, 2, BLACK_KING]
+    assert packed.sum() == 2 * len(B[1])
+    with pytest.raises(ValueError):
+        pack_boards([B, read_board("submission/test_files/board_b2.txt")])
+
+@pytest.mark.parametrize("filename", ["submission/board_examp.txt", "submission/test_files/board_checkmate.txt",
+                                      "submission/test_files/board_stalemate.txt"])
+def test_matches_scalar_files(filename):
+    B = read_board(filename)
+    assert tuple(int(values[0]) for values in analyse_batch([B])) == scalar_results(B)
+
+@pytest.mark.parametrize("size, n_pieces", [(2, 2), (3, 4), (5, 10), (8, 12), (8, 40), (12, 30), (26, 60)])
+def test_matches_scalar_random(size, n_pieces):
+    boards = [random_board(size, n_pieces, seed) for seed in range(40)]
+    result = analyse_batch(pack_boards(boards))
+    for i, B in enumerate(boards):
+        assert tuple(int(values[i]) for values in result) == scalar_results(B)
+
+def test_empty_batch():
+    result = analyse_batch([])
+    assert all(len(values) == 0 for values in result)
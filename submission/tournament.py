@@ -0,0 +1,166 @@
+'''self-play tournament runner for chess_puzzle strategies
+
+plays engine-vs-engine games from a suite of starting boards on a process pool and reports
+win, loss and stalemate rates and moves per second for every pairing of strategies, e.g.
+    python tournament.py boards/ --white greedy --black greedy search --games 4 --max-plies 200
+
+every game seeds random from the tournament seed, the board and the game number and the
+'search' strategy runs on a node budget instead of its time budget, so the same command plays
+the same games with any number of worker processes
+'''
+import argparse
+import concurrent.futures
+import json
+import os
+import random
+import time
+from chess_puzzle import *
+from batch import iter_paths
+import search
+
+def tournament_move(B: Board, side: bool, strategy: str, max_nodes: int) -> Union[tuple[int, int, int, int], None]:
+    '''returns the move of side chosen by strategy like strategy_move, 'search' searches max_nodes nodes without a time limit
+
+    Parameters:
+        B (Board): board configuration
+        side (bool): True if white and False if black
+        strategy (str): key of strategies
+        max_nodes (int): node budget of each 'search' move
+    Returns:
+        Union[tuple[int, int, int, int], None]: start and end coordinates, None if side cannot move
+    '''
+    if strategy != 'search':
+        return strategy_move(B, side, strategy)
+    move = search.best_move(B, side, max_nodes=max_nodes, max_time=None).move
+    if move is None:
+        return None
+    return (move[0].pos_x, move[0].pos_y, move[1], move[2])
+
+def play_game(lines: list[str], white: str, black: str, max_plies: int, seed: str, max_nodes: int = 20000) -> dict:
+    '''plays one game between two strategies from a board
+
+    Parameters:
+        lines (list[str]): starting board in plain format, White to move
+        white (str): key of strategies playing White
+        black (str): key of strategies playing Black
+        max_plies (int): number of plies after which the game is stopped
+        seed (str): seed of random for this game
+        max_nodes (int): node budget of each 'search' move
+    Returns:
+        dict: the result ('white', 'black', 'stalemate' or 'limit'), the number of plies and the seconds used by each side
+    '''
+    random.seed(seed)
+    game = Game(parse_board(lines), black)
+    seconds = {True: 0.0, False: 0.0}
+    plies = 0
+    while game.update_status() is None and plies < max_plies:
+        side = game.side
+        start = time.perf_counter()
+        move = tournament_move(game.B, side, white if side else black, max_nodes)
+        seconds[side] += time.perf_counter() - start
+        if side:
+            game.play_white(index2location(move[0], move[1]) + index2location(move[2], move[3]))
+        else:
+            game.play_black(move)
+        plies += 1
+    results = {'White wins': 'white', 'Black wins': 'black', 'Stalemate': 'stalemate', None: 'limit'}
+    return {'result': results[game.result], 'plies': plies, 'white_seconds': seconds[True], 'black_seconds': seconds[False]}
+
+def play_task(task: tuple) -> dict:
+    '''plays the game described by task in a worker process'''
+    board, lines, white, black, number, max_plies, seed, max_nodes = task
+    result = play_game(lines, white, black, max_plies, f'{seed}:{board}:{number}', max_nodes)
+    return {'board': board, 'white': white, 'black': black, 'game': number, **result}
+
+def load_suite(patterns: list[str]) -> list[tuple[str, list[str]]]:
+    '''returns (name, plain lines) of every valid board in the files named by patterns
+    files may hold several boards in the multi-board format, invalid boards are skipped
+    '''
+    suite = []
+    for filename in iter_paths(patterns):
+        try:
+            boards = list(iter_boards(filename, errors='skip'))
+        except IOError:
+            continue
+        for i, B in enumerate(boards):
+            suite.append((filename if len(boards) == 1 else f'{filename}#{i}', board_lines(B)))
+    return suite
+
+def run_tournament(suite: list, whites: list[str], blacks: list[str], games: int = 1, max_plies: int = 200,
+                   seed: int = 0, jobs: int = None, max_nodes: int = 20000) -> list[dict]:
+    '''plays every pairing of a White and a Black strategy on every board of suite
+
+    Parameters:
+        suite (list): (name, plain lines) of the starting boards
+        whites (list[str]): strategies playing White
+        blacks (list[str]): strategies playing Black
+        games (int): games per board and pairing, each with its own seed
+        max_plies (int): move limit of each game in plies
+        seed (int): tournament seed
+        jobs (int): worker processes, all cores if None, no pool if 1
+        max_nodes (int): node budget of each 'search' move
+    Returns:
+        list[dict]: the games in a fixed order, see play_task
+    '''
+    tasks = [(name, lines, white, black, number, max_plies, seed, max_nodes)
+             for white in whites for black in blacks for name, lines in suite for number in range(games)]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        return [play_task(task) for task in tasks]
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+        return list(executor.map(play_task, tasks, chunksize=max(1, len(tasks) // (4 * jobs))))
+
+def summarize(games: list[dict]) -> list[dict]:
+    '''aggregates the games of each pairing
+
+    Parameters:
+        games (list[dict]): results of run_tournament
+    Returns:
+        list[dict]: per pairing the number of games, the rates of each result, plies and moves per second of each side
+    '''
+    pairings = {}
+    for game in games:
+        pairings.setdefault((game['white'], game['black']), []).append(game)
+    report = []
+    for (white, black), played in pairings.items():
+        n = len(played)
+        white_plies = sum((game['plies'] + 1) // 2 for game in played)
+        black_plies = sum(game['plies'] // 2 for game in played)
+        white_seconds = sum(game['white_seconds'] for game in played)
+        black_seconds = sum(game['black_seconds'] for game in played)
+        report.append({'white': white, 'black': black, 'games': n,
+                       **{f'{result}_rate': sum(game['result'] == result for game in played) / n
+                          for result in ('white', 'black', 'stalemate', 'limit')},
+                       'plies': white_plies + black_plies,
+                       'white_moves_per_second': white_plies / white_seconds if white_seconds else 0.0,
+                       'black_moves_per_second': black_plies / black_seconds if black_seconds else 0.0})
+    return report
+
+def main() -> None:
+    '''runs a tournament from the command line and prints the report'''
+    parser = argparse.ArgumentParser(description='self-play tournament for chess_puzzle strategies')
+    parser.add_argument('patterns', nargs='+', help='directories, board files or glob patterns of starting boards')
+    parser.add_argument('--white', nargs='+', choices=sorted(strategies), default=['greedy'], help='strategies playing White')
+    parser.add_argument('--black', nargs='+', choices=sorted(strategies), default=['greedy'], help='strategies playing Black')
+    parser.add_argument('--games', type=int, default=1, help='games per board and pairing')
+    parser.add_argument('--max-plies', type=int, default=200, help='move limit of each game in plies')
+    parser.add_argument('--seed', type=int, default=0, help='tournament seed')
+    parser.add_argument('--max-nodes', type=int, default=20000, help="node budget of each move of the 'search' strategy")
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes, all cores by default')
+    parser.add_argument('--output', default=None, help='JSON file for the report and all games')
+    args = parser.parse_args()
+    suite = load_suite(args.patterns)
+    start = time.perf_counter()
+    games = run_tournament(suite, args.white, args.black, args.games, args.max_plies, args.seed, args.jobs, args.max_nodes)
+    report = summarize(games)
+    for row in report:
+        print(f"{row['white']} vs {row['black']}: {row['games']} games, White {row['white_rate']:.1%}, "
+              f"Black {row['black_rate']:.1%}, stalemate {row['stalemate_rate']:.1%}, limit {row['limit_rate']:.1%}, "
+              f"{row['white_moves_per_second']:.0f}/{row['black_moves_per_second']:.0f} moves/s")
+    print(f'{len(games)} games from {len(suite)} boards in {time.perf_counter() - start:.1f} s')
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'seed': args.seed, 'max_plies': args.max_plies, 'max_nodes': args.max_nodes, 'report': report, 'games': games}, file, indent=1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+'''bounded transposition table keyed by chess_puzzle.position_key
+
+the table is a fixed number of slots, slot = key % number of slots,
+so its memory use is set once by max_bytes and never grows
+'''
+
+# estimated bytes per slot: the list pointer, the entry tuple and its key, depth and generation ints
+ENTRY_BYTES = 160
+
+class TranspositionTable:
+    '''maps position keys to search or status results with a depth-preferred, aging replacement policy
+
+    a stored entry is replaced by a different position only if the slot is empty,
+    the entry was stored in an older generation (see new_generation),
+    or the new result was searched at least as deep
+    '''
+    def __init__(self, max_bytes: int = 16 * 2 ** 20):
+        '''allocates the slots
+
+        Parameters:
+            max_bytes (int): memory cap of the table in bytes
+        '''
+        self.max_bytes = max_bytes
+        self.slots = [None] * max(1, max_bytes // ENTRY_BYTES)
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.replacements = 0
+
+    def __len__(self) -> int:
+        '''returns the number of occupied slots'''
+        return sum(entry is not None for entry in self.slots)
+
+    def probe(self, key: int, depth: int = 0):
+        '''returns the value stored for key if it was searched to at least depth, otherwise None
+
+        Parameters:
+            key (int): position key
+            depth (int): minimum depth of the stored result
+        Returns:
+            the stored value or None
+        '''
+        entry = self.slots[key % len(self.slots)]
+        if entry is not None and entry[0] == key and entry[1] >= depth:
+            self.hits += 1
+            return entry[3]
+        self.misses += 1
+        return None
+
+    def store(self, key: int, value, depth: int = 0) -> bool:
+        '''stores value for key unless the replacement policy keeps the entry in its slot
+
+        Parameters:
+            key (int): position key
+            value: result to store, must not be None
+            depth (int): depth of the search that produced value
+        Returns:
+            bool: True if value was stored or False if not
+        '''
+        i = key % len(self.slots)
+        entry = self.slots[i]
+        if entry is not None and entry[0] != key:
+            if entry[2] == self.generation and entry[1] > depth:
+                return False
+            self.replacements += 1
+        self.slots[i] = (key, depth, self.generation, value)
+        self.stores += 1
+        return True
+
+    def new_generation(self) -> None:
+        '''marks all stored entries as old, so that they can be replaced by shallower results'''
+        self.generation += 1
+
+    def clear(self) -> None:
+        '''removes all entries and resets the counters'''
+        self.__init__(self.max_bytes)
+
+    def stats(self) -> dict:
+        '''returns the counters of the table
+
+        Returns:
+            dict: slots, used slots, hits, misses, hit rate, stores and replacements
+        '''
+        probes = self.hits + self.misses
+        return {'slots': len(self.slots), 'used': len(self), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / probes if probes else 0.0,
+                'stores': self.stores, 'replacements': self.replacements}
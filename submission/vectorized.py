@@ -0,0 +1,109 @@
+'''NumPy batch evaluation of check, attacked squares and mobility for many boards of one size
+
+boards are packed into a boolean array of shape (N, S, S, PLANES) indexed [board, x - 1, y - 1, plane];
+bishop attacks are computed for all boards at once by shifting the bishops one step along each diagonal
+and masking the rays at the first occupied square, king attacks by the eight neighbour shifts
+
+numpy is an optional dependency, only needed by this module
+'''
+from typing import NamedTuple
+from chess_puzzle import *
+
+try:
+    import numpy as np
+except ImportError: # the rest of chess_puzzle works without numpy
+    np = None
+
+WHITE_KING, WHITE_BISHOPS, BLACK_KING, BLACK_BISHOPS = range(4)
+PLANES = 4
+
+def planes_of(side: bool) -> tuple[int, int]:
+    '''returns the king plane and the bishop plane of side'''
+    return (WHITE_KING, WHITE_BISHOPS) if side else (BLACK_KING, BLACK_BISHOPS)
+
+def pack_boards(boards) -> 'np.ndarray':
+    '''packs boards of the same size into occupancy planes
+    raises ValueError if the boards do not all have the same size
+
+    Parameters:
+        boards: iterable of Board
+    Returns:
+        np.ndarray: boolean array of shape (N, S, S, PLANES)
+    '''
+    if np is None:
+        raise ImportError('the batch API of vectorized.py needs numpy')
+    boards = list(boards)
+    sizes = {B[0] for B in boards}
+    if len(sizes) > 1:
+        raise ValueError(f'boards of different sizes {sorted(sizes)}')
+    size = sizes.pop() if sizes else 1
+    packed = np.zeros((len(boards), size, size, PLANES), dtype=bool)
+    for n, B in enumerate(boards):
+        for piece in B[1]:
+            king, bishops = planes_of(piece.side)
+            packed[n, piece.pos_x - 1, piece.pos_y - 1, king if isinstance(piece, King) else bishops] = True
+    return packed
+
+def shift(planes: 'np.ndarray', dx: int, dy: int) -> 'np.ndarray':
+    '''moves every set square of (N, S, S) planes by dx, dy, dropping what leaves the board'''
+    size = planes.shape[1]
+    moved = np.zeros_like(planes)
+    moved[:, max(dx, 0):size + min(dx, 0), max(dy, 0):size + min(dy, 0)] = \
+        planes[:, max(-dx, 0):size - max(dx, 0), max(-dy, 0):size - max(dy, 0)]
+    return moved
+
+def side_attacks(packed: 'np.ndarray', side: bool) -> tuple['np.ndarray', 'np.ndarray']:
+    '''returns the squares attacked by side and its mobility on every board
+
+    Parameters:
+        packed (np.ndarray): boards from pack_boards
+        side (bool): True if white and False if black
+    Returns:
+        tuple[np.ndarray, np.ndarray]: attacked squares of shape (N, S, S) including squares of either side,
+        and the number of squares each piece of side can reach according to [Rule1]-[Rule3], summed per board
+    '''
+    king, bishops = planes_of(side)
+    occupied = packed.any(axis=3)
+    own = packed[..., king] | packed[..., bishops]
+    attacked = np.zeros_like(occupied)
+    mobility = np.zeros(len(packed), dtype=np.int64)
+    for dx, dy in bishop_directions:
+        ray = packed[..., bishops]
+        for _ in range(packed.shape[1] - 1):
+            ray = shift(ray, dx, dy)
+            if not ray.any():
+                break
+            attacked |= ray
+            mobility += (ray & ~own).sum(axis=(1, 2))
+            ray &= ~occupied # a ray stops at the first piece it meets
+    for dx, dy in king_directions:
+        step = shift(packed[..., king], dx, dy)
+        attacked |= step
+        mobility += (step & ~own).sum(axis=(1, 2))
+    return attacked, mobility
+
+class BatchResult(NamedTuple):
+    '''per-board results of analyse_batch, arrays of length N'''
+    white_check: 'np.ndarray'
+    black_check: 'np.ndarray'
+    white_attacked: 'np.ndarray' # number of squares attacked by White
+    black_attacked: 'np.ndarray'
+    white_mobility: 'np.ndarray'
+    black_mobility: 'np.ndarray'
+
+def analyse_batch(boards) -> BatchResult:
+    '''computes check flags, attacked-square counts and mobility of both sides for many boards of one size
+    the results match is_check, bitboard.BitBoard.attacked and search.mobility board by board
+
+    Parameters:
+        boards: iterable of Board, or an array from pack_boards
+    Returns:
+        BatchResult: arrays indexed like boards
+    '''
+    packed = boards if np is not None and isinstance(boards, np.ndarray) else pack_boards(boards)
+    white_attacked, white_mobility = side_attacks(packed, True)
+    black_attacked, black_mobility = side_attacks(packed, False)
+    return BatchResult((packed[..., WHITE_KING] & black_attacked).any(axis=(1, 2)),
+                       (packed[..., BLACK_KING] & white_attacked).any(axis=(1, 2)),
+                       white_attacked.sum(axis=(1, 2)), black_attacked.sum(axis=(1, 2)),
+                       white_mobility, black_mobility)